@@ -1,3 +1,8 @@
 """E-commerce Customer Satisfaction API."""
 
+import time
+
+# Reference point for the startup time budget reported by /health/ready.
+IMPORT_STARTED = time.perf_counter()
+
 __version__ = "1.0.0"
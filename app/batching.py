@@ -0,0 +1,141 @@
+"""
+Dynamic micro-batching for single-order inference.
+
+Concurrent requests submit one item each; the batcher groups items that
+arrive within a short window (or until the batch is full) and runs a single
+vectorized call for the whole group, then hands each caller its own result.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the batcher already holds its maximum number of items."""
+
+
+class MicroBatcher:
+    """Collects single items into batches for one vectorized call.
+
+    Args:
+        predict_batch: Blocking function mapping a list of items to a list of
+            results in the same order. Runs in the threadpool.
+        max_batch_size: Flush as soon as this many items are waiting.
+        max_wait_ms: Flush at the latest this long after the first item arrived.
+        max_queue_size: Items allowed waiting or in flight before new ones are rejected.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 1024,
+    ) -> None:
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._in_flight = 0
+
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._peak_queue_depth = 0
+        self._rejected = 0
+        self._size_flushes = 0
+        self._timeout_flushes = 0
+        self._batch_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Items waiting for a batch plus items being scored."""
+        return len(self._pending) + self._in_flight
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        if self.queue_depth >= self.max_queue_size:
+            self._rejected += 1
+            raise QueueFullError(f"Micro-batch queue is full ({self.max_queue_size} items)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._peak_queue_depth = max(self._peak_queue_depth, self.queue_depth)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._size_flushes += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush_on_timeout)
+
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self._peak_queue_depth,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest_batch,
+            "size_flushes": self._size_flushes,
+            "timeout_flushes": self._timeout_flushes,
+            "rejected": self._rejected,
+            "avg_batch_ms": round(self._batch_seconds / self._batches * 1000, 3) if self._batches else 0.0,
+        }
+
+    def _flush_on_timeout(self) -> None:
+        self._timer = None
+        if self._pending:
+            self._timeout_flushes += 1
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        self._in_flight += len(batch)
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await run_in_threadpool(self.predict_batch, items)
+        except Exception as exc:  # every waiting request gets the failure
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._in_flight -= len(batch)
+            self._batches += 1
+            self._items += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._batch_seconds += time.perf_counter() - start
+
+        if len(results) != len(batch):
+            error = RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} items")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -6,6 +6,7 @@ Production validates that required env vars are set at startup.
 """
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -38,6 +39,29 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = False
 
+    # Startup: preload model/medians/explainer and run one warm-up inference
+    WARMUP_ON_STARTUP: bool = True
+    STARTUP_BUDGET_SECONDS: float = 20.0
+
+    # Model inference
+    EXPLANATION_ENGINE: Literal["shap", "native"] = "native"
+    BATCH_MAX_ITEMS: int = 10_000
+    STREAM_CHUNK_SIZE: int = 1_000  # NDJSON lines featurized and scored together
+    STREAM_MAX_LINE_BYTES: int = 1_048_576  # longer NDJSON lines are rejected as item errors
+
+    # Micro-batching of concurrent single-order requests
+    MICROBATCH_ENABLED: bool = True
+    MICROBATCH_MAX_SIZE: int = 32
+    MICROBATCH_MAX_WAIT_MS: float = 2.0
+    MICROBATCH_MAX_QUEUE: int = 1024
+
+    # Cache of prediction + explanation results keyed by the feature vector
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_BACKEND: Literal["memory", "sqlite"] = "memory"  # sqlite: shared by workers
+    RESULT_CACHE_SIZE: int = 10_000
+    RESULT_CACHE_TTL_SECONDS: float | None = 3600.0
+    RESULT_CACHE_PATH: str = "result_cache.sqlite"
+
     @property
     def is_production(self) -> bool:
         return self.ENVIRONMENT == "production"
@@ -5,17 +5,37 @@ Based on the initial work by the team in backend/ecomerce-sentiments-api/app/mai
 refactored to align with the project's architecture conventions.
 """
 
+import asyncio
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
+from app import IMPORT_STARTED
 from app.config import get_settings
+from app.warmup import StartupReport, warm_up
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Start the model warm-up in the background so liveness answers right away."""
+    settings = app.state.settings
+    task = None
+    if settings.WARMUP_ON_STARTUP:
+        task = asyncio.create_task(run_in_threadpool(warm_up, app.state.startup, settings))
+    else:
+        app.state.startup.ready = True
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+
+
 def create_app(env: str | None = None) -> FastAPI:
     """
     Create and configure the FastAPI application.
@@ -55,10 +75,19 @@ All endpoints return a standard envelope:
 """,
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=_lifespan,
+    )
+
+    app.state.settings = settings
+    app.state.startup = StartupReport(
+        budget_seconds=settings.STARTUP_BUDGET_SECONDS,
+        app_import_seconds=time.perf_counter() - IMPORT_STARTED,
     )
 
     _configure_logging(settings)
     _add_middleware(app, settings)
+    _configure_batching(app, settings)
+    _configure_result_cache(app, settings)
     _register_routers(app)
 
     logger.info("Application started", extra={"environment": environment})
@@ -85,11 +114,49 @@ def _add_middleware(app: FastAPI, settings: object) -> None:
     )
 
 
+def _configure_batching(app: FastAPI, settings: object) -> None:
+    """Create the micro-batcher shared by single-order requests, if enabled."""
+    app.state.batcher = None
+    if not getattr(settings, "MICROBATCH_ENABLED", False):
+        return
+
+    from app.batching import MicroBatcher
+    from app.routers.analyze import predict_feature_batch
+
+    engine = getattr(settings, "EXPLANATION_ENGINE", None)
+    app.state.batcher = MicroBatcher(
+        lambda items: predict_feature_batch(items, engine=engine),
+        max_batch_size=settings.MICROBATCH_MAX_SIZE,
+        max_wait_ms=settings.MICROBATCH_MAX_WAIT_MS,
+        max_queue_size=settings.MICROBATCH_MAX_QUEUE,
+    )
+
+
+def _configure_result_cache(app: FastAPI, settings: object) -> None:
+    """Create the prediction result cache, if enabled."""
+    app.state.result_cache = None
+    if not getattr(settings, "RESULT_CACHE_ENABLED", False):
+        return
+
+    from olist_review_model.result_cache import make_result_cache
+
+    app.state.result_cache = make_result_cache(
+        backend=settings.RESULT_CACHE_BACKEND,
+        max_size=settings.RESULT_CACHE_SIZE,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        path=settings.RESULT_CACHE_PATH,
+    )
+
+
 def _register_routers(app: FastAPI) -> None:
     """Register all application routers."""
     from app.routers.analyze import router as analyze_router
+    from app.routers.health import router as health_router
+    from app.routers.model import router as model_router
 
+    app.include_router(health_router)
     app.include_router(analyze_router)
+    app.include_router(model_router)
 
 
 app = create_app()
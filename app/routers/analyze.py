@@ -1,12 +1,24 @@
 """Analyze endpoints — prediction and analysis of order satisfaction."""
 
-from datetime import datetime
+from typing import AsyncIterator
 
-from fastapi import APIRouter
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from olist_review_model.processing.hybrid import build_feature_frame, build_features
+
+from app.batching import QueueFullError
 
 from app.schemas.base import ApiResponse
 from app.schemas.predict import (
+    BatchItemResultSchema,
+    BatchPredictionDataSchema,
+    HybridBatchInput,
     HybridInput,
+    ItemErrorSchema,
     PredictionDataSchema,
     ReasonSchema,
 )
@@ -47,63 +59,8 @@ def _impact_label(shap_val: float, max_abs: float) -> str:
     return "low"
 
 
-def _build_features(data: HybridInput) -> dict:
-    """Map HybridInput fields to the 16 model feature values.
-
-    Optional fields fall back to training-time medians (loaded from
-    feature_medians.json) so imputation matches what the model was trained on.
-    """
-    from olist_review_model.pipeline import load_feature_medians
-
-    m = load_feature_medians()
-
-    def median(key: str, fallback: float = 0.0) -> float:
-        return m.get(key, fallback)
-
-    purchase = datetime.fromisoformat(data.delivery.purchase_date)
-    promised = datetime.fromisoformat(data.delivery.promised_date)
-    dispatched = datetime.fromisoformat(data.delivery.dispatched_date) if data.delivery.dispatched_date else purchase
-    delivered = datetime.fromisoformat(data.delivery.delivered_date) if data.delivery.delivered_date else promised
-
-    delivery_delta_days = (delivered - promised).days
-    seller_dispatch_days = (dispatched - purchase).days
-    carrier_transit_days = (delivered - dispatched).days
-
-    text = data.review.text
-    words = text.split()
-    avg_word_len = sum(len(w) for w in words) / len(words) if words else 0.0
-
-    return {
-        "delivery_delta_days": delivery_delta_days,
-        "seller_dispatch_days": seller_dispatch_days,
-        "carrier_transit_days": carrier_transit_days,
-        "distance_seller_customer_km": data.location.distance_km if data.location and data.location.distance_km is not None else median("distance_seller_customer_km"),
-        "price": max(data.financials.order_total - data.financials.shipping_cost, 0.0) if data.financials else median("price"),
-        "freight_value": data.financials.shipping_cost if data.financials else median("freight_value"),
-        "payment_value": data.financials.order_total if data.financials else median("payment_value"),
-        "payment_installments": data.financials.payment_installments if data.financials and data.financials.payment_installments else median("payment_installments", 1.0),
-        "product_weight_g": data.item.weight_g if data.item and data.item.weight_g is not None else median("product_weight_g"),
-        "product_description_lenght": data.item.description_length if data.item and data.item.description_length is not None else median("product_description_lenght"),
-        "product_photos_qty": data.item.media_count if data.item and data.item.media_count is not None else median("product_photos_qty"),
-        "char_count": len(text),
-        "word_count": len(words),
-        "exclamation_count": text.count("!"),
-        "question_count": text.count("?"),
-        "avg_word_length": round(avg_word_len, 4),
-    }
-
-
-@router.post("/hybrid", response_model=ApiResponse)
-def analyze_hybrid(input_data: HybridInput) -> ApiResponse:
-    """
-    Predict customer satisfaction from order data + review text.
-    Returns prediction probability and all SHAP feature contributions as reasons, sorted by absolute impact.
-    """
-    from olist_review_model.predict import make_prediction_with_shap
-
-    features = _build_features(input_data)
-    result = make_prediction_with_shap(features)
-
+def _to_prediction(result: dict) -> PredictionDataSchema:
+    """Turn one model result (probability + SHAP contributions) into the API schema."""
     contributions = result["shap_contributions"]
     total_abs = sum(abs(c["shap_value"]) for c in contributions) or 1.0
     max_abs = max(abs(c["shap_value"]) for c in contributions) if contributions else 1.0
@@ -118,11 +75,277 @@ def analyze_hybrid(input_data: HybridInput) -> ApiResponse:
         for c in contributions
     ]
 
-    prediction = PredictionDataSchema(
+    return PredictionDataSchema(
         predicted_score=1 if result["is_negative"] else 5,
         negative_probability=result["probability"],
         sentiment="negative" if result["is_negative"] else "positive",
         reasons=reasons,
     )
 
-    return ApiResponse(data=prediction.model_dump())
+
+def _cache_keys(engine: str, X: np.ndarray) -> list[str]:
+    """Result cache keys: served model file and its content + explanation engine + canonical feature vector.
+
+    The model digest changes on retraining, so a persistent cache never serves the old model's results.
+    """
+    from olist_review_model.registry import get_model
+    from olist_review_model.result_cache import feature_keys
+
+    handle = get_model()
+    return feature_keys(f"{handle.name}:{handle.version}:{handle.digest}:{engine}", X)
+
+
+def _feature_vector(features: dict) -> np.ndarray:
+    """Feature dict as a row in the model's feature order."""
+    from olist_review_model.pipeline import load_config
+
+    return np.array([features[feat] for feat in load_config()["features"]], dtype=float)
+
+
+def _item_errors(exc: ValidationError) -> list[ItemErrorSchema]:
+    """Flatten a pydantic ValidationError into per-item error entries."""
+    return [
+        ItemErrorSchema(loc=list(err["loc"]), msg=err["msg"], type=err["type"])
+        for err in exc.errors(include_url=False)
+    ]
+
+
+def predict_feature_batch(items: list[dict], engine: str | None = None) -> list[dict]:
+    """Score and explain a list of feature dicts with one model call (micro-batcher target)."""
+    import pandas as pd
+    from olist_review_model.predict import make_multiple_predictions_with_shap
+
+    frame = pd.DataFrame(items)
+    return make_multiple_predictions_with_shap(frame, engine=engine)["predictions"]
+
+
+def _features_and_cached_result(input_data: HybridInput, cache, engine: str) -> tuple[dict, str | None, dict | None]:
+    """Features of one input, its result cache key and cached result (None when there is no cache or a miss)."""
+    features = build_features(input_data)
+    if cache is None:
+        return features, None, None
+    key = _cache_keys(engine, _feature_vector(features))[0]
+    return features, key, cache.get(key)
+
+
+@router.post("/hybrid", response_model=ApiResponse)
+async def analyze_hybrid(input_data: HybridInput, request: Request) -> ApiResponse:
+    """
+    Predict customer satisfaction from order data + review text.
+    Returns prediction probability and all SHAP feature contributions as reasons, sorted by absolute impact.
+
+    Concurrent requests are grouped by the micro-batcher (when enabled) and scored together.
+    """
+    from olist_review_model.predict import make_prediction_with_shap
+
+    settings = request.app.state.settings
+    cache = request.app.state.result_cache
+    # Featurizing reads the medians and geo index, the sqlite cache backend does file I/O: keep both
+    # off the event loop
+    features, key, result = await run_in_threadpool(
+        _features_and_cached_result, input_data, cache, settings.EXPLANATION_ENGINE
+    )
+    if result is not None:
+        return ApiResponse(data=_to_prediction(result).model_dump())
+
+    batcher = request.app.state.batcher
+    if batcher is not None:
+        try:
+            result = await batcher.submit(features)
+        except QueueFullError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+    else:
+        result = await run_in_threadpool(
+            make_prediction_with_shap,
+            features,
+            engine=settings.EXPLANATION_ENGINE,
+        )
+
+    if cache is not None:
+        await run_in_threadpool(cache.set, key, result)
+    return ApiResponse(data=_to_prediction(result).model_dump())
+
+
+def _score_items(items: list, settings, cache, offset: int = 0) -> list[BatchItemResultSchema]:
+    """Validate, featurize, score and explain a list of raw items.
+
+    Items are dicts or JSON text (one NDJSON line). Invalid items get their own
+    errors; the valid ones are featurized column-wise and scored with one model
+    call, skipping rows already in the result cache. Result indices start at `offset`.
+    """
+    from olist_review_model.predict import make_multiple_predictions_with_shap
+
+    results: dict[int, BatchItemResultSchema] = {}
+    valid: list[HybridInput] = []
+    positions: list[int] = []
+    for index, item in enumerate(items, start=offset):
+        if item is _LINE_TOO_LONG:
+            results[index] = BatchItemResultSchema(index=index, status="error", errors=[ItemErrorSchema(
+                loc=[], msg=f"Line exceeds {settings.STREAM_MAX_LINE_BYTES} bytes", type="value_error",
+            )])
+            continue
+        try:
+            if isinstance(item, (str, bytes)):
+                valid.append(HybridInput.model_validate_json(item))
+            else:
+                valid.append(HybridInput.model_validate(item))
+            positions.append(index)
+        except ValidationError as exc:
+            results[index] = BatchItemResultSchema(index=index, status="error", errors=_item_errors(exc))
+
+    if valid:
+        frame, rejected = build_feature_frame(valid)
+        rejected_set = set(rejected)
+        for pos in rejected:
+            index = positions[pos]
+            results[index] = BatchItemResultSchema(
+                index=index,
+                status="error",
+                errors=[ItemErrorSchema(loc=["delivery"], msg="Invalid ISO 8601 date", type="value_error")],
+            )
+        scored = [index for pos, index in enumerate(positions) if pos not in rejected_set]
+
+        keys: list[str | None] = [None] * len(scored)
+        cached: list[dict | None] = [None] * len(scored)
+        if cache is not None and scored:
+            keys = _cache_keys(settings.EXPLANATION_ENGINE, frame.to_numpy())
+            cached = [cache.get(key) for key in keys]
+
+        misses = [row for row, result in enumerate(cached) if result is None]
+        if misses:
+            output = make_multiple_predictions_with_shap(
+                frame.iloc[misses], engine=settings.EXPLANATION_ENGINE
+            )
+            for row, result in zip(misses, output["predictions"]):
+                cached[row] = result
+                if cache is not None:
+                    cache.set(keys[row], result)
+
+        for index, result in zip(scored, cached):
+            results[index] = BatchItemResultSchema(
+                index=index, status="ok", prediction=_to_prediction(result)
+            )
+
+    return [results[index] for index in range(offset, offset + len(items))]
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse for endpoints that keep reading the request body while responding.
+
+    Starlette's default implementation also listens for client disconnects on
+    `receive`, which would consume the body messages the generator still needs.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+# Stands in for an NDJSON line longer than STREAM_MAX_LINE_BYTES; its bytes are discarded
+_LINE_TOO_LONG = object()
+
+
+async def _ndjson_chunks(
+    stream: AsyncIterator[bytes], chunk_size: int, max_line_bytes: int
+) -> AsyncIterator[list]:
+    """Group the non-blank lines of a byte stream into lists of at most `chunk_size` lines.
+
+    Only the new bytes are searched for newlines, and the unterminated tail is
+    kept as a list of pieces until its newline arrives. A line over
+    `max_line_bytes` is dropped as it streams in and yielded as _LINE_TOO_LONG,
+    so memory stays bounded by the chunk whatever the body holds.
+    """
+    tail: list[bytes] = []
+    tail_size = 0
+    too_long = False
+    chunk: list = []
+
+    def end_line() -> None:
+        nonlocal tail, tail_size, too_long
+        line = _LINE_TOO_LONG if too_long else b"".join(tail)
+        tail, tail_size, too_long = [], 0, False
+        if line is _LINE_TOO_LONG or line.strip():
+            chunk.append(line)
+
+    async for data in stream:
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            piece = data[start:] if end == -1 else data[start:end]
+            if not too_long:
+                tail_size += len(piece)
+                too_long = tail_size > max_line_bytes
+                if too_long:
+                    tail = []
+                else:
+                    tail.append(piece)
+            if end == -1:
+                break
+            end_line()
+            start = end + 1
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if tail_size or too_long:
+        end_line()
+    if chunk:
+        yield chunk
+
+
+@router.post("/hybrid/batch", response_model=ApiResponse)
+def analyze_hybrid_batch(batch: HybridBatchInput, request: Request) -> ApiResponse:
+    """
+    Predict customer satisfaction for a list of orders in one call.
+    Items are validated one by one: invalid items get their own errors while the
+    rest of the batch is featurized, scored and explained together.
+    """
+    settings = request.app.state.settings
+    if len(batch.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch exceeds the maximum of {settings.BATCH_MAX_ITEMS} items",
+        )
+
+    ordered = _score_items(batch.items, settings, request.app.state.result_cache)
+    succeeded = sum(r.status == "ok" for r in ordered)
+    data = BatchPredictionDataSchema(
+        total=len(ordered),
+        succeeded=succeeded,
+        failed=len(ordered) - succeeded,
+        results=ordered,
+    )
+    return ApiResponse(data=data.model_dump())
+
+
+@router.post(
+    "/hybrid/stream",
+    response_class=_BodyStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"$ref": "#/components/schemas/HybridInput"}}},
+        },
+    },
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def analyze_hybrid_stream(request: Request) -> _BodyStreamingResponse:
+    """
+    Score a (chunked) NDJSON body with one HybridInput per line.
+    Results stream back as NDJSON, one BatchItemResult per input line (blank
+    lines are skipped), as soon as each chunk of STREAM_CHUNK_SIZE lines is scored.
+    Only the current chunk is held in memory; lines over STREAM_MAX_LINE_BYTES are item errors.
+    """
+    settings = request.app.state.settings
+    cache = request.app.state.result_cache
+
+    async def results() -> AsyncIterator[str]:
+        offset = 0
+        async for chunk in _ndjson_chunks(
+            request.stream(), settings.STREAM_CHUNK_SIZE, settings.STREAM_MAX_LINE_BYTES
+        ):
+            scored = await run_in_threadpool(_score_items, chunk, settings, cache, offset)
+            offset += len(chunk)
+            yield "".join(result.model_dump_json() + "\n" for result in scored)
+
+    return _BodyStreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,25 @@
+"""Health endpoints — liveness and readiness probes."""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app import __version__
+from app.schemas.base import ApiResponse, ErrorResponse
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("", response_model=ApiResponse)
+def health() -> ApiResponse:
+    """Liveness check. Answers immediately; never touches the model."""
+    return ApiResponse(data={"alive": True, "api_version": __version__})
+
+
+@router.get("/ready", response_model=ApiResponse, responses={503: {"model": ErrorResponse}})
+def ready(request: Request):
+    """Readiness check. 200 once the model is loaded and a warm-up inference has run, 503 before."""
+    report = request.app.state.startup
+    if not report.ready:
+        message = report.error or "Model warm-up in progress"
+        return JSONResponse(status_code=503, content=ErrorResponse(message=message).model_dump())
+    return ApiResponse(data=report.as_dict())
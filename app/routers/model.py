@@ -0,0 +1,31 @@
+"""Model endpoints — metadata about the model served by this process."""
+
+from fastapi import APIRouter, Request
+
+from app.schemas.base import ApiResponse
+from app.schemas.model import ModelInfoSchema
+
+router = APIRouter(prefix="/model", tags=["Model"])
+
+
+@router.get("/info", response_model=ApiResponse)
+def model_info() -> ApiResponse:
+    """
+    Return metadata of the served model.
+    The model is loaded once per process by the package registry and shared by every request.
+    """
+    from olist_review_model.registry import get_model
+
+    handle = get_model()
+    return ApiResponse(data=ModelInfoSchema(**handle.info()).model_dump())
+
+
+@router.get("/stats", response_model=ApiResponse)
+def model_stats(request: Request) -> ApiResponse:
+    """Return serving-side inference metrics: micro-batching and result cache counters."""
+    batcher = request.app.state.batcher
+    cache = request.app.state.result_cache
+    return ApiResponse(data={
+        "microbatch": batcher.stats() if batcher is not None else None,
+        "result_cache": cache.stats() if cache is not None else None,
+    })
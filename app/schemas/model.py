@@ -0,0 +1,13 @@
+"""Schemas for /model/* endpoints."""
+
+from pydantic import BaseModel
+
+
+class ModelInfoSchema(BaseModel):
+    name: str
+    version: str
+    path: str
+    load_seconds: float
+    size_bytes: int
+    metrics: dict | None = None
+    benchmark: dict | None = None
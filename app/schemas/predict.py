@@ -5,58 +5,30 @@ Based on initial work in backend/ecomerce-sentiments-api/app/schemas/predict.py,
 refactored with optional fields and distance_km instead of lat/lng.
 """
 
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field
+
+# The order input schemas live in the model package, which also featurizes them
+# for the file scoring CLI; re-exported here for the API.
+from olist_review_model.processing.hybrid import (  # noqa: F401
+    DeliverySchema,
+    FinancialsSchema,
+    HybridInput,
+    ItemSchema,
+    LocationSchema,
+    ReviewSchema,
+)
 
 
 # =========================
 # INPUT SCHEMAS
 # =========================
 
-class DeliverySchema(BaseModel):
-    purchase_date: str
-    promised_date: str
-    dispatched_date: Optional[str] = None
-    delivered_date: Optional[str] = None
-
-
-class FinancialsSchema(BaseModel):
-    order_total: Optional[float] = None
-    shipping_cost: Optional[float] = None
-    payment_installments: Optional[int] = None
-    currency: str = "BRL"
-
-    @model_validator(mode="after")
-    def both_or_neither(self) -> "FinancialsSchema":
-        has_total = self.order_total is not None
-        has_shipping = self.shipping_cost is not None
-        if has_total != has_shipping:
-            raise ValueError("order_total and shipping_cost must both be present or both absent")
-        return self
-
-
-class LocationSchema(BaseModel):
-    distance_km: Optional[float] = None
-
-
-class ItemSchema(BaseModel):
-    category: Optional[str] = None
-    weight_g: Optional[float] = None
-    description_length: Optional[int] = None
-    media_count: Optional[int] = None
-
 
-class ReviewSchema(BaseModel):
-    text: str
-
-
-class HybridInput(BaseModel):
-    delivery: DeliverySchema
-    financials: Optional[FinancialsSchema] = None
-    location: Optional[LocationSchema] = None
-    item: Optional[ItemSchema] = None
-    review: ReviewSchema
+class HybridBatchInput(BaseModel):
+    # Items are validated one by one so a bad item does not reject the whole batch.
+    items: list[dict[str, Any]] = Field(min_length=1)
 
 
 # =========================
@@ -75,3 +47,23 @@ class PredictionDataSchema(BaseModel):
     negative_probability: float
     sentiment: str
     reasons: list[ReasonSchema]
+
+
+class ItemErrorSchema(BaseModel):
+    loc: list[str | int]
+    msg: str
+    type: str
+
+
+class BatchItemResultSchema(BaseModel):
+    index: int
+    status: str  # ok | error
+    prediction: Optional[PredictionDataSchema] = None
+    errors: Optional[list[ItemErrorSchema]] = None
+
+
+class BatchPredictionDataSchema(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: list[BatchItemResultSchema]
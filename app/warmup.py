@@ -0,0 +1,113 @@
+"""
+Startup warm-up and readiness tracking.
+
+The model package, xgboost, the trained model, the feature medians, the geo
+index and the explainer are all loaded lazily on first use. warm_up() loads them right
+after startup and runs one synthetic inference through the serving path.
+Until it finishes, /health/ready reports not-ready while /health (liveness)
+answers immediately.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# Synthetic order used to exercise the full feature + inference path once.
+WARMUP_ORDER = {
+    "delivery": {
+        "purchase_date": "2024-01-01T10:00:00",
+        "promised_date": "2024-01-08T23:59:59",
+        "dispatched_date": "2024-01-03T08:00:00",
+        "delivered_date": "2024-01-12T15:30:00",
+    },
+    "review": {"text": "O produto demorou muito para chegar!"},
+}
+
+
+@dataclass
+class StartupReport:
+    """Readiness state and per-step timings of the application startup."""
+
+    budget_seconds: float
+    app_import_seconds: float = 0.0
+    ready: bool = False
+    error: str | None = None
+    steps: dict[str, float] = field(default_factory=dict)
+    warmup_seconds: float | None = None
+
+    @property
+    def within_budget(self) -> bool | None:
+        if self.warmup_seconds is None:
+            return None
+        return self.app_import_seconds + self.warmup_seconds <= self.budget_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "app_import_seconds": round(self.app_import_seconds, 4),
+            "warmup_seconds": round(self.warmup_seconds, 4) if self.warmup_seconds is not None else None,
+            "budget_seconds": self.budget_seconds,
+            "within_budget": self.within_budget,
+            "steps": {name: round(seconds, 4) for name, seconds in self.steps.items()},
+        }
+
+
+@contextmanager
+def _timed(report: StartupReport, step: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    report.steps[step] = time.perf_counter() - start
+
+
+def warm_up(report: StartupReport, settings: object) -> None:
+    """Preload every heavy dependency of the inference path, then mark the app ready."""
+    start = time.perf_counter()
+    try:
+        with _timed(report, "import_model_package"):
+            import olist_review_model.predict  # noqa: F401  (pulls pandas, pydantic, joblib)
+            from olist_review_model.pipeline import load_feature_medians
+            from olist_review_model.registry import get_model
+
+        with _timed(report, "load_model"):
+            handle = get_model()
+
+        with _timed(report, "load_medians"):
+            load_feature_medians()
+
+        with _timed(report, "load_geo_index"):
+            from olist_review_model.geo_index import get_geo_index
+
+            get_geo_index()
+
+        engine = getattr(settings, "EXPLANATION_ENGINE", "native")
+        if engine == "shap":
+            with _timed(report, "build_explainer"):
+                from olist_review_model.explain import get_explainer
+
+                get_explainer(handle)
+
+        with _timed(report, "warmup_inference"):
+            from app.routers.analyze import predict_feature_batch
+            from olist_review_model.processing.hybrid import HybridInput, build_features
+
+            features = build_features(HybridInput.model_validate(WARMUP_ORDER))
+            predict_feature_batch([features], engine=engine)
+    except Exception as exc:
+        report.error = f"{type(exc).__name__}: {exc}"
+        logger.exception("Model warm-up failed; the app stays not-ready")
+        return
+    finally:
+        report.warmup_seconds = time.perf_counter() - start
+
+    report.ready = True
+    logger.info("Model warm-up finished", extra={"startup": report.as_dict()})
+    if not report.within_budget:
+        logger.warning(
+            "Startup exceeded its time budget",
+            extra={"startup": report.as_dict()},
+        )
@@ -1,11 +1,12 @@
-import subprocess
+"""
+Run the XGBoost / LightGBM / RandomForest sweep in parallel and log it to MLflow.
 
-experiments = [
-    ["python", "train_model_a.py", "800", "6", "0.1", "xgboost-run"],
-    ["python", "train_model_lgbm.py", "800", "6", "0.1", "lightgbm-run"],
-    ["python", "train_model_RF.py", "200", "rf-run"],
-]
+The training matrix is built once and shared with the workers; see
+olist_review_model/experiments.py. Extra arguments are passed through, e.g.
+    python run_experiments.py --grid grid.yml --cpu-budget 8 -o runs.jsonl
+"""
+import sys
 
-for exp in experiments:
-    print(f"\nRunning: {' '.join(exp)}\n")
-    subprocess.run(exp, check=True)
+from olist_review_model.experiments import main
+
+sys.exit(main(["--mlflow-uri", "http://localhost:5000", *sys.argv[1:]]))
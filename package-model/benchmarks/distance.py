@@ -0,0 +1,57 @@
+"""
+Per-row cost of the seller-customer distance over a full-dataset-sized batch.
+
+    row-wise apply:  DataFrame.apply(axis=1) with the scalar haversine
+                     (how versionMilton computed it before)
+    scalar loop:     distance_km_scalar over plain Python floats
+    vectorized:      distance_km over numpy arrays, for every metric
+
+Usage:
+    python benchmarks/distance.py [--rows 112650]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.distance import DISTANCE_METRICS, distance_km, distance_km_scalar
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=112_650, help="Rows (default: Olist order items)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "lat_c": rng.uniform(-33, 5, args.rows), "lng_c": rng.uniform(-73, -35, args.rows),
+        "lat_s": rng.uniform(-33, 5, args.rows), "lng_s": rng.uniform(-73, -35, args.rows),
+    })
+    coords = [df[c].to_numpy() for c in ("lat_c", "lng_c", "lat_s", "lng_s")]
+
+    timings = {
+        "row-wise apply": _timed(lambda: df.apply(
+            lambda r: distance_km_scalar(r["lat_c"], r["lng_c"], r["lat_s"], r["lng_s"], "haversine"), axis=1
+        )),
+        "scalar loop": _timed(lambda: [
+            distance_km_scalar(*row, "haversine") for row in zip(*(c.tolist() for c in coords))
+        ]),
+    }
+    for metric in DISTANCE_METRICS:
+        timings[f"vectorized {metric}"] = _timed(lambda: distance_km(*coords, metric=metric))
+
+    print(f"{args.rows} rows")
+    for name, seconds in timings.items():
+        print(f"{name:<28}{seconds:8.4f}s  {seconds / args.rows * 1e9:10.1f} ns/row")
+
+
+if __name__ == "__main__":
+    main()
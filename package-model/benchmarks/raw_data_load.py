@@ -0,0 +1,64 @@
+"""
+Cold vs warm load timings of the raw Olist CSVs.
+
+    csv:          load_raw_data without a cache (typed CSV parsing of every file)
+    cache cold:   first load through RawDataCache (hash + parse + write Feather)
+    cache warm:   later loads (manifest lookup + memory-mapped Feather read)
+    warm subset:  warm load of only the geolocation columns build_maestro uses
+
+Usage:
+    python benchmarks/raw_data_load.py [data_dir] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from olist_review_model import PACKAGE_ROOT
+from olist_review_model.pipeline import load_config, load_raw_data
+
+GEO_COLUMNS = ["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]
+
+
+def _best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    default_data_dir = os.path.join(os.path.dirname(PACKAGE_ROOT), load_config()["data_dir"])
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("data_dir", nargs="?", default=default_data_dir)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="raw_cache_bench_")
+    try:
+        csv = _best_of(args.repeat, lambda: load_raw_data(args.data_dir))
+
+        start = time.perf_counter()
+        load_raw_data(args.data_dir, cache_dir=cache_dir)
+        cold = time.perf_counter() - start
+
+        warm = _best_of(args.repeat, lambda: load_raw_data(args.data_dir, cache_dir=cache_dir))
+        subset = _best_of(
+            args.repeat,
+            lambda: load_raw_data(args.data_dir, cache_dir=cache_dir, columns={"geolocation": GEO_COLUMNS}),
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'csv':<14}{csv:8.3f}s")
+    print(f"{'cache cold':<14}{cold:8.3f}s")
+    print(f"{'cache warm':<14}{warm:8.3f}s  ({csv / warm:.1f}x vs csv)")
+    print(f"{'warm subset':<14}{subset:8.3f}s  ({csv / subset:.1f}x vs csv)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load time and memory of untyped serial vs schema-driven parallel CSV ingestion.
+
+    untyped serial:  pd.read_csv with type inference, one file after another
+    typed parallel:  data_schema usecols/dtypes/date formats on a thread pool
+
+`--scale N` benchmarks an N-times scale-up built by repeating each file's rows.
+
+Usage:
+    python benchmarks/typed_ingestion.py [data_dir] [--scale 10] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from olist_review_model import PACKAGE_ROOT
+from olist_review_model.pipeline import load_config, load_raw_data
+
+
+def _scale_up(data_dir: str, factor: int, out_dir: str) -> None:
+    for filename in load_config()["data_files"].values():
+        with open(os.path.join(data_dir, filename)) as src:
+            header = src.readline()
+            rows = src.read()
+        if rows and not rows.endswith("\n"):
+            rows += "\n"
+        with open(os.path.join(out_dir, filename), "w") as dst:
+            dst.write(header)
+            for _ in range(factor):
+                dst.write(rows)
+
+
+def _measure(repeat: int, **kwargs) -> tuple[float, float, float]:
+    """Best wall time, peak traced allocation and resident frame size (MiB)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_raw_data(**kwargs)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    data = load_raw_data(**kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frames = sum(df.memory_usage(deep=True).sum() for df in data.values())
+    return min(timings), peak / 2**20, frames / 2**20
+
+
+def main() -> None:
+    default_data_dir = os.path.join(os.path.dirname(PACKAGE_ROOT), load_config()["data_dir"])
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("data_dir", nargs="?", default=default_data_dir)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data_dir, scaled_dir = args.data_dir, None
+    if args.scale > 1:
+        scaled_dir = data_dir = tempfile.mkdtemp(prefix="typed_ingestion_bench_")
+        _scale_up(args.data_dir, args.scale, scaled_dir)
+
+    try:
+        untyped = _measure(args.repeat, data_dir=data_dir, typed=False, max_workers=1)
+        typed = _measure(args.repeat, data_dir=data_dir)
+    finally:
+        if scaled_dir:
+            shutil.rmtree(scaled_dir, ignore_errors=True)
+
+    print(f"scale x{args.scale}")
+    print(f"{'':<16}{'time':>9}{'peak MiB':>10}{'frames MiB':>12}")
+    for name, (seconds, peak, frames) in (("untyped serial", untyped), ("typed parallel", typed)):
+        print(f"{name:<16}{seconds:8.3f}s{peak:10.1f}{frames:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Model compaction: a smaller, faster serving model derived from the trained one.
+
+Candidates are derived and accepted on the validation split carved from the
+training rows (the one run_training early-stops on); the test split only
+reports them:
+- truncate: the shortest prefix of the boosting rounds whose validation ROC
+  AUC is within max_auc_loss of the full model's (early stopping already cut
+  the rounds after the best iteration, see training_telemetry.py);
+- prune: XGBoost's prune updater run over the trained trees, which removes
+  splits whose loss reduction is below gamma (one candidate per prune_gamma);
+- distill: a shallow ensemble (compaction.distill) fit to the full model's
+  probabilities on the remaining training rows. binary:logistic accepts soft
+  labels.
+
+Every candidate is benchmarked like a trained model (model_benchmark.py).
+Among those whose validation AUC is within max_auc_loss of the full model's,
+the one with the lowest single-row p99 is saved as compact_model_file, with
+its flat export and metadata, next to the full model, which is left untouched. Set `serving_model: compact` in
+config.yml to serve it. The report (compaction_report_file) lists AUC loss
+against latency and size gain for every candidate.
+
+Usage:
+    python -m olist_review_model.compaction [--no-stage-cache]
+    python -m olist_review_model.train_pipeline --compact
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+from dataclasses import dataclass, field
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from olist_review_model import TRAINED_MODEL_DIR
+from olist_review_model.flat_forest import export_flat_forest
+from olist_review_model.model_benchmark import candidate_metadata, save_metadata
+from olist_review_model.pipeline import load_config
+
+COMPACTION_METHODS = ("truncate", "prune", "distill")
+
+
+@dataclass
+class CompactionCandidate:
+    """A compacted model, its validation ROC AUC and its test metrics and benchmark (candidate_metadata)."""
+
+    name: str
+    method: str
+    model: object = field(repr=False)
+    n_trees: int
+    n_nodes: int
+    metadata: dict = field(repr=False)
+    valid_roc_auc: float = float("nan")
+
+    @property
+    def roc_auc(self) -> float:
+        return self.metadata["metrics"]["roc_auc"]
+
+    @property
+    def benchmark(self) -> dict:
+        return self.metadata["benchmark"]
+
+
+@dataclass
+class CompactionReport:
+    """Every candidate against the full model, and the one selected for serving."""
+
+    full: CompactionCandidate
+    candidates: list[CompactionCandidate]
+    max_auc_loss: float
+    selected: CompactionCandidate | None = None
+
+    def valid_auc_loss(self, candidate: CompactionCandidate) -> float:
+        """Validation ROC AUC lost against the full model; the selection gate."""
+        return self.full.valid_roc_auc - candidate.valid_roc_auc
+
+    def rows(self) -> list[dict]:
+        """Per model: AUC loss, p99/size/nodes and their gain over the full model (x times smaller/faster)."""
+        full_bench = self.full.benchmark
+        rows = []
+        for c in (self.full, *self.candidates):
+            bench = c.benchmark
+            rows.append({
+                "name": c.name,
+                "method": c.method,
+                "n_trees": c.n_trees,
+                "n_nodes": c.n_nodes,
+                "roc_auc": round(c.roc_auc, 6),
+                "auc_loss": round(self.full.roc_auc - c.roc_auc, 6),
+                "valid_auc_loss": round(self.valid_auc_loss(c), 6),
+                "single_row_p99_ms": round(bench["single_row_p99_ms"], 4),
+                "latency_gain": round(full_bench["single_row_p99_ms"] / bench["single_row_p99_ms"], 2),
+                "batch_rows_per_s": round(bench["batch_rows_per_s"]),
+                "shap_ms_per_row": bench["shap_ms_per_row"],
+                "serialized_bytes": bench["serialized_bytes"],
+                "size_gain": round(full_bench["serialized_bytes"] / bench["serialized_bytes"], 2),
+                "within_auc_loss": self.valid_auc_loss(c) <= self.max_auc_loss,
+            })
+        return rows
+
+    def as_dict(self) -> dict:
+        return {
+            "source_model": self.full.name,
+            "max_auc_loss": self.max_auc_loss,
+            "selected": self.selected.name if self.selected else None,
+            "candidates": self.rows(),
+        }
+
+    def format(self) -> str:
+        lines = [f"{'model':<22} {'trees':>6} {'nodes':>9} {'AUC':>7} {'loss':>8} {'val loss':>8} {'p99 ms':>8} "
+                 f"{'faster':>7} {'MiB':>7} {'smaller':>8}"]
+        for row in self.rows():
+            mark = "" if row["within_auc_loss"] else "  (validation AUC loss too high)"
+            lines.append(f"{row['name']:<22} {row['n_trees']:>6} {row['n_nodes']:>9} {row['roc_auc']:>7.4f} "
+                         f"{row['auc_loss']:>8.4f} {row['valid_auc_loss']:>8.4f} {row['single_row_p99_ms']:>8.3f} "
+                         f"{row['latency_gain']:>6.1f}x {row['serialized_bytes'] / 2**20:>7.2f} "
+                         f"{row['size_gain']:>7.1f}x{mark}")
+        if self.selected:
+            lines.append(f"selected: {self.selected.name}")
+        else:
+            lines.append(f"no candidate within a validation AUC loss of {self.max_auc_loss}")
+        return "\n".join(lines)
+
+
+def _as_classifier(booster: xgb.Booster) -> xgb.XGBClassifier:
+    """Wrap a booster as an XGBClassifier, the type the registry and predict expect."""
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def _trees(model_json: dict) -> list[dict]:
+    return model_json["learner"]["gradient_booster"]["model"]["trees"]
+
+
+def count_nodes(model) -> int:
+    """Total nodes (splits and leaves) of every tree, not counting deleted ones."""
+    return sum(int(tree["tree_param"]["num_nodes"]) - int(tree["tree_param"]["num_deleted"])
+               for tree in _trees(json.loads(model.get_booster().save_raw("json"))))
+
+
+def _drop_deleted_nodes(booster: xgb.Booster) -> xgb.Booster:
+    """Renumber every tree without the nodes the prune updater deleted (it only unlinks them)."""
+    model_json = json.loads(booster.save_raw("json"))
+    for tree in _trees(model_json):
+        if tree["tree_param"]["num_deleted"] == "0":
+            continue
+        left, right = tree["left_children"], tree["right_children"]
+        keep, frontier = [], [0]
+        while frontier:
+            keep += frontier
+            frontier = [c for node in frontier for c in (left[node], right[node]) if c != -1]
+        keep.sort()
+        new_id = {old: new for new, old in enumerate(keep)}
+        remap = lambda node: new_id.get(node, node)  # noqa: E731  (-1 and the root's parent stay as is)
+        for key in ("base_weights", "default_left", "loss_changes", "split_conditions", "split_indices",
+                    "split_type", "sum_hessian", "left_children", "right_children", "parents"):
+            tree[key] = [tree[key][old] for old in keep]
+        for key in ("left_children", "right_children", "parents"):
+            tree[key] = [remap(node) for node in tree[key]]
+        tree["categories_nodes"] = [remap(node) for node in tree["categories_nodes"]]
+        tree["tree_param"].update(num_nodes=str(len(keep)), num_deleted="0")
+    return xgb.Booster(model_file=bytearray(json.dumps(model_json).encode()))
+
+
+def _metrics(y_true: np.ndarray, proba: np.ndarray) -> dict:
+    y_pred = (proba >= 0.5).astype(int)
+    return {
+        "roc_auc": float(roc_auc_score(y_true, proba)),
+        "f1": float(f1_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred)),
+        "recall": float(recall_score(y_true, y_pred)),
+    }
+
+
+def truncate(model, X_valid: pd.DataFrame, y_valid: np.ndarray, max_auc_loss: float,
+             steps: int = 20) -> xgb.XGBClassifier | None:
+    """Shortest of `steps` evenly spaced round prefixes within max_auc_loss on the validation rows.
+
+    None if only the full model is.
+    """
+    booster = model.get_booster()
+    n_trees = booster.num_boosted_rounds()
+    dvalid = xgb.DMatrix(X_valid)
+    target = roc_auc_score(y_valid, booster.predict(dvalid)) - max_auc_loss
+    for n in np.unique(np.linspace(n_trees / steps, n_trees, steps).astype(int)):
+        if n < n_trees and n > 0 and roc_auc_score(y_valid, booster.predict(dvalid, iteration_range=(0, n))) >= target:
+            return _as_classifier(booster[:n])
+    return None
+
+
+def prune(model, X_train: pd.DataFrame, y_train: np.ndarray, gamma: float) -> xgb.XGBClassifier:
+    """Remove the splits whose loss reduction is below `gamma` (XGBoost prune updater)."""
+    booster = model.get_booster()
+    tree_param = json.loads(booster.save_config())["learner"]["gradient_booster"]["tree_train_param"]
+    params = {"process_type": "update", "updater": "prune", "gamma": gamma,
+              "max_depth": int(tree_param["max_depth"]), "reg_lambda": float(tree_param["lambda"])}
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*updater.*")  # the tree_method is ignored, as intended
+        pruned = xgb.train(params, xgb.DMatrix(X_train, y_train), num_boost_round=booster.num_boosted_rounds(),
+                           xgb_model=booster.copy())
+    return _as_classifier(_drop_deleted_nodes(pruned))
+
+
+def distill(model, X_train: pd.DataFrame, params, random_state: int = 42) -> xgb.XGBClassifier:
+    """Fit a shallow ensemble (`params`: n_estimators, max_depth, learning_rate, ...) to the model's probabilities."""
+    params = dict(params)
+    rounds = params.pop("n_estimators")
+    soft_labels = model.predict_proba(X_train)[:, 1]
+    student = xgb.train({"objective": "binary:logistic", "tree_method": "hist", "seed": random_state, **params},
+                        xgb.DMatrix(X_train, soft_labels), num_boost_round=rounds)
+    return _as_classifier(student)
+
+
+def _candidate(name: str, method: str, model, valid: tuple, X_test: pd.DataFrame, y_test: np.ndarray,
+               config) -> CompactionCandidate:
+    X_valid, y_valid = valid
+    X_sample = X_test.to_numpy(dtype=np.float32)
+    metadata = candidate_metadata(model, X_sample, _metrics(y_test, model.predict_proba(X_test)[:, 1]), config,
+                                  compaction_method=method, compaction_candidate=name)
+    n_trees = model.get_booster().num_boosted_rounds()
+    valid_roc_auc = float(roc_auc_score(y_valid, model.predict_proba(X_valid)[:, 1]))
+    return CompactionCandidate(name, method, model, n_trees, count_nodes(model), metadata, valid_roc_auc)
+
+
+def compact(model, X_train: pd.DataFrame, y_train: np.ndarray, X_test: pd.DataFrame, y_test: np.ndarray,
+            config=None) -> CompactionReport:
+    """Build, score and benchmark the config["compaction"] candidates of `model`; select one to serve.
+
+    Candidates are built on the training rows minus a validation split (split like
+    run_training does) and accepted on their validation AUC loss; the test rows only
+    score them for the report.
+    """
+    config = config or load_config()
+    settings = config["compaction"]
+    max_auc_loss = settings["max_auc_loss"]
+    methods = settings.get("methods") or COMPACTION_METHODS
+    unknown = set(methods) - set(COMPACTION_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown compaction method(s) {sorted(unknown)}. "
+                         f"Expected: {', '.join(COMPACTION_METHODS)}")
+
+    X_fit, X_valid, y_fit, y_valid = train_test_split(
+        X_train, y_train,
+        test_size=config["test_size"],
+        random_state=config["random_state"],
+        stratify=y_train,
+    )
+    valid = (X_valid, y_valid)
+    full = _candidate("full", "none", model, valid, X_test, y_test, config)
+    candidates = []
+    if "truncate" in methods:
+        truncated = truncate(model, X_valid, y_valid, max_auc_loss)
+        if truncated is not None:
+            n = truncated.get_booster().num_boosted_rounds()
+            candidates.append(_candidate(f"truncate_{n}", "truncate", truncated, valid, X_test, y_test, config))
+    if "prune" in methods:
+        for gamma in settings.get("prune_gamma") or ():
+            candidates.append(_candidate(f"prune_gamma_{gamma:g}", "prune", prune(model, X_fit, y_fit, gamma),
+                                         valid, X_test, y_test, config))
+    if "distill" in methods:
+        params = settings["distill"]
+        student = distill(model, X_fit, params, config["random_state"])
+        candidates.append(_candidate(f"distill_d{params['max_depth']}_n{params['n_estimators']}", "distill",
+                                     student, valid, X_test, y_test, config))
+
+    report = CompactionReport(full, candidates, max_auc_loss)
+    eligible = [c for c in candidates if report.valid_auc_loss(c) <= max_auc_loss]
+    report.selected = min(eligible, key=lambda c: (c.benchmark["single_row_p99_ms"], c.benchmark["serialized_bytes"]),
+                          default=None)
+    return report
+
+
+def save_compact(report: CompactionReport, X_sample: np.ndarray, config=None,
+                 model_dir: str = TRAINED_MODEL_DIR) -> str | None:
+    """Save the selected model (joblib + flat export, each with metadata) and the report; returns its path.
+
+    `X_sample` are the feature rows the flat export is benchmarked on.
+    """
+    config = config or load_config()
+    os.makedirs(model_dir, exist_ok=True)
+    report_path = os.path.join(model_dir, config["compaction_report_file"])
+    with open(f"{report_path}.tmp", "w") as f:
+        json.dump(report.as_dict(), f, indent=2)
+    os.replace(f"{report_path}.tmp", report_path)
+    if report.selected is None:
+        return None
+
+    compact_info = {"source_model": config["trained_model_file"], "n_nodes": report.selected.n_nodes,
+                    "auc_loss": report.full.roc_auc - report.selected.roc_auc,
+                    "compacted_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    path = os.path.join(model_dir, config["compact_model_file"])
+    joblib.dump(report.selected.model, path)
+    save_metadata(path, {"model_file": os.path.basename(path), "n_trees": report.selected.n_trees,
+                         **compact_info, **report.selected.metadata})
+
+    flat_path = os.path.join(model_dir, config["compact_flat_model_file"])
+    flat_model = export_flat_forest(report.selected.model)
+    flat_model.save(flat_path)
+    flat_metadata = candidate_metadata(flat_model, X_sample, report.selected.metadata["metrics"], config,
+                                       compaction_method=report.selected.method,
+                                       compaction_candidate=report.selected.name)
+    save_metadata(flat_path, {"model_file": os.path.basename(flat_path), "n_trees": report.selected.n_trees,
+                              **compact_info, **flat_metadata})
+    return path
+
+
+def run_compaction(use_stage_cache: bool = True) -> CompactionReport:
+    """Compact the trained model on run_training's train/test split; print and save the result."""
+    from olist_review_model.experiments import training_matrix
+
+    config = load_config()
+    features = list(config["features"])
+    X, y = training_matrix(use_stage_cache)
+    X_train, X_test, y_train, y_test = train_test_split(
+        pd.DataFrame(X, columns=features), y,
+        test_size=config["test_size"],
+        random_state=config["random_state"],
+        stratify=y,
+    )
+    model = joblib.load(os.path.join(TRAINED_MODEL_DIR, config["trained_model_file"]))
+    report = compact(model, X_train, y_train, X_test, y_test, config)
+    path = save_compact(report, X_test.to_numpy(dtype=np.float32), config)
+    print(report.format())
+    if path:
+        print(f"Compact model saved to: {path} (serve it with `serving_model: compact` in config.yml)")
+    return report
+
+
+def main(argv: list[str] | None = None) -> CompactionReport:
+    parser = argparse.ArgumentParser(description="Compact the trained model into a smaller serving model.")
+    parser.add_argument("--no-stage-cache", action="store_true", help="Run every stage without the stage cache")
+    args = parser.parse_args(argv)
+    return run_compaction(use_stage_cache=not args.no_stage_cache)
+
+
+if __name__ == "__main__":
+    main()
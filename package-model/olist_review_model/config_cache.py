@@ -0,0 +1,98 @@
+"""
+Memoized loading of the package's configuration files.
+
+Each file is parsed once into an immutable snapshot. Later reads only stat
+the file; it is re-read when its mtime or size changes, and re-parsed only
+when its content hash changes. The new snapshot replaces the old one in a
+single assignment, so readers always see a complete snapshot.
+"""
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(val) for key, val in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(val) for val in value)
+    return value
+
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """Immutable parsed content of a file at a given version."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+    data: Mapping
+
+
+class CachedFile:
+    """A file parsed once and re-parsed only when it changes on disk.
+
+    Args:
+        path: File to load.
+        parse: Function turning the raw bytes into a dict.
+        default: Content used while the file does not exist.
+    """
+
+    def __init__(self, path: str, parse: Callable[[bytes], dict], default: dict | None = None):
+        self.path = path
+        self.parse = parse
+        self.default = default
+        self._snapshot: FileSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> FileSnapshot:
+        """Return the current snapshot, reloading it if the file changed."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self.default is None:
+                raise
+            stat = None
+
+        current = self._snapshot
+        if current is not None and _same_version(current, stat):
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and _same_version(current, stat):
+                return current
+            self._snapshot = self._load(current, stat)
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """Forget the current snapshot so the next read re-parses the file."""
+        with self._lock:
+            self._snapshot = None
+
+    def _load(self, current: FileSnapshot | None, stat: os.stat_result | None) -> FileSnapshot:
+        if stat is None:
+            return FileSnapshot(self.path, -1, -1, "", freeze(self.default))
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+        # Touched but unchanged: keep the parsed data, record the new mtime
+        if current is not None and current.digest == digest:
+            data = current.data
+        else:
+            data = freeze(self.parse(raw))
+        return FileSnapshot(self.path, stat.st_mtime_ns, stat.st_size, digest, data)
+
+
+def _same_version(snapshot: FileSnapshot, stat: os.stat_result | None) -> bool:
+    if stat is None:
+        return snapshot.mtime_ns == -1
+    return snapshot.mtime_ns == stat.st_mtime_ns and snapshot.size == stat.st_size
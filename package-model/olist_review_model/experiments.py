@@ -0,0 +1,353 @@
+"""
+Parallel experiment runner: a grid of XGBoost / LightGBM / RandomForest
+configs trained concurrently on one shared training matrix.
+
+The training matrix is built once (through the cached training stages, see
+train_pipeline.py), split like run_training and saved as .npy files. Worker
+processes memory-map those files read-only, so the OS shares one copy of the
+pages between them instead of every run re-reading the CSVs and rebuilding
+the features.
+
+Runs are spread over `cpu_budget` cores: each run gets `threads_per_run`
+threads (n_jobs) and at most cpu_budget // threads_per_run run at once.
+Workers return the fitted models with their wall time and test metrics.
+Once the pool has shut down, the parent benchmarks inference of each model
+in turn (see model_benchmark.py), so latencies are not measured while other
+runs compete for the cores. Results are appended to a JSONL file as they are
+benchmarked and optionally logged to MLflow. The selection rule
+(config["selection"], e.g. best ROC AUC with p99 < 5 ms) picks a run.
+
+A grid file is YAML, one entry per model; list values expand into a grid:
+    - model: xgboost
+      params: {n_estimators: [300, 800], max_depth: [4, 6], learning_rate: 0.1}
+    - model: random_forest
+      name: rf
+      params: {n_estimators: 200}
+
+Usage:
+    python -m olist_review_model.experiments --cpu-budget 8 --threads-per-run 2
+    python -m olist_review_model.experiments --grid grid.yml -o runs.jsonl --mlflow-uri http://localhost:5000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import yaml
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from olist_review_model.model_benchmark import benchmark_model, select_candidate, selection_rule
+from olist_review_model.pipeline import load_config
+
+MODELS = ("xgboost", "lightgbm", "random_forest")
+MLFLOW_EXPERIMENT = "olist-negative-review-classifier"
+
+
+@dataclass(frozen=True)
+class Experiment:
+    """One model configuration to train."""
+
+    name: str
+    model: str
+    params: dict = field(default_factory=dict, hash=False)
+
+
+# The sweep notebooks/run_experiments.py used to launch one script at a time
+DEFAULT_EXPERIMENTS = (
+    Experiment("xgboost-run", "xgboost", {"n_estimators": 800, "max_depth": 6, "learning_rate": 0.1}),
+    Experiment("lightgbm-run", "lightgbm", {"n_estimators": 800, "max_depth": 6, "learning_rate": 0.1}),
+    Experiment("rf-run", "random_forest", {"n_estimators": 200}),
+)
+
+
+@dataclass
+class ExperimentResult:
+    """Outcome of one run; `error` is set instead of metrics when it failed."""
+
+    name: str
+    model: str
+    params: dict
+    n_jobs: int
+    metrics: dict = field(default_factory=dict)
+    benchmark: dict = field(default_factory=dict)  # model_benchmark.InferenceBenchmark.as_dict()
+    fit_seconds: float = 0.0
+    seconds: float = 0.0
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def grid(model: str, name: str | None = None, **params) -> list[Experiment]:
+    """Experiments for every combination of the list-valued `params`."""
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Expected one of {', '.join(MODELS)}")
+    name = name or model
+    keys = list(params)
+    axes = [value if isinstance(value, list) else [value] for value in params.values()]
+    varying = [key for key, axis in zip(keys, axes) if len(axis) > 1]
+
+    experiments = []
+    for values in itertools.product(*axes):
+        combo = dict(zip(keys, values))
+        suffix = "-".join(f"{key}={combo[key]}" for key in varying)
+        experiments.append(Experiment(f"{name}-{suffix}" if suffix else name, model, combo))
+    return experiments
+
+
+def load_grid(path: str) -> list[Experiment]:
+    """Experiments of a YAML grid file (see the module docstring)."""
+    with open(path) as f:
+        entries = yaml.safe_load(f) or []
+    experiments = []
+    for entry in entries:
+        experiments.extend(grid(entry["model"], entry.get("name"), **entry.get("params", {})))
+    return experiments
+
+
+class SharedMatrix:
+    """Train/test arrays saved once as .npy files and memory-mapped by every worker."""
+
+    NAMES = ("X_train", "X_test", "y_train", "y_test")
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @classmethod
+    def save(cls, directory: str, **arrays: np.ndarray) -> "SharedMatrix":
+        os.makedirs(directory, exist_ok=True)
+        for name in cls.NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+        return cls(directory)
+
+    def load(self) -> dict[str, np.ndarray]:
+        return {name: np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+                for name in self.NAMES}
+
+
+def training_matrix(use_stage_cache: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """Model features (float32) and target (int8) from the cached training stages."""
+    from olist_review_model.stages import StageRunner
+    from olist_review_model.train_pipeline import _project_path, training_stages
+
+    cache_dir = _project_path(load_config(), "stage_cache_dir") if use_stage_cache else None
+    outputs, report = StageRunner(training_stages(), cache_dir).run()
+    print(report.format())
+    X, y = outputs["features"]
+    return X.to_numpy(dtype=np.float32), y.to_numpy(dtype=np.int8)
+
+
+def build_matrix(directory: str, use_stage_cache: bool = True) -> SharedMatrix:
+    """Build the training features once and save the train/test split for the workers."""
+    config = load_config()
+    X, y = training_matrix(use_stage_cache)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=config["test_size"],
+        random_state=config["random_state"],
+        stratify=y,
+    )
+    return SharedMatrix.save(directory, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+
+def _make_model(experiment: Experiment, n_jobs: int, scale_pos_weight: float):
+    random_state = load_config()["random_state"]
+    if experiment.model == "xgboost":
+        import xgboost as xgb
+
+        params = {"eval_metric": "auc", "random_state": random_state, "scale_pos_weight": scale_pos_weight}
+        return xgb.XGBClassifier(**{**params, **experiment.params, "n_jobs": n_jobs})
+    if experiment.model == "lightgbm":
+        import lightgbm as lgb
+
+        params = {"random_state": random_state, "scale_pos_weight": scale_pos_weight, "verbose": -1}
+        return lgb.LGBMClassifier(**{**params, **experiment.params, "n_jobs": n_jobs})
+    if experiment.model == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+
+        return RandomForestClassifier(**{"random_state": random_state, **experiment.params, "n_jobs": n_jobs})
+    raise ValueError(f"Unknown model '{experiment.model}'. Expected one of {', '.join(MODELS)}")
+
+
+def fit_experiment(matrix_dir: str, experiment: Experiment, n_jobs: int = 1) -> tuple[ExperimentResult, object]:
+    """Train and score one experiment on the memory-mapped matrix (runs in a worker).
+
+    Returns the result and the fitted model, or None for the model when the run failed.
+    """
+    start = time.perf_counter()
+    result = ExperimentResult(experiment.name, experiment.model, dict(experiment.params), n_jobs)
+    model = None
+    try:
+        arrays = SharedMatrix(matrix_dir).load()
+        y_train, y_test = arrays["y_train"], arrays["y_test"]
+        scale_pos_weight = float((y_train == 0).sum() / max((y_train == 1).sum(), 1))
+        model = _make_model(experiment, n_jobs, scale_pos_weight)
+
+        fit_start = time.perf_counter()
+        model.fit(arrays["X_train"], y_train)
+        result.fit_seconds = time.perf_counter() - fit_start
+
+        y_proba = model.predict_proba(arrays["X_test"])[:, 1]
+        y_pred = (y_proba >= 0.5).astype(np.int8)
+        result.metrics = {
+            "roc_auc": float(roc_auc_score(y_test, y_proba)),
+            "f1": float(f1_score(y_test, y_pred, zero_division=0)),
+            "precision": float(precision_score(y_test, y_pred, zero_division=0)),
+            "recall": float(recall_score(y_test, y_pred, zero_division=0)),
+        }
+    except Exception as exc:  # one failed config must not stop the sweep
+        result.error = f"{type(exc).__name__}: {exc}"
+        model = None
+    result.seconds = time.perf_counter() - start
+    return result, model
+
+
+def benchmark_result(result: ExperimentResult, model, X_test: np.ndarray) -> ExperimentResult:
+    """Fill in the inference benchmark of a finished run; call with no other run competing for the cores."""
+    if model is None or result.error:
+        return result
+    try:
+        result.benchmark = benchmark_model(model, X_test).as_dict()
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def run_experiment(matrix_dir: str, experiment: Experiment, n_jobs: int = 1,
+                   benchmark: bool = True) -> ExperimentResult:
+    """Train, score and benchmark one experiment in this process."""
+    result, model = fit_experiment(matrix_dir, experiment, n_jobs)
+    if benchmark:
+        benchmark_result(result, model, SharedMatrix(matrix_dir).load()["X_test"])
+    return result
+
+
+def run_experiments(experiments: list[Experiment], matrix: SharedMatrix, cpu_budget: int | None = None,
+                    threads_per_run: int | None = None, output: str | None = None,
+                    benchmark: bool = True) -> list[ExperimentResult]:
+    """Run `experiments` concurrently within `cpu_budget` cores; results in input order.
+
+    `threads_per_run` defaults to an even share of the budget. The models are
+    benchmarked one at a time after the last run has finished, and each result
+    is appended to the `output` JSONL file once it is benchmarked.
+    """
+    budget = max(1, cpu_budget or os.cpu_count() or 1)
+    threads = min(budget, threads_per_run or max(1, budget // max(len(experiments), 1)))
+    workers = max(1, min(len(experiments), budget // threads))
+    print(f"Running {len(experiments)} experiments: {workers} at a time x {threads} threads "
+          f"(cpu budget {budget})")
+
+    finished: dict[int, tuple[ExperimentResult, object]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fit_experiment, matrix.directory, experiment, threads): i
+                   for i, experiment in enumerate(experiments)}
+        for future in as_completed(futures):
+            result, model = finished[futures[future]] = future.result()
+            status = result.error or f"roc_auc={result.metrics['roc_auc']:.4f}"
+            print(f"  {result.name}: {status} ({result.seconds:.1f}s)")
+
+    # The pool is shut down here, so every model is benchmarked on otherwise idle cores
+    X_test = matrix.load()["X_test"]
+    results = []
+    out = open(output, "a") if output else None
+    try:
+        for i in range(len(experiments)):
+            result, model = finished.pop(i)
+            if benchmark:
+                benchmark_result(result, model, X_test)
+            del model
+            results.append(result)
+            if out:
+                out.write(json.dumps(result.as_dict()) + "\n")
+                out.flush()
+    finally:
+        if out:
+            out.close()
+    return results
+
+
+def log_to_mlflow(results: list[ExperimentResult], tracking_uri: str,
+                  experiment_name: str = MLFLOW_EXPERIMENT) -> None:
+    """Log the params, metrics and timings of the successful runs, one MLflow run each."""
+    import mlflow
+
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment(experiment_name)
+    for result in results:
+        if result.error:
+            continue
+        with mlflow.start_run(run_name=result.name):
+            mlflow.log_params({"model": result.model, "n_jobs": result.n_jobs, **result.params})
+            benchmark = {key: value for key, value in result.benchmark.items() if value is not None}
+            mlflow.log_metrics({**result.metrics, **benchmark, "fit_seconds": result.fit_seconds})
+
+
+def select_result(results: list[ExperimentResult], metric: str = "roc_auc", max_p99_ms: float | None = None,
+                  max_size_mb: float | None = None) -> ExperimentResult | None:
+    """The best run by `metric` whose benchmark is within the limits (see model_benchmark.select_candidate)."""
+    candidates = [r.as_dict() for r in results if not r.error]
+    selected = select_candidate(candidates, metric, max_p99_ms, max_size_mb)
+    return next((r for r in results if selected and r.name == selected["name"]), None)
+
+
+def format_results(results: list[ExperimentResult]) -> str:
+    """Results table, best ROC AUC first and failed runs last."""
+    rows = sorted(results, key=lambda r: (r.error is not None, -r.metrics.get("roc_auc", 0.0)))
+    width = max([len(r.name) for r in rows] + [10])
+    lines = [f"{'experiment':<{width}}  {'roc_auc':>7}  {'f1':>6}  {'fit s':>7}  {'total s':>7}  "
+             f"{'p99 ms':>7}  {'MiB':>6}"]
+    for r in rows:
+        if r.error:
+            lines.append(f"{r.name:<{width}}  failed: {r.error}")
+        else:
+            cost = (f"  {r.benchmark['single_row_p99_ms']:>7.3f}  {r.benchmark['serialized_bytes'] / 2**20:>6.2f}"
+                    if r.benchmark else "")
+            lines.append(f"{r.name:<{width}}  {r.metrics['roc_auc']:>7.4f}  {r.metrics['f1']:>6.4f}  "
+                         f"{r.fit_seconds:>7.1f}  {r.seconds:>7.1f}{cost}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m olist_review_model.experiments",
+        description="Train a grid of model configs in parallel on one shared training matrix.",
+    )
+    parser.add_argument("--grid", help="YAML grid file (default: the run_experiments.py sweep)")
+    parser.add_argument("--cpu-budget", type=int, help="Cores to use in total (default: all)")
+    parser.add_argument("--threads-per-run", type=int, help="n_jobs of each run (default: an even share)")
+    parser.add_argument("-o", "--output", help="Append one JSON line per finished run to this file")
+    parser.add_argument("--mlflow-uri", help="Also log every run to this MLflow tracking server")
+    parser.add_argument("--matrix-dir", help="Where to write the shared matrix (default: a temporary directory)")
+    parser.add_argument("--no-stage-cache", action="store_true", help="Rebuild the features without the stage cache")
+    parser.add_argument("--max-p99-ms", type=float, help="Select only runs whose single-row p99 is below this "
+                                                         "(default: config selection.max_p99_ms)")
+    parser.add_argument("--max-size-mb", type=float, help="Select only runs whose model is at most this size "
+                                                          "(default: config selection.max_size_mb)")
+    args = parser.parse_args(argv)
+
+    experiments = load_grid(args.grid) if args.grid else list(DEFAULT_EXPERIMENTS)
+    with tempfile.TemporaryDirectory(prefix="olist-matrix-") as tmp_dir:
+        matrix = build_matrix(args.matrix_dir or tmp_dir, use_stage_cache=not args.no_stage_cache)
+        results = run_experiments(experiments, matrix, args.cpu_budget, args.threads_per_run, args.output)
+
+    print("\n" + format_results(results))
+    rule = selection_rule(load_config())
+    rule.update({key: value for key, value in (("max_p99_ms", args.max_p99_ms), ("max_size_mb", args.max_size_mb))
+                 if value is not None})
+    selected = select_result(results, **rule)
+    print(f"\nselected ({rule}): {selected.name if selected else 'no run meets the rule'}")
+    if args.mlflow_uri:
+        log_to_mlflow(results, args.mlflow_uri)
+    return 1 if all(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Feature contribution engines for the Olist negative review model.
+
+Two engines produce the same per-feature log-odds contributions:
+- "shap":   shap.TreeExplainer, built once per model and cached.
+- "native": the booster's own TreeSHAP output (pred_contribs), no shap import needed.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.registry import ModelHandle
+
+EXPLANATION_ENGINES = ("shap", "native")
+
+_explainers: dict[str, tuple[ModelHandle, object]] = {}
+_explainers_lock = threading.Lock()
+
+
+def get_explainer(handle: ModelHandle):
+    """Return the cached shap.TreeExplainer for a model, building it on first use."""
+    cached = _explainers.get(handle.name)
+    if cached is not None and cached[0] is handle:
+        return cached[1]
+
+    with _explainers_lock:
+        cached = _explainers.get(handle.name)
+        if cached is None or cached[0] is not handle:
+            import shap
+
+            cached = (handle, shap.TreeExplainer(handle.model))
+            _explainers[handle.name] = cached
+    return cached[1]
+
+
+def clear_explainers() -> None:
+    """Drop every cached explainer."""
+    with _explainers_lock:
+        _explainers.clear()
+
+
+def explain(handle: ModelHandle, X: pd.DataFrame, engine: str = "native") -> np.ndarray:
+    """
+    Compute feature contributions for every row of X.
+
+    Returns
+    -------
+    np.ndarray of shape (n_rows, n_features), in the model's log-odds space.
+    """
+    if engine == "shap":
+        return np.asarray(get_explainer(handle).shap_values(X))
+    if engine == "native":
+        return _native_contributions(handle.model, X)
+    raise ValueError(
+        f"Unknown explanation engine '{engine}'. Expected one of: {', '.join(EXPLANATION_ENGINES)}"
+    )
+
+
+def _native_contributions(model, X: pd.DataFrame) -> np.ndarray:
+    """TreeSHAP contributions computed by XGBoost itself, without the bias column."""
+    import xgboost as xgb
+
+    contribs = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+    return contribs[:, :-1]
@@ -0,0 +1,188 @@
+"""
+Flat-array form of the trained XGBoost model and a numpy evaluator for it.
+
+All trees are concatenated into parallel arrays (split feature, threshold,
+child indices, default direction, node value). Leaves point to themselves,
+so every row can walk every tree for `max_depth` steps in lockstep with
+plain numpy indexing. Scoring needs only numpy: xgboost is imported solely
+to export a trained booster.
+
+Usage:
+    python -m olist_review_model.flat_forest   # export the trained model to config["flat_model_file"]
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+ROW_CHUNK = 1024
+
+
+@dataclass(frozen=True)
+class FlatForest:
+    """A binary:logistic tree ensemble stored as flat arrays."""
+
+    feature: np.ndarray       # int32, split feature index per node (0 for leaves)
+    threshold: np.ndarray     # float32, go left when x < threshold
+    left: np.ndarray          # int32, absolute index of the left child (self for leaves)
+    right: np.ndarray         # int32, absolute index of the right child (self for leaves)
+    default_left: np.ndarray  # bool, direction taken for missing values
+    value: np.ndarray         # float32, leaf value (0 for internal nodes)
+    roots: np.ndarray         # int32, index of the root node of each tree
+    max_depth: int
+    base_margin: float
+    feature_names: tuple[str, ...]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.right, self.default_left, self.value, self.roots)
+        return sum(arr.nbytes for arr in arrays)
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """Raw log-odds for every row of X (n_rows, n_features)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        margins = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), ROW_CHUNK):
+            margins[start:start + ROW_CHUNK] = self._margin_chunk(X[start:start + ROW_CHUNK])
+        return margins
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probability for every row of X."""
+        return (1.0 / (1.0 + np.exp(-self.predict_margin(X)))).astype(np.float32)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities (n_rows, 2), same layout as XGBClassifier.predict_proba."""
+        positive = self.predict(X)
+        return np.column_stack([1.0 - positive, positive])
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            max_depth=np.int32(self.max_depth),
+            base_margin=np.float64(self.base_margin),
+            feature_names=np.array(self.feature_names),
+        )
+
+    def _margin_chunk(self, X: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1) + np.float32(self.base_margin)
+
+
+def load_flat_forest(path: str) -> FlatForest:
+    """Load a FlatForest saved with `FlatForest.save`."""
+    with np.load(path) as data:
+        return FlatForest(
+            feature=data["feature"],
+            threshold=data["threshold"],
+            left=data["left"],
+            right=data["right"],
+            default_left=data["default_left"],
+            value=data["value"],
+            roots=data["roots"],
+            max_depth=int(data["max_depth"]),
+            base_margin=float(data["base_margin"]),
+            feature_names=tuple(str(name) for name in data["feature_names"]),
+        )
+
+
+def export_flat_forest(model) -> FlatForest:
+    """Convert a trained XGBClassifier (or Booster) into a FlatForest.
+
+    Only the trees used by predict_proba are exported, i.e. up to
+    best_iteration when the model was trained with early stopping.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    try:
+        booster = booster[: booster.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    dump = json.loads(booster.save_raw(raw_format="json"))
+    learner = dump["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]").split(",")[0])
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        n_nodes = len(tree["left_children"])
+        ids = np.arange(n_nodes)
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        is_leaf = lc == -1
+
+        feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+        threshold.append(np.where(is_leaf, 0.0, tree["split_conditions"]))
+        left.append(np.where(is_leaf, ids, lc) + offset)
+        right.append(np.where(is_leaf, ids, rc) + offset)
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        value.append(np.where(is_leaf, tree["split_conditions"], 0.0))
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(lc, rc))
+        offset += n_nodes
+
+    return FlatForest(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold).astype(np.float32),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value).astype(np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        base_margin=math.log(base_score / (1.0 - base_score)),
+        feature_names=tuple(booster.feature_names or ()),
+    )
+
+
+def _tree_depth(lc: np.ndarray, rc: np.ndarray) -> int:
+    """Number of edges on the longest root-to-leaf path."""
+    depth = 0
+    frontier = [0]
+    while True:
+        children = [c for node in frontier for c in (lc[node], rc[node]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+
+def export_trained_model() -> str:
+    """Export the trained model to config["flat_model_file"] next to it. Returns the path."""
+    from olist_review_model import TRAINED_MODEL_DIR
+    from olist_review_model.pipeline import load_config
+    from olist_review_model.registry import get_model
+
+    config = load_config()
+    path = os.path.join(TRAINED_MODEL_DIR, config["flat_model_file"])
+    export_flat_forest(get_model(config["trained_model_file"]).model).save(path)
+    return path
+
+
+if __name__ == "__main__":
+    print(f"Flat model saved to: {export_trained_model()}")
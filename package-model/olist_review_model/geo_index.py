@@ -0,0 +1,108 @@
+"""
+Compact zip-prefix geolocation index.
+
+The ~1M-row geolocation CSV reduces to one (zip_prefix, lat, lng) record per
+zip prefix, holding the mean coordinates. Records are sorted by zip prefix
+and saved as a structured .npy next to the trained model, so serving can
+memory-map them and resolve prefixes with a binary search (np.searchsorted)
+instead of carrying the full table.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.distance import distance_km
+
+GEO_INDEX_DTYPE = np.dtype([("zip_prefix", "<i4"), ("lat", "<f4"), ("lng", "<f4")])
+
+
+class GeoIndex:
+    """Sorted zip-prefix -> (lat, lng) records with vectorized lookups."""
+
+    def __init__(self, records: np.ndarray) -> None:
+        self.records = records
+        self._zips = records["zip_prefix"]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes
+
+    def lookup(self, zip_prefixes) -> tuple[np.ndarray, np.ndarray]:
+        """Mean (lat, lng) of each zip prefix; NaN for unknown or missing prefixes."""
+        zips = pd.Series(zip_prefixes).to_numpy(dtype=np.float64, na_value=np.nan)
+        lat = np.full(len(zips), np.nan, dtype=np.float32)
+        lng = np.full(len(zips), np.nan, dtype=np.float32)
+        if len(self._zips) == 0:
+            return lat, lng
+
+        known = ~np.isnan(zips)
+        wanted = zips[known].astype(np.int64)
+        pos = np.minimum(np.searchsorted(self._zips, wanted), len(self._zips) - 1)
+        found = self._zips[pos] == wanted
+        rows = np.flatnonzero(known)[found]
+        lat[rows] = self.records["lat"][pos[found]]
+        lng[rows] = self.records["lng"][pos[found]]
+        return lat, lng
+
+    def distance_km(self, customer_zips, seller_zips, metric: str | None = None) -> np.ndarray:
+        """Seller-customer distance for paired zip prefixes; NaN when either is unknown.
+
+        `metric` is one of distance.DISTANCE_METRICS, config["distance_metric"] by default.
+        """
+        lat_c, lng_c = self.lookup(customer_zips)
+        lat_s, lng_s = self.lookup(seller_zips)
+        return distance_km(lat_c, lng_c, lat_s, lng_s, metric)
+
+
+def build_geo_index(geolocation: pd.DataFrame) -> GeoIndex:
+    """Mean lat/lng per geolocation_zip_code_prefix, sorted by zip prefix."""
+    zips = geolocation["geolocation_zip_code_prefix"].to_numpy(np.int64)
+    lat = geolocation["geolocation_lat"].to_numpy(np.float64)
+    lng = geolocation["geolocation_lng"].to_numpy(np.float64)
+
+    order = np.argsort(zips, kind="stable")
+    zips, lat, lng = zips[order], lat[order], lng[order]
+    unique, starts, counts = np.unique(zips, return_index=True, return_counts=True)
+
+    records = np.empty(len(unique), dtype=GEO_INDEX_DTYPE)
+    records["zip_prefix"] = unique
+    if len(unique):
+        records["lat"] = np.add.reduceat(lat, starts) / counts
+        records["lng"] = np.add.reduceat(lng, starts) / counts
+    return GeoIndex(records)
+
+
+def save_geo_index(index: GeoIndex, path: str) -> None:
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, index.records)
+    os.replace(tmp_path, path)
+
+
+def load_geo_index(path: str) -> GeoIndex:
+    """Memory-map a saved geo index."""
+    return GeoIndex(np.load(path, mmap_mode="r"))
+
+
+_lock = threading.Lock()
+_loaded: dict[str, GeoIndex] = {}
+
+
+def get_geo_index() -> GeoIndex | None:
+    """The packaged geo index (config["geo_index_file"]), loaded once per process. None if not generated."""
+    from olist_review_model import TRAINED_MODEL_DIR
+    from olist_review_model.pipeline import load_config
+
+    path = os.path.join(TRAINED_MODEL_DIR, load_config()["geo_index_file"])
+    index = _loaded.get(path)
+    if index is None:
+        with _lock:
+            index = _loaded.get(path)
+            if index is None and os.path.exists(path):
+                index = _loaded[path] = load_geo_index(path)
+    return index
@@ -0,0 +1,378 @@
+"""
+Incremental maestro builds.
+
+`IncrementalMaestro` keeps the lean maestro on disk as one Feather file per
+purchase month, plus the state of the last build:
+
+- a content digest per order over its reviews, orders, order_items and
+  payments rows, and per customer, seller, product and geolocation zip prefix;
+- the purchase-time watermark (latest order_purchase_timestamp seen);
+- the geo index the partitions were built with.
+
+`update` compares the raw tables with that state and rebuilds only the orders
+that are new, changed, or reference a changed customer, seller, product or
+zip prefix. Payment aggregates, text statistics and distances are therefore
+computed for those orders only, and only the months they belong to are
+rewritten. `update_geo_index` likewise recomputes mean coordinates only for
+the zip prefixes whose geolocation rows changed.
+
+A change of the build code, distance metric, feature list or data schema
+invalidates the store and triggers a full rebuild. Rows of a month are kept
+sorted by (order_purchase_timestamp, order_id), so the loaded maestro does
+not depend on the update history. Requires pyarrow.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.distance import distance_km
+from olist_review_model.geo_index import GeoIndex, build_geo_index
+from olist_review_model.pipeline import _build_maestro_lean, _shared_codes, build_maestro, load_config
+from olist_review_model.stages import _code_digest
+from olist_review_model.text_features import text_stats, text_stats_batch
+
+STORE_VERSION = "1"
+STATE_FILE = "state.json"
+PARTITION_DIR = "maestro"
+
+# Raw tables keyed by order_id whose rows make up an order's digest
+ORDER_TABLES = ("reviews", "orders", "order_items", "payments")
+# Dimension tables and their keys
+DIMENSION_TABLES = {"customers": "customer_id", "sellers": "seller_id", "products": "product_id"}
+
+
+@dataclass
+class IncrementalReport:
+    """What one `IncrementalMaestro.update` recomputed."""
+
+    new_orders: int = 0
+    changed_orders: int = 0
+    removed_orders: int = 0
+    rebuilt_rows: int = 0
+    months: list[str] = field(default_factory=list)
+    watermark: str | None = None
+    full_rebuild: bool = False
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "new_orders": self.new_orders, "changed_orders": self.changed_orders,
+            "removed_orders": self.removed_orders, "rebuilt_rows": self.rebuilt_rows,
+            "months": self.months, "watermark": self.watermark,
+            "full_rebuild": self.full_rebuild, "seconds": round(self.seconds, 4),
+        }
+
+    def format(self) -> str:
+        kind = "full rebuild" if self.full_rebuild else "incremental"
+        return (f"maestro {kind}: {self.new_orders} new, {self.changed_orders} changed, "
+                f"{self.removed_orders} removed orders; {self.rebuilt_rows} rows rebuilt in "
+                f"{len(self.months)} month(s) in {self.seconds:.3f}s; watermark {self.watermark}")
+
+
+def _dense(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` with categoricals that have far more categories than rows (small slices) as plain values.
+
+    Hashing and grouping a categorical touch every category, so on a slice the
+    values are cheaper; they hash the same.
+    """
+    sparse = [col for col, dtype in df.dtypes.items()
+              if isinstance(dtype, pd.CategoricalDtype) and len(dtype.categories) > 2 * len(df)]
+    return df.astype({col: object for col in sparse}) if sparse else df
+
+
+def _key_digests(df: pd.DataFrame, key: str, table: str) -> pd.Series:
+    """uint64 digest per `key` value: the wrapping sum of its row hashes, salted by table."""
+    hashes = pd.util.hash_pandas_object(df, index=False, hash_key=table.ljust(16, "_")[:16])
+    digests = pd.Series(hashes.to_numpy()).groupby(
+        df[key].reset_index(drop=True), sort=False, observed=True).sum()
+    digests.index = _plain_index(digests.index)
+    return digests
+
+
+def order_digests(data: dict) -> pd.Series:
+    """Digest of every order in data["orders"] over its rows in ORDER_TABLES."""
+    codes = _shared_codes(*(data[table]["order_id"] for table in ORDER_TABLES))
+    hashes = [pd.util.hash_pandas_object(data[table], index=False, hash_key=table.ljust(16, "_")[:16]).to_numpy()
+              for table in ORDER_TABLES]
+    sums = pd.Series(np.concatenate(hashes)).groupby(np.concatenate(codes)).sum()
+    order_ids = _plain_index(data["orders"]["order_id"])
+    digests = pd.Series(sums.reindex(codes[ORDER_TABLES.index("orders")]).to_numpy(np.uint64), index=order_ids)
+    return digests[~order_ids.duplicated()]
+
+
+def _changed_keys(current: pd.Series, previous: pd.Series) -> pd.Index:
+    """Keys that are new, removed or have a different digest."""
+    common = current.index.intersection(previous.index)
+    modified = common[current.reindex(common).to_numpy() != previous.reindex(common).to_numpy()]
+    return current.index.difference(previous.index).union(previous.index.difference(current.index)).union(modified)
+
+
+def _build_key() -> str:
+    config = load_config()
+    payload = {
+        "version": STORE_VERSION,
+        "code": _code_digest((build_maestro, _build_maestro_lean, _shared_codes, text_stats_batch,
+                              text_stats, distance_km)),
+        "config": {key: config.get(key) for key in ("data_schema", "distance_metric", "features")},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=lambda v: dict(v) if hasattr(v, "items") else list(v))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class IncrementalMaestro:
+    """Month-partitioned lean maestro in `store_dir`, updated from the raw tables."""
+
+    def __init__(self, store_dir: str) -> None:
+        self.store_dir = store_dir
+
+    # --- Public API ---
+
+    def update(self, data: dict, geo_index: GeoIndex | None = None,
+               lookback_days: int | None = None) -> IncrementalReport:
+        """Bring the stored maestro up to date with `data` (as returned by load_raw_data).
+
+        New orders are always built, whatever their purchase date. Stored
+        orders are checked for changed rows only when purchased within
+        `lookback_days` (default: config["incremental_lookback_days"]) of the
+        watermark, or without a purchase date; older ones are treated as final
+        unless a customer, seller, product or zip prefix they reference
+        changed, or they disappeared. `clear()` forces a full rebuild.
+        """
+        start = time.perf_counter()
+        if geo_index is None:
+            geo_index = build_geo_index(data["geolocation"])
+        if lookback_days is None:
+            lookback_days = load_config().get("incremental_lookback_days", 0)
+
+        build_key = _build_key()
+        state = self._read_json(STATE_FILE)
+        report = IncrementalReport(full_rebuild=state.get("build_key") != build_key)
+        if report.full_rebuild:
+            self._clear_partitions()
+            state = {}
+        previous = self._read_frame("orders") if not report.full_rebuild else _empty_state()
+
+        # Orders to check: everything on a full rebuild, else the late-arrival window plus
+        # every order not stored yet (a backfill may predate the window)
+        orders = data["orders"]
+        order_ids = _plain_index(orders["order_id"])
+        purchase = pd.to_datetime(orders["order_purchase_timestamp"])
+        window = pd.Series(True, index=orders.index)
+        if state.get("watermark"):
+            window = ~(purchase < pd.Timestamp(state["watermark"]) - pd.Timedelta(days=lookback_days))
+        window |= ~order_ids.isin(previous.index)
+        window_ids = orders.loc[window, "order_id"]
+        digests = order_digests({
+            table: _dense(data[table][data[table]["order_id"].isin(window_ids)]) for table in ORDER_TABLES
+        })
+        dimension_digests = {table: _key_digests(data[table], key, table) for table, key in DIMENSION_TABLES.items()}
+
+        new = digests.index.difference(previous.index)
+        common = digests.index.intersection(previous.index)
+        changed = common[digests.reindex(common).to_numpy() != previous["digest"].reindex(common).to_numpy()]
+        removed = previous.index.difference(order_ids)
+        if not report.full_rebuild:
+            affected = new.union(changed).union(self._dimension_affected(data, geo_index, dimension_digests))
+        else:
+            affected = new
+        report.new_orders, report.removed_orders = len(new), len(removed)
+        report.changed_orders = len(affected) - len(new)
+
+        rebuilt = self._build(data, geo_index, affected) if len(affected) else None
+        rebuilt_months = _months(rebuilt["order_purchase_timestamp"]) if rebuilt is not None else np.array([])
+        report.rebuilt_rows = len(rebuilt_months)
+        stale = affected.union(removed)
+        dirty_months = set(previous.loc[stale.intersection(previous.index), "month"])
+        dirty_months.update(rebuilt_months)
+        for month in sorted(dirty_months):
+            rows = rebuilt[rebuilt_months == month] if rebuilt is not None else None
+            self._rewrite_partition(month, stale, rows)
+        report.months = sorted(dirty_months)
+
+        # State last: an interrupted update is redone by the next one
+        window_months = _months(purchase[window].to_numpy())
+        checked = pd.DataFrame({"digest": digests.to_numpy(np.uint64)}, index=digests.index)
+        checked["month"] = pd.Series(window_months, index=window_ids.to_numpy()).groupby(level=0).first()
+        kept = previous[~previous.index.isin(checked.index) & ~previous.index.isin(removed)]
+        self._write_frame("orders", pd.concat([kept, checked]).rename_axis("key").reset_index())
+        for table, table_digests in dimension_digests.items():
+            self._write_digests(table, table_digests)
+        np.save(self._path("geo_built.npy"), np.asarray(geo_index.records))
+
+        latest = purchase.max()
+        if pd.notna(latest) and (not state.get("watermark") or latest > pd.Timestamp(state["watermark"])):
+            report.watermark = latest.isoformat()
+        else:
+            report.watermark = state.get("watermark")
+        self._write_json(STATE_FILE, {"build_key": build_key, "watermark": report.watermark,
+                                      "orders": len(kept) + len(checked)})
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def update_geo_index(self, geolocation: pd.DataFrame) -> GeoIndex:
+        """The geo index of `geolocation`, recomputing means only for zip prefixes whose rows changed."""
+        digests = _key_digests(geolocation, "geolocation_zip_code_prefix", "geolocation")
+        previous = self._read_series("geo_rows", "digest")
+        means_path = self._path("geo_means.npy")
+        if previous.empty or not os.path.exists(means_path):
+            index = build_geo_index(geolocation)
+        else:
+            changed = _changed_keys(digests.set_axis(digests.index.astype(np.int64)),
+                                    previous.set_axis(previous.index.astype(np.int64)))
+            old = np.load(means_path)
+            fresh = build_geo_index(geolocation[geolocation["geolocation_zip_code_prefix"].isin(changed)])
+            records = np.concatenate([old[~np.isin(old["zip_prefix"], changed)], fresh.records])
+            index = GeoIndex(np.sort(records, order="zip_prefix"))
+
+        self._write_digests("geo_rows", digests)
+        np.save(means_path, np.asarray(index.records))
+        return index
+
+    def load(self, months: list[str] | None = None) -> pd.DataFrame:
+        """The stored maestro, month by month (all months when None)."""
+        import pyarrow.feather as feather
+
+        paths = sorted(glob.glob(os.path.join(self.store_dir, PARTITION_DIR, "month=*.feather")))
+        if months is not None:
+            paths = [p for p in paths if _partition_month(p) in set(months)]
+        if not paths:
+            return pd.DataFrame()
+        return pd.concat([feather.read_table(p).to_pandas() for p in paths], ignore_index=True)
+
+    def clear(self) -> None:
+        """Delete the stored maestro and its state, so the next update rebuilds everything."""
+        self._clear_partitions()
+        for name in (STATE_FILE, "orders.feather", "geo_rows.feather", "geo_means.npy", "geo_built.npy",
+                     *(f"{table}.feather" for table in DIMENSION_TABLES)):
+            path = os.path.join(self.store_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    @property
+    def watermark(self) -> str | None:
+        """Latest order_purchase_timestamp seen by the last update."""
+        return self._read_json(STATE_FILE).get("watermark")
+
+    # --- Helpers ---
+
+    def _dimension_affected(self, data: dict, geo_index: GeoIndex, dimension_digests: dict) -> pd.Index:
+        """Orders referencing a customer, seller, product or zip prefix that changed since the last build."""
+        orders, items = data["orders"], data["order_items"]
+        changed = {table: _changed_keys(digests, self._read_series(table, "digest"))
+                   for table, digests in dimension_digests.items()}
+
+        built_path = self._path("geo_built.npy")
+        if os.path.exists(built_path):
+            built = pd.DataFrame(np.load(built_path)).set_index("zip_prefix")
+            current = pd.DataFrame(np.asarray(geo_index.records)).set_index("zip_prefix")
+            both = built.index.intersection(current.index)
+            moved = both[(built.loc[both] != current.loc[both]).any(axis=1).to_numpy()]
+            zips = built.index.symmetric_difference(current.index).union(moved)
+            customers, sellers = data["customers"], data["sellers"]
+            changed["customers"] = changed["customers"].union(
+                _plain_index(customers.loc[customers["customer_zip_code_prefix"].isin(zips), "customer_id"]))
+            changed["sellers"] = changed["sellers"].union(
+                _plain_index(sellers.loc[sellers["seller_zip_code_prefix"].isin(zips), "seller_id"]))
+
+        hit = orders["customer_id"].isin(changed["customers"])
+        item_hit = items["seller_id"].isin(changed["sellers"]) | items["product_id"].isin(changed["products"])
+        return _plain_index(orders.loc[hit, "order_id"]).union(_plain_index(items.loc[item_hit, "order_id"]))
+
+    def _build(self, data: dict, geo_index: GeoIndex, affected: pd.Index) -> pd.DataFrame:
+        """Lean maestro of the `affected` orders only."""
+        subset = {table: data[table][data[table]["order_id"].isin(affected)] for table in ORDER_TABLES}
+        subset["customers"] = data["customers"][
+            data["customers"]["customer_id"].isin(subset["orders"]["customer_id"])]
+        subset["sellers"] = data["sellers"][data["sellers"]["seller_id"].isin(subset["order_items"]["seller_id"])]
+        subset["products"] = data["products"][
+            data["products"]["product_id"].isin(subset["order_items"]["product_id"])]
+        return build_maestro(subset, geo_index, lean=True)
+
+    def _rewrite_partition(self, month: str, stale: pd.Index, rows: pd.DataFrame | None) -> None:
+        """Replace the `stale` orders of a month partition with `rows` (the month's rebuilt orders)."""
+        import pyarrow.feather as feather
+
+        path = os.path.join(self.store_dir, PARTITION_DIR, f"month={month}.feather")
+        if os.path.exists(path):
+            kept = feather.read_table(path).to_pandas()
+            kept = kept[~_plain_index(kept["order_id"]).isin(stale)]
+            rows = pd.concat([kept, rows], ignore_index=True) if rows is not None and len(rows) else kept
+        if rows is None or rows.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        rows = rows.assign(order_id=rows["order_id"].astype(str)).sort_values(
+            ["order_purchase_timestamp", "order_id"], kind="stable").reset_index(drop=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        rows.to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+    def _clear_partitions(self) -> None:
+        for path in glob.glob(os.path.join(self.store_dir, PARTITION_DIR, "month=*.feather")):
+            os.remove(path)
+
+    def _path(self, name: str) -> str:
+        os.makedirs(self.store_dir, exist_ok=True)
+        return os.path.join(self.store_dir, name)
+
+    def _read_series(self, name: str, column: str) -> pd.Series:
+        frame = self._read_frame(name)
+        return frame[column] if column in frame else pd.Series(dtype=np.uint64)
+
+    def _read_frame(self, name: str) -> pd.DataFrame:
+        path = os.path.join(self.store_dir, f"{name}.feather")
+        if not os.path.exists(path):
+            return _empty_state()
+        frame = pd.read_feather(path)
+        return frame.drop(columns="key").set_axis(_plain_index(frame["key"]).rename("key"))
+
+    def _write_digests(self, name: str, digests: pd.Series) -> None:
+        self._write_frame(name, pd.DataFrame({"key": digests.index.astype(str), "digest": digests.to_numpy(np.uint64)}))
+
+    def _write_frame(self, name: str, frame: pd.DataFrame) -> None:
+        path = self._path(f"{name}.feather")
+        frame.to_feather(f"{path}.tmp", compression="uncompressed")
+        os.replace(f"{path}.tmp", path)
+
+    def _read_json(self, name: str) -> dict:
+        try:
+            with open(os.path.join(self.store_dir, name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_json(self, name: str, data: dict) -> None:
+        path = self._path(name)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+
+def _plain_index(keys) -> pd.Index:
+    """Keys as a numpy-backed Index; Arrow-backed string indexes make isin() orders of magnitude slower."""
+    keys = np.asarray(keys)
+    return pd.Index(keys, dtype=object) if keys.dtype == object else pd.Index(keys)
+
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame({"digest": pd.Series(dtype=np.uint64), "month": pd.Series(dtype=object)},
+                        index=pd.Index([], dtype=object, name="key"))
+
+
+def _months(timestamps) -> np.ndarray:
+    """YYYY-MM purchase month of each timestamp; missing ones fall in the 1970-01 sentinel month."""
+    months = pd.to_datetime(pd.Series(timestamps)).fillna(pd.Timestamp("1970-01-01")).to_numpy("datetime64[M]")
+    unique, inverse = np.unique(months, return_inverse=True)
+    return np.datetime_as_string(unique, unit="M").astype(object)[inverse]
+
+
+def _partition_month(path: str) -> str:
+    return os.path.basename(path)[len("month="):-len(".feather")]
@@ -0,0 +1,213 @@
+"""
+Inference micro-benchmark of a candidate model and latency-aware selection.
+
+`benchmark_model` measures what a model costs at serving time, on the same
+code paths the API uses (predict._predict_model_array, explain's native
+TreeSHAP):
+- single-row latency p50/p99 (ms), one row per call;
+- batch throughput (rows/s) on batches of `batch_size` rows;
+- SHAP time per row (XGBoost models only);
+- serialized size, and resident memory of a copy loaded in a fresh process.
+
+Training stores the result in the model metadata (<model>.metadata.json,
+next to the model file), which the registry exposes with the handle.
+`select_candidate` applies a selection rule such as "best ROC AUC with
+p99 < 5 ms" to a list of benchmarked candidates (config["selection"]).
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.flat_forest import FlatForest
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class InferenceBenchmark:
+    """Serving cost of one model; None where it does not apply or cannot be measured."""
+
+    single_row_p50_ms: float
+    single_row_p99_ms: float
+    batch_size: int
+    batch_rows_per_s: float
+    shap_ms_per_row: float | None
+    serialized_bytes: int
+    resident_bytes: int | None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def format(self) -> str:
+        shap = f"{self.shap_ms_per_row:.3f} ms/row" if self.shap_ms_per_row is not None else "n/a"
+        resident = f"{self.resident_bytes / 2**20:.1f} MiB" if self.resident_bytes is not None else "n/a"
+        return (f"single row p50 {self.single_row_p50_ms:.3f} ms, p99 {self.single_row_p99_ms:.3f} ms | "
+                f"batch of {self.batch_size}: {self.batch_rows_per_s:,.0f} rows/s | SHAP {shap} | "
+                f"size {self.serialized_bytes / 2**20:.2f} MiB | resident {resident}")
+
+
+def _predictor(model):
+    """Positive-class probability function for the serving path of `model`."""
+    from olist_review_model.predict import _predict_model_array
+
+    if isinstance(model, FlatForest) or hasattr(model, "get_booster"):
+        return lambda X: _predict_model_array(model, X)
+    return lambda X: model.predict_proba(X)[:, 1]
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def serialized_size(model) -> int:
+    """Size of the serialized booster, the flat arrays, or the pickled model otherwise."""
+    if isinstance(model, FlatForest):
+        return model.nbytes
+    if hasattr(model, "get_booster"):
+        return len(model.get_booster().save_raw(raw_format="ubj"))
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# Runs in a fresh interpreter, where the allocator has no freed memory to reuse
+_RESIDENT_SCRIPT = """
+import pickle, sys
+import numpy as np
+from olist_review_model.model_benchmark import _predictor, _rss_bytes
+with open(sys.argv[1], "rb") as f:
+    payload = f.read()
+row = np.load(sys.argv[2])
+before = _rss_bytes()
+model = pickle.loads(payload)
+_predictor(model)(row)
+print(_rss_bytes() - before)
+"""
+
+
+def resident_size(model, X: np.ndarray) -> int | None:
+    """RSS growth of a fresh process from loading `model` and predicting one row; None if unmeasurable."""
+    if _rss_bytes() is None:
+        return None
+    with tempfile.TemporaryDirectory(prefix="olist-resident-") as tmp_dir:
+        model_path, row_path = os.path.join(tmp_dir, "model.pkl"), os.path.join(tmp_dir, "row.npy")
+        with open(model_path, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        np.save(row_path, X[:1])
+        try:
+            out = subprocess.run([sys.executable, "-c", _RESIDENT_SCRIPT, model_path, row_path],
+                                 capture_output=True, text=True, timeout=300, check=True).stdout
+            return max(0, int(out.split()[-1]))
+        except (subprocess.SubprocessError, OSError, ValueError, IndexError):
+            return None
+
+
+def benchmark_model(model, X: np.ndarray, single_rows: int = 500, batch_size: int = 1_000,
+                    batch_repeats: int = 5, shap_rows: int = 100) -> InferenceBenchmark:
+    """Benchmark `model` on sample feature rows `X` (n_rows, n_features); rows are reused as needed."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    predict = _predictor(model)
+    predict(X[:1])  # warm up lazily built predictor state
+
+    rows = X[np.arange(single_rows) % len(X)]
+    latencies = np.empty(single_rows)
+    for i in range(single_rows):
+        row = rows[i:i + 1]
+        start = time.perf_counter()
+        predict(row)
+        latencies[i] = time.perf_counter() - start
+
+    batch = X[np.arange(batch_size) % len(X)]
+    batch_seconds = []
+    for _ in range(batch_repeats):
+        start = time.perf_counter()
+        predict(batch)
+        batch_seconds.append(time.perf_counter() - start)
+
+    shap_ms = None
+    if hasattr(model, "get_booster"):
+        from olist_review_model.explain import _native_contributions
+
+        sample = pd.DataFrame(X[np.arange(shap_rows) % len(X)], columns=model.get_booster().feature_names)
+        start = time.perf_counter()
+        _native_contributions(model, sample)
+        shap_ms = (time.perf_counter() - start) * 1e3 / shap_rows
+
+    return InferenceBenchmark(
+        single_row_p50_ms=float(np.percentile(latencies, 50) * 1e3),
+        single_row_p99_ms=float(np.percentile(latencies, 99) * 1e3),
+        batch_size=batch_size,
+        batch_rows_per_s=float(batch_size / np.median(batch_seconds)),
+        shap_ms_per_row=shap_ms,
+        serialized_bytes=serialized_size(model),
+        resident_bytes=resident_size(model, X),
+    )
+
+
+def meets_rule(benchmark: dict, max_p99_ms: float | None = None, max_size_mb: float | None = None) -> bool:
+    """Whether a benchmark (as_dict) is within the latency and size limits."""
+    if max_p99_ms is not None and benchmark["single_row_p99_ms"] > max_p99_ms:
+        return False
+    return max_size_mb is None or benchmark["serialized_bytes"] <= max_size_mb * 2**20
+
+
+def select_candidate(candidates: list[dict], metric: str = "roc_auc", max_p99_ms: float | None = None,
+                     max_size_mb: float | None = None) -> dict | None:
+    """Candidate with the best `metric` among those within the limits; None if none qualifies.
+
+    Each candidate is a dict with "metrics" and "benchmark" (InferenceBenchmark.as_dict()).
+    """
+    eligible = [c for c in candidates
+                if c.get("benchmark") and metric in c.get("metrics", {})
+                and meets_rule(c["benchmark"], max_p99_ms, max_size_mb)]
+    return max(eligible, key=lambda c: c["metrics"][metric], default=None)
+
+
+def selection_rule(config) -> dict:
+    """select_candidate keyword arguments from config["selection"]."""
+    rule = config.get("selection") or {}
+    return {"metric": rule.get("metric") or "roc_auc", "max_p99_ms": rule.get("max_p99_ms"),
+            "max_size_mb": rule.get("max_size_mb")}
+
+
+def candidate_metadata(model, X: np.ndarray, metrics: dict, config, **extra) -> dict:
+    """Metadata of a trained candidate: `extra`, its metrics, its benchmark and whether it meets the rule."""
+    benchmark = benchmark_model(model, X).as_dict()
+    rule = selection_rule(config)
+    meets = meets_rule(benchmark, rule["max_p99_ms"], rule["max_size_mb"])
+    return {**extra, "metrics": metrics, "benchmark": benchmark, "selection": {**rule, "meets_rule": meets}}
+
+
+def metadata_path(model_path: str) -> str:
+    """<model>.metadata.json next to a model file."""
+    return f"{os.path.splitext(model_path)[0]}.metadata.json"
+
+
+def save_metadata(model_path: str, metadata: dict) -> str:
+    path = metadata_path(model_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_metadata(model_path: str) -> dict:
+    """Metadata saved next to a model file; empty if there is none."""
+    try:
+        with open(metadata_path(model_path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
@@ -6,34 +6,126 @@ Transforms raw Olist data into the 16 features used by the model.
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 
 import numpy as np
 import pandas as pd
 import yaml
 
 from olist_review_model import CONFIG_DIR
+from olist_review_model.config_cache import CachedFile, FileSnapshot
+from olist_review_model.distance import distance_km
+from olist_review_model.geo_index import GeoIndex, build_geo_index
+from olist_review_model.quantile_sketch import DEFAULT_K, FeatureSketches
+from olist_review_model.text_features import text_stats_batch
 
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.yml")
 MEDIANS_FILE = os.path.join(CONFIG_DIR, "feature_medians.json")
+QUANTILES_FILE = os.path.join(CONFIG_DIR, "feature_quantiles.json")
+PROFILES_DIR = os.path.join(CONFIG_DIR, "profiles")
+
+_config_file = CachedFile(CONFIG_FILE, yaml.safe_load)
+_profile_files: dict[str, CachedFile] = {}
+_merged_configs: dict[tuple[str, str], MappingProxyType] = {}
+_medians_file = CachedFile(MEDIANS_FILE, json.loads, default={})
+_quantiles_file = CachedFile(QUANTILES_FILE, json.loads, default={})
+
+
+def config_snapshot() -> FileSnapshot:
+    """Current immutable snapshot of config.yml (re-parsed only when the file changes)."""
+    return _config_file.snapshot()
 
 
 def load_config():
-    config_path = os.path.join(CONFIG_DIR, "config.yml")
-    with open(config_path) as f:
-        return yaml.safe_load(f)
+    """Return the parsed config.yml as a read-only mapping (lists become tuples).
 
+    When it names a `config_profile`, the top-level keys of
+    config/profiles/<name>.yml (e.g. written by the hyperparameter search)
+    replace those of config.yml.
+    """
+    base = _config_file.snapshot()
+    profile = base.data.get("config_profile")
+    if not profile:
+        return base.data
 
-def load_raw_data(data_dir: str) -> dict:
-    """Load all raw CSV files."""
-    config = load_config()
-    files = config["data_files"]
-    data = {}
-    for key, filename in files.items():
-        data[key] = pd.read_csv(os.path.join(data_dir, filename))
-    return data
+    if profile not in _profile_files:
+        _profile_files[profile] = CachedFile(profile_path(profile), yaml.safe_load)
+    overlay = _profile_files[profile].snapshot()
+    key = (base.digest, overlay.digest)
+    if key not in _merged_configs:
+        _merged_configs.clear()
+        _merged_configs[key] = MappingProxyType({**base.data, **overlay.data})
+    return _merged_configs[key]
 
 
-def build_maestro(data: dict) -> pd.DataFrame:
-    """Merge all datasets into the maestro DataFrame."""
+def profile_path(name: str) -> str:
+    return os.path.join(PROFILES_DIR, f"{name}.yml")
+
+
+def load_raw_data(data_dir: str, cache_dir: str | None = None, columns: dict | None = None,
+                  typed: bool = True, max_workers: int | None = None) -> dict:
+    """Load all raw CSV files concurrently on a thread pool.
+
+    With `typed`, each file is read with its `data_schema` entry from
+    config.yml: only `usecols`, with the declared dtypes (categorical IDs,
+    float32 numerics) and dates parsed with explicit formats.
+
+    With `cache_dir`, each CSV goes through the columnar raw-data cache
+    (see raw_cache.py): it is parsed once, then memory-mapped from a Feather
+    copy keyed by its content hash. `columns` optionally maps a data_files key
+    to the columns to load for that file.
+    """
+    from olist_review_model.raw_cache import RawDataCache, read_typed_csv
+
+    config = load_config()
+    files = config["data_files"]
+    schemas = config.get("data_schema", {}) if typed else {}
+    columns = columns or {}
+    cache = RawDataCache(cache_dir) if cache_dir is not None else None
+
+    def load(key: str) -> pd.DataFrame:
+        path = os.path.join(data_dir, files[key])
+        options = _read_options(schemas.get(key, {}))
+        usecols = columns.get(key)
+        if cache is not None:
+            return cache.read_csv(path, columns=usecols, **options)
+        if usecols is not None:
+            options["usecols"] = list(usecols)
+            options["date_formats"] = {
+                col: fmt for col, fmt in options.get("date_formats", {}).items() if col in usecols
+            }
+        return read_typed_csv(path, **options)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(files)) as pool:
+        return dict(zip(files, pool.map(load, files)))
+
+
+def _read_options(schema) -> dict:
+    """read_typed_csv keyword arguments for one data_schema entry."""
+    options = {}
+    if "usecols" in schema:
+        options["usecols"] = list(schema["usecols"])
+    if "dtypes" in schema:
+        options["dtype"] = dict(schema["dtypes"])
+    if "date_formats" in schema:
+        options["date_formats"] = dict(schema["date_formats"])
+    return options
+
+
+def build_maestro(data: dict, geo_index: GeoIndex | None = None, lean: bool | None = None) -> pd.DataFrame:
+    """Merge all datasets into the maestro DataFrame.
+
+    `geo_index` is built from data["geolocation"] when not given. With `lean`
+    (default: config["lean_maestro"]) only the columns needed for the model
+    features and training are kept, see `_build_maestro_lean`.
+    """
+    if geo_index is None:
+        geo_index = build_geo_index(data["geolocation"])
+    if lean is None:
+        lean = load_config().get("lean_maestro", False)
+    if lean:
+        return _build_maestro_lean(data, geo_index)
 
     # Payments aggregation
     payments_agg = data["payments"].groupby("order_id").agg({
@@ -41,12 +133,6 @@ def build_maestro(data: dict) -> pd.DataFrame:
         "payment_value": "sum",
     }).reset_index()
 
-    # Geolocation: average lat/lng per zip prefix
-    geo_clean = data["geolocation"].groupby("geolocation_zip_code_prefix").agg({
-        "geolocation_lat": "mean",
-        "geolocation_lng": "mean",
-    }).reset_index()
-
     # Start merging
     df = data["reviews"].merge(data["orders"], on="order_id", how="inner")
     df = df.merge(data["order_items"], on="order_id", how="inner")
@@ -89,35 +175,13 @@ def build_maestro(data: dict) -> pd.DataFrame:
     )
     df = df.merge(data["products"], on="product_id", how="left")
 
-    # Merge geolocation (customer)
-    df = df.merge(
-        geo_clean,
-        left_on="customer_zip_code_prefix",
-        right_on="geolocation_zip_code_prefix",
-        how="left",
-    ).rename(columns={
-        "geolocation_lat": "geo_lat_customer",
-        "geolocation_lng": "geo_lng_customer",
-    }).drop(columns=["geolocation_zip_code_prefix"], errors="ignore")
-
-    # Merge geolocation (seller)
-    df = df.merge(
-        geo_clean,
-        left_on="seller_zip_code_prefix",
-        right_on="geolocation_zip_code_prefix",
-        how="left",
-    ).rename(columns={
-        "geolocation_lat": "geo_lat_seller",
-        "geolocation_lng": "geo_lng_seller",
-    }).drop(columns=["geolocation_zip_code_prefix"], errors="ignore")
-
-    # Distance seller-customer
-    deg_to_km = 111.1
-    df["distance_seller_customer_km"] = (
-        np.sqrt(
-            (df["geo_lat_customer"] - df["geo_lat_seller"]) ** 2
-            + (df["geo_lng_customer"] - df["geo_lng_seller"]) ** 2
-        ) * deg_to_km
+    # Geolocation of customer and seller, resolved through the zip-prefix index
+    df["geo_lat_customer"], df["geo_lng_customer"] = geo_index.lookup(df["customer_zip_code_prefix"])
+    df["geo_lat_seller"], df["geo_lng_seller"] = geo_index.lookup(df["seller_zip_code_prefix"])
+
+    # Distance seller-customer (config["distance_metric"])
+    df["distance_seller_customer_km"] = distance_km(
+        df["geo_lat_customer"], df["geo_lng_customer"], df["geo_lat_seller"], df["geo_lng_seller"]
     )
 
     # Text statistics
@@ -126,16 +190,110 @@ def build_maestro(data: dict) -> pd.DataFrame:
     return df
 
 
+# Maestro columns kept by the lean build besides config["features"]
+LEAN_MAESTRO_COLUMNS = ("order_id", "review_score", "order_purchase_timestamp", "order_delivered_customer_date")
+
+
+def _build_maestro_lean(data: dict, geo_index: GeoIndex) -> pd.DataFrame:
+    """Memory-lean build_maestro with the same rows, in the same order, and the same feature values.
+
+    - every table is projected to the columns it contributes before merging;
+    - join keys become shared int32 codes instead of strings;
+    - text and date features are computed on the reviews/orders tables, so the
+      review text and three of the date columns never enter the merge chain;
+    - numerics are float32 (int32 for day counts and text counts).
+    """
+    reviews, orders, items = data["reviews"], data["orders"], data["order_items"]
+    payments, customers, sellers, products = (
+        data["payments"], data["customers"], data["sellers"], data["products"]
+    )
+
+    order_codes = _shared_codes(reviews["order_id"], orders["order_id"], items["order_id"], payments["order_id"])
+    customer_codes = _shared_codes(orders["customer_id"], customers["customer_id"])
+    seller_codes = _shared_codes(items["seller_id"], sellers["seller_id"])
+    product_codes = _shared_codes(items["product_id"], products["product_id"])
+
+    text = text_stats_batch(
+        reviews["review_comment_title"].fillna("") + " " + reviews["review_comment_message"].fillna("")
+    )
+    df = pd.DataFrame({
+        "order": order_codes[0],
+        "order_id": reviews["order_id"].to_numpy(),
+        "review_score": reviews["review_score"].to_numpy(),
+        **{name: values.astype(np.float32 if name == "avg_word_length" else np.int32)
+           for name, values in text.items()},
+    })
+    del text
+
+    sentinel = pd.Timestamp("1970-01-01")
+    purchase = pd.to_datetime(orders["order_purchase_timestamp"]).fillna(sentinel)
+    carrier = pd.to_datetime(orders["order_delivered_carrier_date"]).fillna(sentinel)
+    delivered = pd.to_datetime(orders["order_delivered_customer_date"]).fillna(sentinel)
+    estimated = pd.to_datetime(orders["order_estimated_delivery_date"]).fillna(sentinel)
+    order_frame = pd.DataFrame({
+        "order": order_codes[1],
+        "customer": customer_codes[0],
+        "order_purchase_timestamp": purchase.to_numpy(),
+        "order_delivered_customer_date": delivered.to_numpy(),
+        "delivery_delta_days": (delivered - estimated).dt.days.to_numpy(np.int32),
+        "seller_dispatch_days": (carrier - purchase).dt.days.to_numpy(np.int32),
+        "carrier_transit_days": (delivered - carrier).dt.days.to_numpy(np.int32),
+    })
+    del purchase, carrier, delivered, estimated
+    df = df.merge(order_frame, on="order", how="inner")
+    del order_frame
+
+    df = df.merge(pd.DataFrame({
+        "order": order_codes[2],
+        "seller": seller_codes[0],
+        "product": product_codes[0],
+        "price": items["price"].to_numpy(np.float32),
+        "freight_value": items["freight_value"].to_numpy(np.float32),
+    }), on="order", how="inner")
+
+    payments_agg = pd.DataFrame({
+        "order": order_codes[3],
+        "payment_installments": payments["payment_installments"].to_numpy(np.float32),
+        "payment_value": payments["payment_value"].to_numpy(np.float32),
+    }).groupby("order", sort=False).agg({"payment_installments": "max", "payment_value": "sum"})
+    df = df.merge(payments_agg, left_on="order", right_index=True, how="left")
+    del payments_agg
+
+    df = df.merge(pd.DataFrame({
+        "customer": customer_codes[1],
+        "customer_zip_code_prefix": customers["customer_zip_code_prefix"].to_numpy(np.float64),
+    }), on="customer", how="left")
+    df = df.merge(pd.DataFrame({
+        "seller": seller_codes[1],
+        "seller_zip_code_prefix": sellers["seller_zip_code_prefix"].to_numpy(np.float64),
+    }), on="seller", how="left")
+    df = df.merge(pd.DataFrame({
+        "product": product_codes[1],
+        **{col: products[col].to_numpy(np.float32)
+           for col in ("product_weight_g", "product_description_lenght", "product_photos_qty")},
+    }), on="product", how="left")
+
+    lat_c, lng_c = geo_index.lookup(df["customer_zip_code_prefix"])
+    lat_s, lng_s = geo_index.lookup(df["seller_zip_code_prefix"])
+    df["distance_seller_customer_km"] = distance_km(lat_c, lng_c, lat_s, lng_s).astype(np.float32)
+
+    columns = list(LEAN_MAESTRO_COLUMNS) + [f for f in load_config()["features"] if f not in LEAN_MAESTRO_COLUMNS]
+    return df[columns]
+
+
+def _shared_codes(*keys: pd.Series) -> list[np.ndarray]:
+    """Encode several key columns with one shared int32 code space, so they join on integers."""
+    codes, _ = pd.factorize(pd.concat([k.astype(object) for k in keys], ignore_index=True))
+    codes = codes.astype(np.int32)
+    bounds = np.cumsum([0] + [len(k) for k in keys])
+    return [codes[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
 def _calculate_text_stats(df: pd.DataFrame, column: str) -> pd.DataFrame:
-    """Calculate text statistics for a column."""
+    """Calculate text statistics for a column (vectorized, see text_features.py)."""
     df[column] = df[column].fillna("")
-    df["char_count"] = df[column].str.len()
-    df["word_count"] = df[column].apply(lambda x: len(x.split()))
-    df["exclamation_count"] = df[column].str.count("!")
-    df["question_count"] = df[column].str.count(r"\?")
-    df["avg_word_length"] = df[column].apply(
-        lambda x: sum(len(w) for w in x.split()) / len(x.split()) if x.split() else 0
-    )
+    for name, values in text_stats_batch(df[column]).items():
+        df[name] = values
     return df
 
 
@@ -153,30 +311,58 @@ def prepare_training_data(df: pd.DataFrame) -> pd.DataFrame:
     return df_train
 
 
-def extract_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Extract only the model features, filling NaN with median."""
+def feature_sketches(df: pd.DataFrame) -> FeatureSketches:
+    """KLL quantile sketches of the model features (see quantile_sketch.py).
+
+    Sketches of separate chunks or partitions can be merged instead of
+    concatenating the frames.
+    """
     config = load_config()
-    features = config["features"]
-    X = df[features].fillna(df[features].median())
+    k = config.get("quantile_sketch_k") or DEFAULT_K
+    return FeatureSketches(config["features"], k).update(df)
+
+
+def extract_features(df: pd.DataFrame, medians: dict | None = None) -> pd.DataFrame:
+    """Extract only the model features, filling NaN with median.
+
+    `medians` defaults to the sketched medians of `df` itself.
+    """
+    config = load_config()
+    features = list(config["features"])
+    if medians is None:
+        medians = feature_sketches(df).medians()
+    X = df[features].fillna(medians)
     return X
 
 
-def save_feature_medians(df: pd.DataFrame) -> None:
-    """Compute and persist feature medians from the training DataFrame.
+def save_feature_medians(sketches: FeatureSketches) -> None:
+    """Persist the feature medians and quantile sketches of the training data.
 
     Called once during training so the API can use the same imputation values.
-    Saves to package-model/olist_review_model/config/feature_medians.json.
+    Saves to package-model/olist_review_model/config/feature_medians.json and
+    the mergeable sketches (with deciles) to feature_quantiles.json.
     """
-    config = load_config()
-    features = config["features"]
-    medians = {feat: round(float(df[feat].median()), 4) for feat in features}
-    with open(MEDIANS_FILE, "w") as f:
+    medians = {feat: round(value, 4) for feat, value in sketches.medians().items()}
+    sketches.save(QUANTILES_FILE)
+
+    # Write then rename so readers never see a half-written file
+    tmp_file = f"{MEDIANS_FILE}.tmp"
+    with open(tmp_file, "w") as f:
         json.dump(medians, f, indent=2)
+    os.replace(tmp_file, MEDIANS_FILE)
+
 
+def load_feature_medians():
+    """Load persisted feature medians as a read-only mapping. Empty if not yet generated.
 
-def load_feature_medians() -> dict:
-    """Load persisted feature medians. Returns empty dict if not yet generated."""
-    if not os.path.exists(MEDIANS_FILE):
-        return {}
-    with open(MEDIANS_FILE) as f:
-        return json.load(f)
+    The file is parsed once and re-read only when it changes on disk.
+    """
+    return _medians_file.snapshot().data
+
+
+def load_feature_quantiles():
+    """Load the persisted feature sketches (and deciles) as a read-only mapping. Empty if not yet generated.
+
+    FeatureSketches.from_dict turns it back into mergeable sketches.
+    """
+    return _quantiles_file.snapshot().data
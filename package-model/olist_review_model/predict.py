@@ -3,24 +3,28 @@ Prediction module for the Olist negative review model.
 Loads the trained model and makes predictions.
 """
 
-import os
-
-import joblib
 import numpy as np
 import pandas as pd
 
-from olist_review_model import TRAINED_MODEL_DIR
+from olist_review_model.explain import explain
+from olist_review_model.flat_forest import FlatForest
 from olist_review_model.pipeline import load_config
 from olist_review_model.processing.validation import DataInputSchema, MultipleDataInputs
+from olist_review_model.registry import get_model, serving_model_files
+
+
+# numpy: validated inputs -> float32 array -> booster.inplace_predict (default)
+# pandas: validated inputs -> DataFrame -> predict_proba (legacy, kept for parity tests)
+# flat:   validated inputs -> float32 array -> numpy flat-forest evaluator (no xgboost import)
+INFERENCE_BACKENDS = ("numpy", "pandas", "flat")
 
 
 def load_model():
-    config = load_config()
-    model_path = os.path.join(TRAINED_MODEL_DIR, config["trained_model_file"])
-    return joblib.load(model_path)
+    """Return the shared model instance from the process-wide registry."""
+    return get_model().model
 
 
-def make_prediction(input_data: dict) -> dict:
+def make_prediction(input_data: dict, backend: str | None = None) -> dict:
     """
     Make a prediction for a single input.
 
@@ -28,17 +32,29 @@ def make_prediction(input_data: dict) -> dict:
     ----------
     input_data : dict
         Dictionary with the 16 feature values.
+    backend : str, optional
+        Inference backend, one of INFERENCE_BACKENDS. Defaults to config["inference_backend"].
 
     Returns
     -------
     dict with keys: is_negative (bool), probability (float), version (str)
     """
     validated = DataInputSchema(**input_data)
-    df = pd.DataFrame([validated.model_dump()])
-    return _predict(df)
+    backend = _resolve_backend(backend)
+    if backend == "pandas":
+        df = pd.DataFrame([validated.model_dump()])
+        return _predict(df)
 
+    handle = _backend_model(backend)
+    proba = _predict_array(handle, _to_array([validated]))[0]
+    return {
+        "is_negative": bool(proba >= 0.5),
+        "probability": float(np.round(proba, 4)),
+        "version": handle.version,
+    }
 
-def make_multiple_predictions(inputs: list[dict]) -> dict:
+
+def make_multiple_predictions(inputs: list[dict], backend: str | None = None) -> dict:
     """
     Make predictions for multiple inputs.
 
@@ -46,23 +62,102 @@ def make_multiple_predictions(inputs: list[dict]) -> dict:
     ----------
     inputs : list of dict
         List of dictionaries, each with the 16 feature values.
+    backend : str, optional
+        Inference backend, one of INFERENCE_BACKENDS. Defaults to config["inference_backend"].
 
     Returns
     -------
     dict with keys: predictions (list), version (str)
     """
-    validated = MultipleDataInputs(inputs=[DataInputSchema(**inp) for inp in inputs])
-    df = validated.to_dataframe()
-    return _predict_multiple(df)
+    validated = [DataInputSchema(**inp) for inp in inputs]
+    backend = _resolve_backend(backend)
+    if backend == "pandas":
+        df = MultipleDataInputs(inputs=validated).to_dataframe()
+        return _predict_multiple(df)
+
+    handle = _backend_model(backend)
+    probas = _predict_array(handle, _to_array(validated))
+    return {
+        "predictions": [
+            {
+                "is_negative": bool(prob >= 0.5),
+                "probability": float(np.round(prob, 4)),
+            }
+            for prob in probas
+        ],
+        "version": handle.version,
+    }
+
+
+def predict_array(X: np.ndarray, backend: str | None = None) -> np.ndarray:
+    """
+    Positive-class probabilities for an already built feature array.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        Array of shape (n_rows, 16) with columns in config["features"] order.
+    backend : str, optional
+        Inference backend, one of INFERENCE_BACKENDS. Defaults to config["inference_backend"].
+
+    Returns
+    -------
+    np.ndarray of float32 probabilities, one per row
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    backend = _resolve_backend(backend)
+    if backend == "pandas":
+        df = pd.DataFrame(X, columns=list(load_config()["features"]))
+        return get_model().model.predict_proba(df)[:, 1].astype(np.float32)
+    return _predict_array(_backend_model(backend), X)
+
+
+def _resolve_backend(backend: str | None) -> str:
+    backend = backend or load_config()["inference_backend"]
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend '{backend}'. Expected one of: {', '.join(INFERENCE_BACKENDS)}"
+        )
+    return backend
+
+
+def _backend_model(backend: str):
+    """Registry handle of the model artifact used by an array backend."""
+    if backend == "flat":
+        return get_model(serving_model_files()[1])
+    return get_model()
+
+
+def _to_array(rows: list[DataInputSchema]) -> np.ndarray:
+    """Write validated inputs into a preallocated float32 array, in config["features"] order."""
+    features = load_config()["features"]
+    X = np.empty((len(rows), len(features)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        X[i] = [getattr(row, feat) for feat in features]
+    return X
+
+
+def _predict_array(handle, X: np.ndarray) -> np.ndarray:
+    """Positive-class probabilities for a float32 feature array, without building a DMatrix."""
+    return _predict_model_array(handle.model, X)
+
+
+def _predict_model_array(model, X: np.ndarray) -> np.ndarray:
+    if isinstance(model, FlatForest):
+        return model.predict(X)
+    try:
+        iteration_range = (0, model.best_iteration + 1)
+    except AttributeError:
+        iteration_range = (0, 0)
+    return model.get_booster().inplace_predict(X, iteration_range=iteration_range, validate_features=False)
 
 
 def _predict(df: pd.DataFrame) -> dict:
     """Internal: predict a single row."""
-    from olist_review_model import __version__
-
-    model = load_model()
+    handle = get_model()
+    model = handle.model
     config = load_config()
-    features = config["features"]
+    features = list(config["features"])
 
     proba = model.predict_proba(df[features])[:, 1][0]
     prediction = int(proba >= 0.5)
@@ -70,58 +165,117 @@ def _predict(df: pd.DataFrame) -> dict:
     return {
         "is_negative": bool(prediction),
         "probability": float(np.round(proba, 4)),
-        "version": __version__,
+        "version": handle.version,
     }
 
 
-def make_prediction_with_shap(input_data: dict) -> dict:
+def make_prediction_with_shap(input_data: dict, engine: str | None = None) -> dict:
     """
     Make a prediction with SHAP feature contributions for a single input.
 
+    Parameters
+    ----------
+    input_data : dict
+        Dictionary with the 16 feature values.
+    engine : str, optional
+        Explanation engine, "shap" or "native". Defaults to config["explanation_engine"].
+
     Returns
     -------
     dict with keys:
         is_negative (bool), probability (float), version (str),
         shap_contributions (list of {feature, shap_value}), sorted by |shap_value| desc
     """
-    import shap
-    from olist_review_model import __version__
-
     validated = DataInputSchema(**input_data)
     df = pd.DataFrame([validated.model_dump()])
 
-    model = load_model()
+    handle = get_model()
+    model = handle.model
     config = load_config()
-    features = config["features"]
+    features = list(config["features"])
 
     X = df[features]
     proba = round(float(model.predict_proba(X)[:, 1][0]), 4)
     prediction = int(proba >= 0.5)
 
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X)
-
-    contributions = [
-        {"feature": feat, "shap_value": round(float(val), 4)}
-        for feat, val in zip(features, shap_values[0])
-    ]
-    contributions.sort(key=lambda x: abs(x["shap_value"]), reverse=True)
+    shap_values = explain(handle, X, engine or config["explanation_engine"])
 
     return {
         "is_negative": bool(prediction),
         "probability": proba,
-        "version": __version__,
-        "shap_contributions": contributions,
+        "version": handle.version,
+        "shap_contributions": _contributions(features, shap_values[0]),
     }
 
 
+def make_multiple_predictions_with_shap(
+    inputs: list[dict] | pd.DataFrame, engine: str | None = None
+) -> dict:
+    """
+    Make predictions with SHAP feature contributions for many inputs at once.
+
+    The whole batch is scored with one predict_proba call and explained with
+    one explanation call.
+
+    Parameters
+    ----------
+    inputs : list of dict or pd.DataFrame
+        Dictionaries with the 16 feature values, or an already built feature
+        frame holding (at least) the 16 feature columns.
+    engine : str, optional
+        Explanation engine, "shap" or "native". Defaults to config["explanation_engine"].
+
+    Returns
+    -------
+    dict with keys:
+        predictions (list of {is_negative, probability, shap_contributions}), version (str)
+    """
+    if isinstance(inputs, pd.DataFrame):
+        df = inputs
+    else:
+        df = MultipleDataInputs(inputs=[DataInputSchema(**inp) for inp in inputs]).to_dataframe()
+
+    handle = get_model()
+    model = handle.model
+    config = load_config()
+    features = list(config["features"])
+
+    X = df[features].astype(float)
+    if X.empty:
+        return {"predictions": [], "version": handle.version}
+
+    probas = model.predict_proba(X)[:, 1]
+    shap_values = explain(handle, X, engine or config["explanation_engine"])
+
+    return {
+        "predictions": [
+            {
+                "is_negative": bool(round(float(prob), 4) >= 0.5),
+                "probability": round(float(prob), 4),
+                "shap_contributions": _contributions(features, row),
+            }
+            for prob, row in zip(probas, shap_values)
+        ],
+        "version": handle.version,
+    }
+
+
+def _contributions(features: list[str], values: np.ndarray) -> list[dict]:
+    """Pair feature names with contributions, sorted by |shap_value| desc."""
+    contributions = [
+        {"feature": feat, "shap_value": round(float(val), 4)}
+        for feat, val in zip(features, values)
+    ]
+    contributions.sort(key=lambda x: abs(x["shap_value"]), reverse=True)
+    return contributions
+
+
 def _predict_multiple(df: pd.DataFrame) -> dict:
     """Internal: predict multiple rows."""
-    from olist_review_model import __version__
-
-    model = load_model()
+    handle = get_model()
+    model = handle.model
     config = load_config()
-    features = config["features"]
+    features = list(config["features"])
 
     probas = model.predict_proba(df[features])[:, 1]
     predictions = (probas >= 0.5).astype(int)
@@ -134,5 +288,5 @@ def _predict_multiple(df: pd.DataFrame) -> dict:
             }
             for pred, prob in zip(predictions, probas)
         ],
-        "version": __version__,
+        "version": handle.version,
     }
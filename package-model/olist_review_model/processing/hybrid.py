@@ -0,0 +1,220 @@
+"""
+Order inputs of the /analyze/hybrid endpoints and their featurization.
+
+HybridInput is the raw order (dates, financials, location, item, review
+text); `build_features` maps one of them to the 16 model features and
+`build_feature_frame` does the same column-wise for a batch. The API and
+the file scoring CLI (score.py) share both, so a record scores the same
+through either.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class DeliverySchema(BaseModel):
+    purchase_date: str
+    promised_date: str
+    dispatched_date: Optional[str] = None
+    delivered_date: Optional[str] = None
+
+
+class FinancialsSchema(BaseModel):
+    order_total: Optional[float] = None
+    shipping_cost: Optional[float] = None
+    payment_installments: Optional[int] = None
+    currency: str = "BRL"
+
+    @model_validator(mode="after")
+    def both_or_neither(self) -> "FinancialsSchema":
+        has_total = self.order_total is not None
+        has_shipping = self.shipping_cost is not None
+        if has_total != has_shipping:
+            raise ValueError("order_total and shipping_cost must both be present or both absent")
+        return self
+
+
+class LocationSchema(BaseModel):
+    distance_km: Optional[float] = None
+    # Used to compute the distance when distance_km is not given
+    customer_zip_prefix: Optional[int] = Field(None, ge=0, le=99999)
+    seller_zip_prefix: Optional[int] = Field(None, ge=0, le=99999)
+
+
+class ItemSchema(BaseModel):
+    category: Optional[str] = None
+    weight_g: Optional[float] = None
+    description_length: Optional[int] = None
+    media_count: Optional[int] = None
+
+
+class ReviewSchema(BaseModel):
+    text: str
+
+
+class HybridInput(BaseModel):
+    delivery: DeliverySchema
+    financials: Optional[FinancialsSchema] = None
+    location: Optional[LocationSchema] = None
+    item: Optional[ItemSchema] = None
+    review: ReviewSchema
+
+
+def input_distances(inputs: list[HybridInput]) -> np.ndarray:
+    """distance_km of each input, else the distance between its zip prefixes; NaN when neither is known.
+
+    Zip prefixes are resolved with one vectorized lookup in the packaged geo index.
+    """
+    from olist_review_model.geo_index import get_geo_index
+
+    locations = [d.location for d in inputs]
+    given = np.array([loc.distance_km if loc else None for loc in locations], dtype=float)
+    missing = np.isnan(given)
+    if not missing.any():
+        return given
+
+    index = get_geo_index()
+    if index is None:
+        return given
+    customer = [loc.customer_zip_prefix if loc else None for loc in locations]
+    seller = [loc.seller_zip_prefix if loc else None for loc in locations]
+    return np.where(missing, index.distance_km(customer, seller), given)
+
+
+def input_distance(data: HybridInput) -> float | None:
+    """Single-input `input_distances`, using the scalar distance; None when unknown."""
+    from olist_review_model.distance import distance_km_scalar
+    from olist_review_model.geo_index import get_geo_index
+
+    loc = data.location
+    if loc is None:
+        return None
+    if loc.distance_km is not None:
+        return loc.distance_km
+    if loc.customer_zip_prefix is None or loc.seller_zip_prefix is None:
+        return None
+
+    index = get_geo_index()
+    if index is None:
+        return None
+    lat, lng = index.lookup([loc.customer_zip_prefix, loc.seller_zip_prefix])
+    if np.isnan(lat).any():
+        return None
+    return distance_km_scalar(float(lat[0]), float(lng[0]), float(lat[1]), float(lng[1]))
+
+
+def build_features(data: HybridInput) -> dict:
+    """Map HybridInput fields to the 16 model feature values.
+
+    Optional fields fall back to training-time medians (loaded from
+    feature_medians.json) so imputation matches what the model was trained on.
+    """
+    from olist_review_model.pipeline import load_feature_medians
+    from olist_review_model.text_features import text_stats
+
+    m = load_feature_medians()
+
+    def median(key: str, fallback: float = 0.0) -> float:
+        return m.get(key, fallback)
+
+    purchase = datetime.fromisoformat(data.delivery.purchase_date)
+    promised = datetime.fromisoformat(data.delivery.promised_date)
+    dispatched = datetime.fromisoformat(data.delivery.dispatched_date) if data.delivery.dispatched_date else purchase
+    delivered = datetime.fromisoformat(data.delivery.delivered_date) if data.delivery.delivered_date else promised
+
+    distance = input_distance(data)
+
+    delivery_delta_days = (delivered - promised).days
+    seller_dispatch_days = (dispatched - purchase).days
+    carrier_transit_days = (delivered - dispatched).days
+
+    return {
+        "delivery_delta_days": delivery_delta_days,
+        "seller_dispatch_days": seller_dispatch_days,
+        "carrier_transit_days": carrier_transit_days,
+        "distance_seller_customer_km": distance if distance is not None else median("distance_seller_customer_km"),
+        "price": max(data.financials.order_total - data.financials.shipping_cost, 0.0) if data.financials else median("price"),
+        "freight_value": data.financials.shipping_cost if data.financials else median("freight_value"),
+        "payment_value": data.financials.order_total if data.financials else median("payment_value"),
+        "payment_installments": data.financials.payment_installments if data.financials and data.financials.payment_installments else median("payment_installments", 1.0),
+        "product_weight_g": data.item.weight_g if data.item and data.item.weight_g is not None else median("product_weight_g"),
+        "product_description_lenght": data.item.description_length if data.item and data.item.description_length is not None else median("product_description_lenght"),
+        "product_photos_qty": data.item.media_count if data.item and data.item.media_count is not None else median("product_photos_qty"),
+        **text_stats(data.review.text),
+    }
+
+
+def build_feature_frame(inputs: list[HybridInput]) -> tuple["pd.DataFrame", list[int]]:
+    """Vectorized `build_features` for a batch of inputs.
+
+    Builds every feature column in one pass over the batch. Returns the
+    feature frame (one row per input whose dates parse) and the positions of
+    inputs rejected because a date could not be parsed.
+    """
+    import pandas as pd
+    from olist_review_model.pipeline import load_feature_medians
+    from olist_review_model.text_features import text_stats_batch
+
+    m = load_feature_medians()
+
+    def column(values: list, median_key: str, fallback: float = 0.0) -> pd.Series:
+        return pd.Series(values, dtype=float).fillna(m.get(median_key, fallback))
+
+    def dates(values: list) -> pd.Series:
+        # Items may use different UTC offsets, or none: parse all of them as UTC instants.
+        # Day differences within an item match build_features (aware datetimes subtract in UTC).
+        values = [value or None for value in values]  # "" is a missing optional date, as in build_features
+        return pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce", utc=True)
+
+    delivery = [d.delivery for d in inputs]
+    purchase = dates([d.purchase_date for d in delivery])
+    promised = dates([d.promised_date for d in delivery])
+    dispatched_raw = dates([d.dispatched_date for d in delivery])
+    delivered_raw = dates([d.delivered_date for d in delivery])
+    dispatched = dispatched_raw.fillna(purchase)
+    delivered = delivered_raw.fillna(promised)
+
+    # Optional dates that were given but do not parse are rejected too
+    has_dispatched = pd.Series([bool(d.dispatched_date) for d in delivery])
+    has_delivered = pd.Series([bool(d.delivered_date) for d in delivery])
+    invalid = (
+        purchase.isna()
+        | promised.isna()
+        | (dispatched_raw.isna() & has_dispatched)
+        | (delivered_raw.isna() & has_delivered)
+    )
+
+    fin = [d.financials for d in inputs]
+    order_total = pd.Series([f.order_total if f else None for f in fin], dtype=float)
+    shipping_cost = pd.Series([f.shipping_cost if f else None for f in fin], dtype=float)
+    installments = [f.payment_installments if f and f.payment_installments else None for f in fin]
+    distance = input_distances(inputs)
+    items = [d.item for d in inputs]
+
+    text = text_stats_batch([d.review.text for d in inputs])
+
+    frame = pd.DataFrame({
+        "delivery_delta_days": (delivered - promised).dt.days,
+        "seller_dispatch_days": (dispatched - purchase).dt.days,
+        "carrier_transit_days": (delivered - dispatched).dt.days,
+        "distance_seller_customer_km": column(distance, "distance_seller_customer_km"),
+        "price": (order_total - shipping_cost).clip(lower=0.0).fillna(m.get("price", 0.0)),
+        "freight_value": shipping_cost.fillna(m.get("freight_value", 0.0)),
+        "payment_value": order_total.fillna(m.get("payment_value", 0.0)),
+        "payment_installments": column(installments, "payment_installments", 1.0),
+        "product_weight_g": column([i.weight_g if i else None for i in items], "product_weight_g"),
+        "product_description_lenght": column(
+            [i.description_length if i else None for i in items], "product_description_lenght"
+        ),
+        "product_photos_qty": column([i.media_count if i else None for i in items], "product_photos_qty"),
+        **text,
+    })
+
+    rejected = np.flatnonzero(invalid.to_numpy()).tolist()
+    return frame[~invalid.to_numpy()].astype(float), rejected
@@ -0,0 +1,184 @@
+"""
+Mergeable quantile sketches (KLL) for feature medians and deciles.
+
+A `KLLSketch` summarizes a stream of numbers in O(k log(n/k)) memory. It
+keeps a stack of compactors: level h holds items of weight 2**h, and a full
+level is sorted and every other one of its smallest items (random offset)
+promoted to the next level. The rank error shrinks like 1/k: around 1% of n
+for the default k=200, whatever n is. While nothing has been compacted
+(n <= k) quantiles are exact and interpolated like numpy/pandas.
+
+Sketches of disjoint chunks merge into a sketch of their union, so feature
+statistics can be built chunk by chunk, in worker processes, or per maestro
+partition, and combined. `FeatureSketches` holds one sketch per model
+feature and serializes to JSON (feature_quantiles.json next to
+feature_medians.json).
+"""
+
+import json
+import os
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 200
+DECILES = tuple(round(q / 10, 1) for q in range(1, 10))
+
+_CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    """KLL quantile sketch of float values; NaN is ignored.
+
+    Args:
+        k: Accuracy parameter, the capacity of the top level.
+        seed: Seed of the compaction offsets, so builds are reproducible.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0) -> None:
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values) -> "KLLSketch":
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold `other` (a sketch of other values, same k) into this sketch."""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Values at the quantiles `qs` (in [0, 1]); NaN for an empty sketch."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], qs)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        pos = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = items[np.minimum(pos, len(items) - 1)]
+        result = np.where(qs <= 0, self.min, result)
+        return np.where(qs >= 1, self.max, result)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    @property
+    def size(self) -> int:
+        """Number of retained items."""
+        return sum(len(level) for level in self.levels)
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k, "n": self.n,
+            "min": None if self.n == 0 else self.min, "max": None if self.n == 0 else self.max,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "KLLSketch":
+        sketch = cls(k=data["k"])
+        sketch.n = data["n"]
+        if sketch.n:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data["levels"]] or [np.empty(0)]
+        return sketch
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                # Compact an even number of the smallest items, keeping half the capacity, so a
+                # large batch cascading down the levels still leaves every level populated
+                level = np.sort(level)
+                compacted = (len(level) - self._capacity(h) // 2) // 2 * 2
+                promoted = level[int(self._rng.integers(2)):compacted:2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = level[compacted:]
+            h += 1
+
+
+class FeatureSketches:
+    """One KLLSketch per feature, updated from DataFrame chunks."""
+
+    def __init__(self, features: Iterable[str], k: int = DEFAULT_K) -> None:
+        self.sketches = {feature: KLLSketch(k) for feature in features}
+
+    def update(self, df: pd.DataFrame) -> "FeatureSketches":
+        for feature, sketch in self.sketches.items():
+            sketch.update(df[feature].to_numpy(dtype=np.float64, na_value=np.nan))
+        return self
+
+    def merge(self, other: "FeatureSketches") -> "FeatureSketches":
+        for feature, sketch in self.sketches.items():
+            sketch.merge(other.sketches[feature])
+        return self
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame], features: Iterable[str],
+                    k: int = DEFAULT_K) -> "FeatureSketches":
+        """Sketches of the concatenation of `frames`, one pass, one frame at a time."""
+        sketches = cls(features, k)
+        for frame in frames:
+            sketches.update(frame)
+        return sketches
+
+    def medians(self) -> dict[str, float]:
+        return {feature: sketch.quantile(0.5) for feature, sketch in self.sketches.items()}
+
+    def quantiles(self, qs=DECILES) -> dict[str, list[float]]:
+        return {feature: sketch.quantiles(qs).tolist() for feature, sketch in self.sketches.items()}
+
+    def to_dict(self) -> dict:
+        return {
+            "deciles": self.quantiles(DECILES),
+            "sketches": {feature: sketch.to_dict() for feature, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "FeatureSketches":
+        sketches = cls([])
+        sketches.sketches = {feature: KLLSketch.from_dict(sketch) for feature, sketch in data["sketches"].items()}
+        return sketches
+
+    def save(self, path: str) -> None:
+        # Write then rename so readers never see a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,157 @@
+"""
+Columnar cache of the raw Olist CSVs.
+
+Each source CSV is converted once into an uncompressed Feather (Arrow IPC)
+file named after the CSV's content hash. Later loads memory-map that file
+and materialize only the requested columns, so no CSV parsing happens on a
+warm run. A changed CSV (e.g. after `dvc pull`) hashes differently and is
+converted again; the stale copy is removed.
+
+Content hashes are remembered per (size, mtime) in `manifest.json` inside
+the cache directory so warm loads do not re-read the CSVs to hash them.
+The read options (usecols, dtypes, date formats) are part of the cache key,
+so the Feather copy keeps the typed columns. Requires pyarrow.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import Mapping, Sequence
+
+import pandas as pd
+
+HASH_BLOCK_SIZE = 1 << 20
+MANIFEST_FILE = "manifest.json"
+
+
+def file_digest(path: str) -> str:
+    """blake2b hex digest of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_typed_csv(source: str, date_formats: Mapping[str, str] | None = None, **read_csv_kwargs) -> pd.DataFrame:
+    """pd.read_csv, then parse `date_formats` columns with their explicit format (bad values become NaT)."""
+    df = pd.read_csv(source, **read_csv_kwargs)
+    for column, fmt in (date_formats or {}).items():
+        df[column] = pd.to_datetime(df[column], format=fmt, errors="coerce")
+    return df
+
+
+def _options_key(options: dict) -> str:
+    if not options:
+        return ""
+    encoded = json.dumps(options, sort_keys=True, default=list).encode()
+    return "-" + hashlib.blake2b(encoded, digest_size=4).hexdigest()
+
+
+class RawDataCache:
+    """Feather copies of source CSVs, keyed by the CSV content hash.
+
+    Args:
+        cache_dir: Directory holding the Feather files and the hash manifest.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._manifest: dict[str, dict] | None = None
+
+    def read_csv(self, source: str, columns: Sequence[str] | None = None,
+                 date_formats: Mapping[str, str] | None = None, **read_csv_kwargs) -> pd.DataFrame:
+        """Load `source` through the cache, materializing only `columns` (all when None).
+
+        `date_formats` and `read_csv_kwargs` (see read_typed_csv) shape the
+        Feather copy and are part of its cache key.
+        """
+        import pyarrow.feather as feather
+
+        options = dict(read_csv_kwargs, date_formats=date_formats) if date_formats else read_csv_kwargs
+        path = self.cached_path(source, options)
+        if not os.path.exists(path):
+            self._convert(source, path, options, date_formats, read_csv_kwargs)
+        table = feather.read_table(path, columns=list(columns) if columns is not None else None, memory_map=True)
+        return table.to_pandas()
+
+    def cached_path(self, source: str, options: dict | None = None) -> str:
+        """Path of the Feather copy of the current contents of `source` read with `options`."""
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{self.digest(source)}{_options_key(options or {})}.feather")
+
+    def digest(self, source: str) -> str:
+        """Content hash of `source`, recomputed only when its size or mtime changed."""
+        key = os.path.abspath(source)
+        stat = os.stat(source)
+        with self._lock:
+            entry = self._load_manifest().get(key)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["digest"]
+
+        digest = file_digest(source)
+        with self._lock:
+            manifest = self._load_manifest()
+            manifest[key] = {**manifest.get(key, {}), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                             "digest": digest}
+            self._write_json(os.path.join(self.cache_dir, MANIFEST_FILE), manifest)
+        return digest
+
+    def clear(self) -> None:
+        """Delete every cached Feather file and the manifest."""
+        with self._lock:
+            for path in glob.glob(os.path.join(self.cache_dir, "*.feather")):
+                os.remove(path)
+            manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            self._manifest = None
+
+    def _convert(self, source: str, path: str, options: dict, date_formats: Mapping[str, str] | None,
+                 read_csv_kwargs: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        df = read_typed_csv(source, date_formats, **read_csv_kwargs)
+
+        # Uncompressed so the file can be memory-mapped; write then rename so
+        # concurrent readers never see a half-written copy.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+        self._replace_copy(source, _options_key(options), path)
+
+    def _replace_copy(self, source: str, options_key: str, path: str) -> None:
+        """Record `path` as the copy of `source` read with `options_key`, deleting the copy it replaces.
+
+        Only the previous copy of the same source and read options goes: the
+        typed and untyped copies of a CSV, or same-named CSVs of other data
+        dirs sharing the cache, are left alone.
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            entry = manifest.setdefault(os.path.abspath(source), {})
+            copies = entry.setdefault("copies", {})
+            stale, copies[options_key] = copies.get(options_key), os.path.basename(path)
+            in_use = {name for other in manifest.values() for name in other.get("copies", {}).values()}
+            if stale and stale not in in_use and os.path.exists(os.path.join(self.cache_dir, stale)):
+                os.remove(os.path.join(self.cache_dir, stale))
+            self._write_json(os.path.join(self.cache_dir, MANIFEST_FILE), manifest)
+
+    def _load_manifest(self) -> dict[str, dict]:
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.cache_dir, MANIFEST_FILE)) as f:
+                    self._manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifest = {}
+        return self._manifest
+
+    def _write_json(self, path: str, data: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
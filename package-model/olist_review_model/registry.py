@@ -0,0 +1,139 @@
+"""
+Process-wide model registry.
+Loads each trained model file once per process and hands out a shared,
+read-only handle to every prediction entry point.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import joblib
+
+from olist_review_model import TRAINED_MODEL_DIR
+from olist_review_model.model_benchmark import load_metadata
+from olist_review_model.pipeline import load_config
+from olist_review_model.raw_cache import file_digest
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """Immutable handle to a loaded model and its load metadata."""
+
+    name: str
+    version: str
+    path: str
+    model: object = field(repr=False)
+    load_seconds: float
+    size_bytes: int
+    metadata: dict = field(default_factory=dict, repr=False)  # <model>.metadata.json written by training
+    digest: str = ""  # content digest of the model file; changes whenever the model is retrained
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "path": self.path,
+            "load_seconds": round(self.load_seconds, 4),
+            "size_bytes": self.size_bytes,
+            "metrics": self.metadata.get("metrics"),
+            "benchmark": self.metadata.get("benchmark"),
+        }
+
+
+SERVING_MODELS = ("full", "compact")
+
+
+def serving_model_files(config=None) -> tuple[str, str]:
+    """(model file, flat model file) served by default: the trained model or its compaction (serving_model)."""
+    config = config or load_config()
+    serving = config.get("serving_model", "full")
+    if serving not in SERVING_MODELS:
+        raise ValueError(f"Unknown serving model '{serving}'. Expected one of: {', '.join(SERVING_MODELS)}")
+    if serving == "compact":
+        return config["compact_model_file"], config["compact_flat_model_file"]
+    return config["trained_model_file"], config["flat_model_file"]
+
+
+def _model_size(model: object, path: str) -> int:
+    """Array size of a flat forest, or serialized size of the booster (a close proxy for its footprint)."""
+    if hasattr(model, "nbytes"):
+        return model.nbytes
+    get_booster = getattr(model, "get_booster", None)
+    if get_booster is not None:
+        return len(get_booster().save_raw(raw_format="ubj"))
+    return os.path.getsize(path)
+
+
+class ModelRegistry:
+    """Thread-safe cache of loaded models keyed by model file name.
+
+    `.npz` files are flat-array forests (see flat_forest.py); anything else is
+    a joblib-serialized XGBoost model.
+    """
+
+    def __init__(self, model_dir: str = TRAINED_MODEL_DIR):
+        self.model_dir = model_dir
+        self._handles: dict[str, ModelHandle] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_file: str | None = None) -> ModelHandle:
+        """Return the handle for `model_file` (default: the serving model), loading it on first use."""
+        if model_file is None:
+            model_file = serving_model_files()[0]
+
+        handle = self._handles.get(model_file)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            handle = self._handles.get(model_file)
+            if handle is None:
+                handle = self._load(model_file)
+                self._handles[model_file] = handle
+        return handle
+
+    def loaded(self) -> list[ModelHandle]:
+        """Handles of every model loaded so far."""
+        return list(self._handles.values())
+
+    def evict(self, model_file: str | None = None) -> None:
+        """Drop one model (or all of them) so the next `get` reloads from disk."""
+        with self._lock:
+            if model_file is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(model_file, None)
+
+    def _load(self, model_file: str) -> ModelHandle:
+        from olist_review_model import __version__
+
+        path = os.path.join(self.model_dir, model_file)
+        start = time.perf_counter()
+        if model_file.endswith(".npz"):
+            from olist_review_model.flat_forest import load_flat_forest
+
+            model = load_flat_forest(path)
+        else:
+            model = joblib.load(path)
+        load_seconds = time.perf_counter() - start
+
+        return ModelHandle(
+            name=model_file,
+            version=__version__,
+            path=path,
+            model=model,
+            load_seconds=load_seconds,
+            size_bytes=_model_size(model, path),
+            metadata=load_metadata(path),
+            digest=file_digest(path),
+        )
+
+
+model_registry = ModelRegistry()
+
+
+def get_model(model_file: str | None = None) -> ModelHandle:
+    """Return the shared handle for a model from the process-wide registry."""
+    return model_registry.get(model_file)
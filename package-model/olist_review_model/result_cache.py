@@ -0,0 +1,197 @@
+"""
+Cache of prediction and explanation results keyed by the canonical feature vector.
+
+Many requests resolve to the same 16 feature values (optional fields fall back
+to the same medians, short reviews share text stats), so their results can be
+reused. Keys combine the model identity with the float32 feature vector the
+model actually sees.
+
+Backends:
+- LRUCache:    in-process, least-recently-used eviction with optional TTL.
+- SQLiteCache: a local SQLite file shared by several worker processes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+RESULT_CACHE_BACKENDS = ("memory", "sqlite")
+
+
+def feature_keys(prefix: str, X: np.ndarray) -> list[str]:
+    """Canonical cache keys for each row of a feature matrix.
+
+    Values are cast to float32 (what the booster sees), -0.0 is folded into
+    0.0 and every NaN into one bit pattern, so equal inputs always share a key.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    X = X + np.float32(0.0)  # -0.0 + 0.0 == +0.0
+    X[np.isnan(X)] = np.nan
+    return [f"{prefix}:{hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()}" for row in X]
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional time-to-live.
+
+    Args:
+        max_size: Entries kept before the least recently used one is evicted.
+        ttl_seconds: Entry lifetime; None keeps entries until evicted.
+        clock: Time source, injectable for tests.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float | None = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters.misses += 1
+                return None
+            created, value = entry
+            if self.ttl_seconds is not None and self.clock() - created > self.ttl_seconds:
+                del self._entries[key]
+                self._counters.expirations += 1
+                self._counters.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "size": len(self), "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds, **self._counters.as_dict()}
+
+
+class SQLiteCache:
+    """LRU cache stored in a SQLite file so several worker processes share entries.
+
+    Values must be JSON serializable. Hit/miss counters are per process.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_size: int = 10_000, ttl_seconds: float | None = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def get(self, key: str) -> Any | None:
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._counters.misses += 1
+                return None
+            value, created = row
+            if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._counters.expirations += 1
+                self._counters.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._counters.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = self.clock()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            excess = len(self) - self.max_size
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN"
+                    " (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+                self._counters.evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "size": len(self), "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds, "path": self.path, **self._counters.as_dict()}
+
+
+def make_result_cache(backend: str = "memory", max_size: int = 10_000,
+                      ttl_seconds: float | None = None, path: str | None = None):
+    """Build a result cache for one of RESULT_CACHE_BACKENDS."""
+    if backend == "memory":
+        return LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite result cache needs a path")
+        return SQLiteCache(path, max_size=max_size, ttl_seconds=ttl_seconds)
+    raise ValueError(
+        f"Unknown result cache backend '{backend}'. Expected one of: {', '.join(RESULT_CACHE_BACKENDS)}"
+    )
@@ -0,0 +1,198 @@
+"""
+Score a JSONL or CSV file of order records in bounded-memory chunks.
+
+Records are either the 16 model features (`--records features`, see
+DataInputSchema), or raw orders (`--records hybrid`): one HybridInput JSON
+object per line, the same NDJSON body /analyze/hybrid/stream accepts, with
+blank lines skipped. The file is read `chunk_size` rows at a time. Every
+chunk is featurized column-wise (processing.hybrid.build_feature_frame, as
+the API does) into one float32 array and scored with a single inference
+call, so memory stays proportional to the chunk size whatever the size of
+the file.
+
+Results are written as JSON lines, one per input row and in input order:
+    {"row": 0, "is_negative": false, "probability": 0.1234}
+    {"row": 1, "error": "missing or non-numeric features: price"}
+
+Usage:
+    python -m olist_review_model.score orders.jsonl -o scores.jsonl
+    python -m olist_review_model.score orders.csv --chunk-size 50000 --explain
+    python -m olist_review_model.score orders.ndjson --records hybrid
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import IO, Iterator
+
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from olist_review_model.pipeline import load_config
+from olist_review_model.predict import (
+    INFERENCE_BACKENDS,
+    make_multiple_predictions_with_shap,
+    predict_array,
+)
+from olist_review_model.processing.hybrid import HybridInput, build_feature_frame
+
+DEFAULT_CHUNK_SIZE = 10_000
+RECORD_TYPES = ("features", "hybrid")
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the records of a .csv or .jsonl/.ndjson file as DataFrames of at most `chunk_size` rows."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    elif ext in (".jsonl", ".ndjson", ".json"):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        raise ValueError(f"Unsupported input file '{path}'. Expected .csv or .jsonl")
+    with reader:
+        yield from reader
+
+
+def read_line_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[str]]:
+    """Yield the non-blank lines of an NDJSON file in lists of at most `chunk_size` lines."""
+    if os.path.splitext(path)[1].lower() not in (".jsonl", ".ndjson", ".json"):
+        raise ValueError(f"Unsupported input file '{path}'. HybridInput records must be .jsonl or .ndjson")
+    chunk: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _predictions(X: np.ndarray, backend: str | None, explain: bool) -> list[dict]:
+    """Predictions (with SHAP contributions when `explain`) for a float32 feature array."""
+    if explain:
+        frame = pd.DataFrame(X, columns=list(load_config()["features"]))
+        return make_multiple_predictions_with_shap(frame)["predictions"]
+    return [
+        {"is_negative": bool(round(float(prob), 4) >= 0.5), "probability": round(float(prob), 4)}
+        for prob in predict_array(X, backend)
+    ]
+
+
+def _validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc']) or 'record'}: {err['msg']}"
+                     for err in exc.errors(include_url=False))
+
+
+def score_hybrid_lines(lines: list[str], backend: str | None = None, explain: bool = False,
+                       offset: int = 0) -> list[dict]:
+    """
+    Score one chunk of HybridInput JSON lines, like /analyze/hybrid/stream.
+
+    Invalid lines and orders with unparseable dates get an error record; the
+    rest are featurized column-wise and scored together. Row numbers start at `offset`.
+    """
+    records: list[dict] = [{} for _ in lines]
+    valid: list[HybridInput] = []
+    positions: list[int] = []
+    for pos, line in enumerate(lines):
+        try:
+            valid.append(HybridInput.model_validate_json(line))
+            positions.append(pos)
+        except ValidationError as exc:
+            records[pos] = {"error": _validation_error(exc)}
+
+    if valid:
+        frame, rejected = build_feature_frame(valid)
+        for pos in rejected:
+            records[positions[pos]] = {"error": "delivery: invalid ISO 8601 date"}
+        rejected_set = set(rejected)
+        scored = [position for pos, position in enumerate(positions) if pos not in rejected_set]
+        if scored:
+            X = frame[list(load_config()["features"])].to_numpy(dtype=np.float32)
+            for pos, prediction in zip(scored, _predictions(X, backend, explain)):
+                records[pos] = prediction
+
+    return [{"row": offset + pos, **record} for pos, record in enumerate(records)]
+
+
+def score_frame(df: pd.DataFrame, backend: str | None = None, explain: bool = False,
+                offset: int = 0) -> list[dict]:
+    """
+    Score one chunk of feature records.
+
+    Rows with a missing or non-numeric feature get an error record instead of
+    a prediction; the rest are scored together. Row numbers start at `offset`.
+    """
+    features = list(load_config()["features"])
+    missing = [feat for feat in features if feat not in df.columns]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+
+    values = df[features].apply(pd.to_numeric, errors="coerce")
+    invalid = values.isna().to_numpy()
+    bad_rows = invalid.any(axis=1)
+    X = values.to_numpy(dtype=np.float32)[~bad_rows]
+
+    records: list[dict] = [{} for _ in range(len(df))]
+    for pos in np.flatnonzero(bad_rows):
+        bad = [feat for feat, flag in zip(features, invalid[pos]) if flag]
+        records[pos] = {"error": f"missing or non-numeric features: {', '.join(bad)}"}
+
+    good_rows = np.flatnonzero(~bad_rows)
+    if len(good_rows):
+        for pos, prediction in zip(good_rows, _predictions(X, backend, explain)):
+            records[pos] = prediction
+
+    return [{"row": offset + pos, **record} for pos, record in enumerate(records)]
+
+
+def score_file(path: str, output: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+               backend: str | None = None, explain: bool = False, records: str = "features") -> int:
+    """Score every record of `path` chunk by chunk, writing JSON lines to `output`. Returns the row count.
+
+    `records` is "features" (16 model features per record) or "hybrid" (HybridInput NDJSON).
+    """
+    if records not in RECORD_TYPES:
+        raise ValueError(f"Unknown record type '{records}'. Expected one of: {', '.join(RECORD_TYPES)}")
+    if records == "hybrid":
+        chunks, score = read_line_chunks(path, chunk_size), score_hybrid_lines
+    else:
+        chunks, score = read_chunks(path, chunk_size), score_frame
+    rows = 0
+    for chunk in chunks:
+        for record in score(chunk, backend=backend, explain=explain, offset=rows):
+            output.write(json.dumps(record) + "\n")
+        rows += len(chunk)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m olist_review_model.score",
+        description="Score a JSONL or CSV file of order records in bounded-memory chunks.",
+    )
+    parser.add_argument("input", help="Input .jsonl or .csv file of records (see --records)")
+    parser.add_argument("--records", choices=RECORD_TYPES, default="features",
+                        help="features: the 16 model features per record | hybrid: one HybridInput per line, "
+                             "as POST /analyze/hybrid/stream takes")
+    parser.add_argument("-o", "--output", help="Output .jsonl file (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per chunk")
+    parser.add_argument("--backend", choices=INFERENCE_BACKENDS, help="Inference backend (default: config)")
+    parser.add_argument("--explain", action="store_true", help="Include SHAP contributions")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            rows = score_file(args.input, output, args.chunk_size, args.backend, args.explain, args.records)
+        print(f"Scored {rows} rows into {args.output}", file=sys.stderr)
+    else:
+        score_file(args.input, sys.stdout, args.chunk_size, args.backend, args.explain, args.records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Hyperparameter search for the XGBoost model: successive halving / Hyperband.
+
+Random configurations are drawn from config["search"]["space"] and trained
+in rungs of growing boosting rounds. After each rung only the best 1/eta by
+validation AUC go on to a rung eta times longer, up to max_rounds, so most
+trials stop after a few dozen trees. Surviving boosters continue from the
+trees they already have instead of starting over. "hyperband" runs several
+such brackets, from many short trials to a few full-length ones.
+
+The training rows are split once more into fit/validation parts (the test
+split of run_training is never seen), saved as memory-mapped arrays (see
+experiments.SharedMatrix) and quantized into an XGBoost QuantileDMatrix once
+per worker process. Every trial that worker runs reuses it. Trials of a
+rung run in parallel worker processes within `cpu_budget` cores.
+
+The best configuration, with the rounds of its best rung as n_estimators,
+is written to config/profiles/<profile>.yml; set
+`config_profile: <profile>` in config.yml to train with it.
+
+Usage:
+    python -m olist_review_model.train_pipeline --search [--search-profile search] [--cpu-budget 8]
+"""
+
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import yaml
+from sklearn.model_selection import train_test_split
+
+from olist_review_model.experiments import SharedMatrix, training_matrix
+from olist_review_model.pipeline import PROFILES_DIR, load_config, profile_path
+
+SEARCH_METHODS = ("halving", "hyperband")
+
+# Quantized matrices of the worker process, built on its first trial
+_matrices: dict[tuple[str, int], tuple] = {}
+
+
+@dataclass
+class Trial:
+    """One sampled configuration and how far it got."""
+
+    trial_id: int
+    bracket: int
+    params: dict
+    rounds: int = 0
+    auc: float = float("nan")
+    history: list = field(default_factory=list)  # [rounds, validation AUC] per rung
+    seconds: float = 0.0
+    booster: bytes | None = field(default=None, repr=False)
+
+    def as_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if key != "booster"}
+
+
+@dataclass
+class SearchResult:
+    """The search trials and the best (trial, rounds) by validation AUC."""
+
+    best: Trial
+    best_rounds: int
+    best_auc: float
+    trials: list[Trial]
+    seconds: float
+    total_rounds: int
+    profile: str | None = None
+
+    def format(self) -> str:
+        full = max(t.rounds for t in self.trials) * len(self.trials)
+        lines = [
+            f"{len(self.trials)} trials, {self.total_rounds} boosting rounds "
+            f"({self.total_rounds / full:.0%} of training every trial in full) in {self.seconds:.1f}s",
+            f"best: trial {self.best.trial_id}, validation AUC {self.best_auc:.4f} at {self.best_rounds} rounds",
+        ]
+        lines += [f"  {key}: {value}" for key, value in self.best.params.items()]
+        if self.profile:
+            lines.append(f"profile written to {self.profile}")
+        return "\n".join(lines)
+
+
+def sample_params(space, rng: np.random.Generator) -> dict:
+    """Draw one configuration: lists are choices, {low, high[, log]} are ranges."""
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, (list, tuple)):
+            params[name] = spec[int(rng.integers(len(spec)))]
+        elif spec.get("log"):
+            params[name] = float(np.exp(rng.uniform(np.log(spec["low"]), np.log(spec["high"]))))
+        else:
+            params[name] = float(rng.uniform(spec["low"], spec["high"]))
+        if isinstance(params[name], float):
+            params[name] = float(f"{params[name]:.4g}")
+    return params
+
+
+def _log(x: float, base: int) -> int:
+    return int(math.log(x, base) + 1e-9)
+
+
+def halving_rungs(n_trials: int, n_rungs: int, eta: int, max_rounds: int) -> list[tuple[int, int]]:
+    """(trials, rounds) of each rung of a successive halving bracket ending at max_rounds."""
+    return [(max(1, n_trials // eta ** i), max(1, max_rounds // eta ** (n_rungs - 1 - i)))
+            for i in range(n_rungs)]
+
+
+def brackets(method: str, n_trials: int, eta: int, min_rounds: int, max_rounds: int) -> list[tuple[int, int]]:
+    """(initial trials, rungs) of each bracket.
+
+    halving is one bracket with as many rungs as `n_trials` and the rounds
+    range allow; hyperband runs every bracket from the most aggressive
+    (rungs starting at about min_rounds) to plain full-length training.
+    """
+    s_max = _log(max_rounds / min_rounds, eta)
+    if method == "halving":
+        return [(n_trials, 1 + min(_log(n_trials, eta), s_max))]
+    return [(math.ceil((s_max + 1) / (s + 1) * eta ** s), s + 1) for s in range(s_max, -1, -1)]
+
+
+def _quantized(matrix_dir: str, max_bin: int):
+    key = (matrix_dir, max_bin)
+    if key not in _matrices:
+        import xgboost as xgb
+
+        arrays = SharedMatrix(matrix_dir).load()
+        dtrain = xgb.QuantileDMatrix(arrays["X_train"], arrays["y_train"], max_bin=max_bin)
+        dvalid = xgb.QuantileDMatrix(arrays["X_test"], arrays["y_test"], ref=dtrain, max_bin=max_bin)
+        y_train = arrays["y_train"]
+        scale_pos_weight = float((y_train == 0).sum() / max((y_train == 1).sum(), 1))
+        _matrices[key] = (dtrain, dvalid, scale_pos_weight)
+    return _matrices[key]
+
+
+def train_trial(matrix_dir: str, params: dict, rounds: int, booster: bytes | None,
+                max_bin: int = 256, n_jobs: int = 1) -> tuple[bytes, float, float]:
+    """Grow a trial's booster to `rounds` trees (runs in a worker).
+
+    Returns the serialized booster, its validation AUC and the seconds spent.
+    """
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    dtrain, dvalid, scale_pos_weight = _quantized(matrix_dir, max_bin)
+    model = xgb.Booster(model_file=bytearray(booster)) if booster else None
+    done = model.num_boosted_rounds() if model else 0
+    train_params = {
+        "objective": "binary:logistic", "eval_metric": "auc", "tree_method": "hist", "max_bin": max_bin,
+        "scale_pos_weight": scale_pos_weight, "seed": load_config()["random_state"],
+        **params, "nthread": n_jobs,
+    }
+    model = xgb.train(train_params, dtrain, num_boost_round=rounds - done, xgb_model=model)
+    auc = float(model.eval(dvalid).rsplit(":", 1)[1])
+    return bytes(model.save_raw("ubj")), auc, time.perf_counter() - start
+
+
+def _run_rung(pool: ProcessPoolExecutor, matrix_dir: str, trials: list[Trial], rounds: int,
+              max_bin: int, n_jobs: int) -> None:
+    futures = [pool.submit(train_trial, matrix_dir, t.params, rounds, t.booster, max_bin, n_jobs)
+               for t in trials]
+    for trial, future in zip(trials, futures):
+        trial.booster, trial.auc, seconds = future.result()
+        trial.rounds = rounds
+        trial.seconds += seconds
+        trial.history.append([rounds, round(trial.auc, 5)])
+
+
+def successive_halving(pool: ProcessPoolExecutor, matrix_dir: str, trials: list[Trial], n_rungs: int, eta: int,
+                       max_rounds: int, max_bin: int = 256, n_jobs: int = 1) -> None:
+    """Run one bracket, keeping the best 1/eta of its trials after each rung (their history is updated)."""
+    survivors = trials
+    for n_trials, rounds in halving_rungs(len(trials), n_rungs, eta, max_rounds):
+        survivors = sorted(survivors, key=lambda t: -t.auc if t.rounds else 0)[:n_trials]
+        _run_rung(pool, matrix_dir, survivors, rounds, max_bin, n_jobs)
+        print(f"  bracket {survivors[0].bracket}: {len(survivors)} trials at {rounds} rounds, "
+              f"best AUC {max(t.auc for t in survivors):.4f}")
+
+
+def build_search_matrix(directory: str, use_stage_cache: bool = True) -> SharedMatrix:
+    """Fit/validation split of run_training's training rows, saved for the workers."""
+    config = load_config()
+    X, y = training_matrix(use_stage_cache)
+    split = {"test_size": config["test_size"], "random_state": config["random_state"]}
+    X_train, _, y_train, _ = train_test_split(X, y, stratify=y, **split)
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, stratify=y_train, **split)
+    return SharedMatrix.save(directory, X_train=X_fit, X_test=X_valid, y_train=y_fit, y_test=y_valid)
+
+
+def search(matrix: SharedMatrix, method: str | None = None, trials: int | None = None,
+           cpu_budget: int | None = None, seed: int | None = None) -> SearchResult:
+    """Search config["search"]["space"] on `matrix`; arguments override config["search"]."""
+    config = load_config()
+    settings = config["search"]
+    method = method or settings.get("method", "halving")
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method '{method}'. Expected one of {', '.join(SEARCH_METHODS)}")
+    eta, min_rounds, max_rounds = settings["eta"], settings["min_rounds"], settings["max_rounds"]
+    max_bin = settings.get("max_bin", 256)
+    rng = np.random.default_rng(config["random_state"] if seed is None else seed)
+
+    plan = brackets(method, trials or settings["trials"], eta, min_rounds, max_rounds)
+    budget = max(1, cpu_budget or os.cpu_count() or 1)
+    workers = min(budget, max(n for n, _ in plan))
+    n_jobs = max(1, budget // workers)
+    print(f"{method} search: brackets of {[n for n, _ in plan]} trials, eta={eta}, "
+          f"rounds {min_rounds}..{max_rounds}, {workers} workers x {n_jobs} threads")
+
+    start = time.perf_counter()
+    all_trials = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for bracket, (n_trials, n_rungs) in enumerate(plan):
+            bracket_trials = [Trial(len(all_trials) + i, bracket, sample_params(settings["space"], rng))
+                              for i in range(n_trials)]
+            all_trials += bracket_trials
+            successive_halving(pool, matrix.directory, bracket_trials, n_rungs, eta, max_rounds, max_bin, n_jobs)
+
+    # Every rung measured a model of that many trees, so a shorter one that validates better wins
+    best_auc, best_rounds, best = max(((auc, rounds, t) for t in all_trials for rounds, auc in t.history),
+                                      key=lambda entry: (entry[0], -entry[1]))
+    total_rounds = sum(t.rounds for t in all_trials)
+    for trial in all_trials:
+        trial.booster = None
+    return SearchResult(best, best_rounds, best_auc, all_trials, time.perf_counter() - start, total_rounds)
+
+
+def write_profile(result: SearchResult, name: str = "search") -> str:
+    """Write the best trial's hyperparameters as config profile `name`."""
+    config = load_config()
+    hyperparameters = {**config["hyperparameters"], **result.best.params, "n_estimators": result.best_rounds}
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    path = profile_path(name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"# Written by train_pipeline --search on {time.strftime('%Y-%m-%d %H:%M')}: "
+                f"validation AUC {result.best_auc:.4f}, {len(result.trials)} trials\n")
+        yaml.safe_dump({"hyperparameters": hyperparameters}, f, sort_keys=False)
+    os.replace(tmp_path, path)
+    result.profile = path
+    return path
+
+
+def run_search(profile: str = "search", method: str | None = None, trials: int | None = None,
+               cpu_budget: int | None = None, use_stage_cache: bool = True) -> SearchResult:
+    """Build the search matrix, search, print the result and write the profile."""
+    with tempfile.TemporaryDirectory(prefix="olist-search-") as tmp_dir:
+        result = search(build_search_matrix(tmp_dir, use_stage_cache), method, trials, cpu_budget)
+    write_profile(result, profile)
+    print(result.format())
+    return result
@@ -0,0 +1,235 @@
+"""
+Out-of-core maestro build on DuckDB (optional dependency: pip install duckdb).
+
+`build_maestro_sql` and `prepare_training_data_sql` produce the same frame as
+the lean pandas path (`build_maestro` + `prepare_training_data`): same rows in
+the same order, same columns, dtypes and feature values. Instead of holding
+every raw table in memory, they run one SQL query over the CSVs:
+
+- every file is scanned with its `data_schema` columns, types and date formats;
+- joins, the payments aggregate and the date arithmetic run in DuckDB, which
+  spills to `temp_dir` when the data exceeds `memory_limit`;
+- text statistics are computed in SQL with the whitespace rules of
+  text_features.py (str.split()), including non-ASCII whitespace;
+- distances use config["distance_metric"] over the zip-prefix geo index.
+
+With `output`, the result is streamed to a Parquet file instead of being
+returned as a DataFrame, so the training set never has to fit in RAM.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from olist_review_model.distance import EARTH_RADIUS_KM, DEG_TO_KM, _resolve_metric
+from olist_review_model.geo_index import GEO_INDEX_DTYPE, GeoIndex
+from olist_review_model.pipeline import LEAN_MAESTRO_COLUMNS, load_config
+
+_SQL_TYPES = {"category": "VARCHAR", "int8": "TINYINT", "int16": "SMALLINT", "int32": "INTEGER",
+              "float32": "FLOAT", "float64": "DOUBLE"}
+
+# Code points str.split() treats as whitespace, as an RE2 character class body
+_WHITESPACE = (r"\t\n\x0B\f\r\x1C-\x1F \x{85}\x{A0}\x{1680}\x{2000}-\x{200A}"
+               r"\x{2028}\x{2029}\x{202F}\x{205F}\x{3000}")
+
+_DAY_US = 86_400_000_000
+_SENTINEL = "TIMESTAMP '1970-01-01'"
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _scan(data_dir: str, key: str) -> str:
+    """SELECT reading one data file with its data_schema columns, types and date formats."""
+    config = load_config()
+    schema = config.get("data_schema", {}).get(key, {})
+    dtypes = schema.get("dtypes", {})
+    date_formats = schema.get("date_formats", {})
+    path = os.path.join(data_dir, config["data_files"][key])
+
+    columns = []
+    for col in schema.get("usecols", ()):
+        name = f'"{col}"'
+        if col in date_formats:
+            columns.append(f"try_strptime({name}, {_literal(date_formats[col])}) AS {name}")
+        elif col in dtypes and _SQL_TYPES[dtypes[col]] != "VARCHAR":
+            columns.append(f"TRY_CAST({name} AS {_SQL_TYPES[dtypes[col]]}) AS {name}")
+        else:
+            columns.append(name)
+    return (f"SELECT {', '.join(columns) or '*'} "
+            f"FROM read_csv({_literal(path)}, header = true, all_varchar = true)")
+
+
+def _days(later: str, earlier: str) -> str:
+    """Whole days between two timestamps, floored like pandas Timedelta.days."""
+    return f"CAST(floor((epoch_us({later}) - epoch_us({earlier})) / {_DAY_US}) AS INTEGER)"
+
+
+def _distance(lat1: str, lng1: str, lat2: str, lng2: str, metric: str) -> str:
+    """SQL expression of distance.distance_km for `metric`."""
+    if metric == "euclidean_deg":
+        return f"sqrt(pow({lat1} - {lat2}, 2) + pow({lng1} - {lng2}, 2)) * {DEG_TO_KM}"
+    dphi = f"(radians({lat2}) - radians({lat1}))"
+    dlmb = f"radians({lng2} - {lng1})"
+    if metric == "equirectangular":
+        x = f"{dlmb} * cos((radians({lat1}) + radians({lat2})) / 2)"
+        return f"sqrt(pow({x}, 2) + pow({dphi}, 2)) * {EARTH_RADIUS_KM}"
+    a = (f"pow(sin({dphi} / 2), 2) + cos(radians({lat1})) * cos(radians({lat2})) "
+         f"* pow(sin({dlmb} / 2), 2)")
+    return f"2 * {EARTH_RADIUS_KM} * asin(sqrt(least({a}, 1.0)))"
+
+
+def maestro_query(data_dir: str, training: bool = False, metric: str | None = None) -> str:
+    """The lean maestro as one SQL query over the files in `data_dir`.
+
+    Expects a `geo` relation (zip_prefix, lat, lng). With `training`, applies
+    prepare_training_data: drops sentinel delivery dates and adds the target.
+    """
+    config = load_config()
+    metric = _resolve_metric(metric)
+    features = [f for f in config["features"] if f not in LEAN_MAESTRO_COLUMNS]
+    target = f", CAST(review_score <= {int(config['negative_threshold'])} AS BIGINT) AS {config['target']}"
+
+    ws = _WHITESPACE
+    return f"""
+    WITH
+    reviews AS (
+        SELECT row_number() OVER () AS review_row, order_id, review_score,
+               coalesce(review_comment_title, '') || ' ' || coalesce(review_comment_message, '') AS full_text
+        FROM ({_scan(data_dir, "reviews")})
+    ),
+    review_stats AS (
+        SELECT review_row, order_id, review_score,
+               CAST(length(full_text) AS INTEGER) AS char_count,
+               CAST(len(regexp_extract_all(full_text, '[^{ws}]+')) AS INTEGER) AS word_count,
+               CAST(length(full_text) - length(replace(full_text, '!', '')) AS INTEGER) AS exclamation_count,
+               CAST(length(full_text) - length(replace(full_text, '?', '')) AS INTEGER) AS question_count,
+               length(regexp_replace(full_text, '[^{ws}]', '', 'g')) AS space_count
+        FROM reviews
+    ),
+    orders AS (
+        SELECT order_id, customer_id,
+               coalesce(order_purchase_timestamp, {_SENTINEL}) AS purchase,
+               coalesce(order_delivered_carrier_date, {_SENTINEL}) AS carrier,
+               coalesce(order_delivered_customer_date, {_SENTINEL}) AS delivered,
+               coalesce(order_estimated_delivery_date, {_SENTINEL}) AS estimated
+        FROM ({_scan(data_dir, "orders")})
+    ),
+    items AS (
+        SELECT row_number() OVER () AS item_row, order_id, seller_id, product_id,
+               CAST(price AS FLOAT) AS price, CAST(freight_value AS FLOAT) AS freight_value
+        FROM ({_scan(data_dir, "order_items")})
+    ),
+    payments AS (
+        SELECT order_id,
+               CAST(max(payment_installments) AS FLOAT) AS payment_installments,
+               CAST(sum(CAST(payment_value AS FLOAT)) AS FLOAT) AS payment_value
+        FROM ({_scan(data_dir, "payments")})
+        GROUP BY order_id
+    ),
+    customers AS ({_scan(data_dir, "customers")}),
+    sellers AS ({_scan(data_dir, "sellers")}),
+    products AS ({_scan(data_dir, "products")}),
+    maestro AS (
+        SELECT r.review_row, i.item_row, r.order_id, r.review_score,
+               o.purchase AS order_purchase_timestamp,
+               o.delivered AS order_delivered_customer_date,
+               {_days("o.delivered", "o.estimated")} AS delivery_delta_days,
+               {_days("o.carrier", "o.purchase")} AS seller_dispatch_days,
+               {_days("o.delivered", "o.carrier")} AS carrier_transit_days,
+               CAST({_distance("gc.lat", "gc.lng", "gs.lat", "gs.lng", metric)} AS FLOAT)
+                   AS distance_seller_customer_km,
+               i.price, i.freight_value, p.payment_value, p.payment_installments,
+               CAST(pr.product_weight_g AS FLOAT) AS product_weight_g,
+               CAST(pr.product_description_lenght AS FLOAT) AS product_description_lenght,
+               CAST(pr.product_photos_qty AS FLOAT) AS product_photos_qty,
+               r.char_count, r.word_count, r.exclamation_count, r.question_count,
+               CAST(CASE WHEN r.word_count > 0 THEN (r.char_count - r.space_count) / r.word_count
+                         ELSE 0 END AS FLOAT) AS avg_word_length
+        FROM review_stats r
+        JOIN orders o ON o.order_id = r.order_id
+        JOIN items i ON i.order_id = r.order_id
+        LEFT JOIN payments p ON p.order_id = r.order_id
+        LEFT JOIN customers c ON c.customer_id = o.customer_id
+        LEFT JOIN sellers s ON s.seller_id = i.seller_id
+        LEFT JOIN products pr ON pr.product_id = i.product_id
+        LEFT JOIN geo gc ON gc.zip_prefix = c.customer_zip_code_prefix
+        LEFT JOIN geo gs ON gs.zip_prefix = s.seller_zip_code_prefix
+    )
+    SELECT {", ".join(LEAN_MAESTRO_COLUMNS + tuple(features))}{target if training else ""}
+    FROM maestro
+    {"WHERE order_delivered_customer_date > TIMESTAMP '2000-01-01'" if training else ""}
+    ORDER BY review_row, item_row
+    """
+
+
+def geo_index_query(data_dir: str) -> str:
+    """build_geo_index as SQL: mean float32 coordinates per zip prefix, sorted by prefix."""
+    return f"""
+    SELECT CAST(geolocation_zip_code_prefix AS INTEGER) AS zip_prefix,
+           CAST(avg(CAST(geolocation_lat AS FLOAT)) AS FLOAT) AS lat,
+           CAST(avg(CAST(geolocation_lng AS FLOAT)) AS FLOAT) AS lng
+    FROM ({_scan(data_dir, "geolocation")})
+    WHERE geolocation_zip_code_prefix IS NOT NULL
+    GROUP BY 1
+    ORDER BY 1
+    """
+
+
+def _connect(memory_limit: str | None, temp_dir: str | None):
+    import duckdb
+
+    con = duckdb.connect()
+    # Keep scan order so row_number() follows the file order, like the pandas build
+    con.execute("SET preserve_insertion_order = true")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {_literal(memory_limit)}")
+    if temp_dir:
+        con.execute(f"SET temp_directory = {_literal(temp_dir)}")
+    return con
+
+
+def build_geo_index_sql(data_dir: str, memory_limit: str | None = None,
+                        temp_dir: str | None = None) -> GeoIndex:
+    """The zip-prefix geo index, aggregated by DuckDB without loading the geolocation table."""
+    con = _connect(memory_limit, temp_dir)
+    try:
+        frame = con.execute(geo_index_query(data_dir)).df()
+    finally:
+        con.close()
+    records = np.empty(len(frame), dtype=GEO_INDEX_DTYPE)
+    for name in GEO_INDEX_DTYPE.names:
+        records[name] = frame[name].to_numpy()
+    return GeoIndex(records)
+
+
+def build_maestro_sql(data_dir: str, geo_index: GeoIndex | None = None, output: str | None = None,
+                      training: bool = False, memory_limit: str | None = None,
+                      temp_dir: str | None = None) -> pd.DataFrame | str:
+    """Lean maestro of the CSVs in `data_dir`, built by DuckDB.
+
+    `geo_index` is aggregated from the geolocation file when not given. With
+    `output`, the result is written to that Parquet file and its path is
+    returned; otherwise it is returned as a DataFrame.
+    """
+    con = _connect(memory_limit, temp_dir)
+    try:
+        if geo_index is None:
+            con.execute(f"CREATE TEMP TABLE geo AS {geo_index_query(data_dir)}")
+        else:
+            con.register("geo", pd.DataFrame(np.asarray(geo_index.records)))
+        query = maestro_query(data_dir, training=training)
+        if output is not None:
+            con.execute(f"COPY ({query}) TO {_literal(output)} (FORMAT parquet)")
+            return output
+        return con.execute(query).df()
+    finally:
+        con.close()
+
+
+def prepare_training_data_sql(data_dir: str, geo_index: GeoIndex | None = None,
+                              output: str | None = None, **kwargs) -> pd.DataFrame | str:
+    """build_maestro_sql followed by prepare_training_data, in the same query."""
+    return build_maestro_sql(data_dir, geo_index, output=output, training=True, **kwargs)
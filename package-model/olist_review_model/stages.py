@@ -0,0 +1,220 @@
+"""
+Named, disk-memoized stages of the training pipeline.
+
+Each stage output is stored under a cache key combining:
+- the stage's code version (explicit `version` plus the source of `code`),
+- the config.yml keys the stage reads,
+- the cache keys of its upstream stages (or `fingerprint()` for source data).
+
+The run report lists, per stage, whether it hit the cache, its wall time and
+the process peak RSS while it ran (exact per stage on Linux, where the peak
+counter can be reset; elsewhere the running process maximum).
+
+Upstream keys stand in for artifact hashes: stages are deterministic, so
+equal inputs give equal outputs. When nothing a stage depends on changed,
+its output is loaded from disk instead of recomputed, and outputs of stages
+that only feed cached stages are never loaded at all.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import joblib
+
+from olist_review_model.pipeline import load_config
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the pipeline DAG.
+
+    Args:
+        name: Stage name, also used for --force-stage.
+        run: Called with the outputs of `inputs`, in order.
+        inputs: Names of upstream stages.
+        config_keys: Top-level config.yml keys the stage reads.
+        code: Functions whose source is part of the cache key.
+        version: Bump to invalidate the cache when code outside `code` changes.
+        fingerprint: Extra key component, e.g. hashes of the source files.
+    """
+
+    name: str
+    run: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    config_keys: tuple[str, ...] = ()
+    code: tuple[Callable, ...] = ()
+    version: str = "1"
+    fingerprint: Callable[[], str] | None = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    key: str
+    hit: bool
+    seconds: float
+    peak_rss_bytes: int = 0
+
+
+@dataclass
+class StageReport:
+    """Per-stage cache hits and timings of one pipeline run."""
+
+    results: list[StageResult] = field(default_factory=list)
+
+    @property
+    def hits(self) -> int:
+        return sum(r.hit for r in self.results)
+
+    def as_dict(self) -> dict:
+        return {
+            r.name: {"hit": r.hit, "seconds": round(r.seconds, 4), "peak_rss_bytes": r.peak_rss_bytes, "key": r.key}
+            for r in self.results
+        }
+
+    def format(self) -> str:
+        lines = [f"{'stage':<18}{'cache':<8}{'seconds':>9}{'peak RSS MiB':>14}"]
+        for r in self.results:
+            lines.append(
+                f"{r.name:<18}{'hit' if r.hit else 'miss':<8}{r.seconds:9.3f}{r.peak_rss_bytes / 2**20:14.1f}"
+            )
+        lines.append(f"{self.hits}/{len(self.results)} stages served from cache")
+        return "\n".join(lines)
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's peak RSS counter of this process (Linux only; a no-op elsewhere)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_bytes() -> int:
+    """Peak RSS since the last reset (Linux), or since process start (resource.getrusage)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _code_digest(funcs: tuple[Callable, ...]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for func in funcs:
+        digest.update(inspect.getsource(func).encode())
+    return digest.hexdigest()
+
+
+class StageRunner:
+    """Run stages in order, memoizing each output in `cache_dir` (None disables the cache)."""
+
+    def __init__(self, stages: list[Stage], cache_dir: str | None) -> None:
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+        for stage in stages:
+            unknown = [name for name in stage.inputs if name not in names[:names.index(stage.name)]]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown or later stages: {', '.join(unknown)}")
+        self.stages = stages
+        self.cache_dir = cache_dir
+
+    def cache_key(self, stage: Stage, upstream_keys: dict[str, str]) -> str:
+        config = load_config()
+        payload = {
+            "stage": stage.name,
+            "version": stage.version,
+            "code": _code_digest(stage.code),
+            "config": {key: config.get(key) for key in stage.config_keys},
+            "inputs": [upstream_keys[name] for name in stage.inputs],
+            "fingerprint": stage.fingerprint() if stage.fingerprint else None,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=_to_json).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def run(self, force: tuple[str, ...] | list[str] = (),
+            load: tuple[str, ...] = ()) -> tuple[dict[str, Any], StageReport]:
+        """Run the pipeline. Returns the stage outputs by name and the cache report.
+
+        Stages named in `force` ("all" for every stage) are recomputed along
+        with every stage downstream of them. The outputs returned always include
+        the last stage and the stages named in `load`.
+        """
+        names = {stage.name for stage in self.stages}
+        unknown = [name for name in force if name != "all" and name not in names]
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+
+        keys: dict[str, str] = {}
+        forced: set[str] = set()
+        outputs: dict[str, Any] = {}
+        cached: dict[str, str] = {}
+        report = StageReport()
+
+        for stage in self.stages:
+            _reset_peak_rss()
+            start = time.perf_counter()
+            key = self.cache_key(stage, keys)
+            keys[stage.name] = key
+            if "all" in force or stage.name in force or forced.intersection(stage.inputs):
+                forced.add(stage.name)
+
+            path = self._path(stage.name, key)
+            if path is not None and stage.name not in forced and os.path.exists(path):
+                cached[stage.name] = path
+                report.results.append(
+                    StageResult(stage.name, key, True, time.perf_counter() - start, _peak_rss_bytes())
+                )
+                continue
+
+            args = [self._output(name, outputs, cached) for name in stage.inputs]
+            outputs[stage.name] = stage.run(*args)
+            if path is not None:
+                self._save(stage.name, path, outputs[stage.name])
+            report.results.append(
+                StageResult(stage.name, key, False, time.perf_counter() - start, _peak_rss_bytes())
+            )
+
+        for name in (self.stages[-1].name, *load):
+            self._output(name, outputs, cached)
+        return outputs, report
+
+    def _output(self, name: str, outputs: dict[str, Any], cached: dict[str, str]) -> Any:
+        if name not in outputs:
+            outputs[name] = joblib.load(cached[name])
+        return outputs[name]
+
+    def _path(self, name: str, key: str) -> str | None:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{name}-{key}.joblib")
+
+    def _save(self, name: str, path: str, value: Any) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        for entry in os.listdir(self.cache_dir):
+            if entry.startswith(f"{name}-") and entry.endswith(".joblib") and entry != os.path.basename(path):
+                os.remove(os.path.join(self.cache_dir, entry))
+
+
+def _to_json(value: Any) -> Any:
+    """JSON fallback for read-only config values (mappings and tuples)."""
+    if hasattr(value, "items"):
+        return dict(value)
+    return list(value)
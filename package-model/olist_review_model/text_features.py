@@ -0,0 +1,94 @@
+"""
+Review text statistics shared by training (build_maestro) and serving (the API).
+
+    char_count         characters (code points) in the text
+    word_count         whitespace-separated words, as str.split()
+    exclamation_count  "!" characters
+    question_count     "?" characters
+    avg_word_length    mean word length in characters, 0 without words
+
+`text_stats` handles one text. `text_stats_batch` computes the same values
+for many texts with numpy over the UTF-8 bytes of an Arrow string array:
+code points are the bytes that are not UTF-8 continuation bytes, and words
+start at a non-space byte preceded by a space or the start of the text.
+Texts with non-ASCII whitespace (rare: NBSP, em space, ...) are routed to
+`text_stats`.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+TEXT_FEATURES = ("char_count", "word_count", "exclamation_count", "question_count", "avg_word_length")
+
+# Bytes str.split() treats as whitespace: \t \n \v \f \r, \x1c-\x1f and space
+_ASCII_SPACE = np.zeros(256, dtype=bool)
+_ASCII_SPACE[[0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E, 0x1F, 0x20]] = True
+
+# Lead bytes of every non-ASCII whitespace code point (U+0085, U+00A0, U+1680,
+# U+2000-U+200A, U+2028, U+2029, U+202F, U+205F, U+3000). Texts containing one
+# are scored by the scalar path.
+_NON_ASCII_SPACE_LEAD = np.zeros(256, dtype=bool)
+_NON_ASCII_SPACE_LEAD[[0xC2, 0xE1, 0xE2, 0xE3]] = True
+
+
+def text_stats(text: str) -> dict:
+    """The TEXT_FEATURES of a single text."""
+    words = text.split()
+    return {
+        "char_count": len(text),
+        "word_count": len(words),
+        "exclamation_count": text.count("!"),
+        "question_count": text.count("?"),
+        "avg_word_length": sum(len(w) for w in words) / len(words) if words else 0.0,
+    }
+
+
+def text_stats_batch(texts: Iterable[str | None]) -> dict[str, np.ndarray]:
+    """The TEXT_FEATURES of many texts as arrays (missing texts count as "").
+
+    Counts are int64 and avg_word_length float64, in input order.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arr = pa.array(texts, type=pa.large_string())
+    if isinstance(arr, pa.ChunkedArray):  # Arrow-backed pandas strings
+        arr = arr.combine_chunks()
+    arr = pc.fill_null(arr, "")
+    n = len(arr)
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset:arr.offset + n + 1]
+    data = arr.buffers()[2]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8)
+    data = data[offsets[0]:offsets[-1]]
+    starts, ends = offsets[:-1] - offsets[0], offsets[1:] - offsets[0]
+
+    def per_text(mask: np.ndarray) -> np.ndarray:
+        # Masks are sparse: locate the set bytes, then count them per text by position
+        positions = np.flatnonzero(mask)
+        return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+    space = _ASCII_SPACE[data]
+    prev_space = np.ones_like(space)
+    prev_space[1:] = space[:-1]
+    prev_space[starts[starts < len(data)]] = True  # every text starts after a virtual space
+
+    char_count = (ends - starts) - per_text((data & 0xC0) == 0x80)
+    word_count = per_text(~space & prev_space)
+    word_chars = char_count - per_text(space)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_word_length = np.where(word_count > 0, word_chars / word_count, 0.0)
+
+    stats = {
+        "char_count": char_count,
+        "word_count": word_count,
+        "exclamation_count": per_text(data == 0x21),
+        "question_count": per_text(data == 0x3F),
+        "avg_word_length": avg_word_length,
+    }
+
+    for i in np.flatnonzero(per_text(_NON_ASCII_SPACE_LEAD[data]) > 0):
+        exact = text_stats(arr[int(i)].as_py())
+        for name in TEXT_FEATURES:
+            stats[name][i] = exact[name]
+    return stats
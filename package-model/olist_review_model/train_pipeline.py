@@ -1,46 +1,159 @@
 """
 Training pipeline for the Olist negative review XGBoost model.
 Loads data, applies feature engineering, trains and saves the model.
+
+Data preparation runs as memoized stages (see stages.py), so a change to
+the hyperparameters alone skips straight to model fitting.
+
+Usage:
+    python -m olist_review_model.train_pipeline [--force-stage maestro] [--no-stage-cache]
+    python -m olist_review_model.train_pipeline --search [--search-method hyperband] [--cpu-budget 8]
+    python -m olist_review_model.train_pipeline --compact  # then compact it, see compaction.py
 """
 
+import argparse
 import os
+import time
 
 import joblib
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, roc_auc_score
+from sklearn.metrics import classification_report, f1_score, precision_score, recall_score, roc_auc_score
 
 from olist_review_model import TRAINED_MODEL_DIR
+from olist_review_model.distance import distance_km
+from olist_review_model.flat_forest import export_flat_forest
+from olist_review_model.geo_index import build_geo_index, save_geo_index
+from olist_review_model.model_benchmark import InferenceBenchmark, candidate_metadata, save_metadata
 from olist_review_model.pipeline import (
+    _build_maestro_lean,
+    _calculate_text_stats,
+    _shared_codes,
+    _read_options,
     load_config,
     load_raw_data,
     build_maestro,
     prepare_training_data,
     extract_features,
+    feature_sketches,
     save_feature_medians,
 )
+from olist_review_model.quantile_sketch import FeatureSketches, KLLSketch
+from olist_review_model.raw_cache import RawDataCache, file_digest, read_typed_csv
+from olist_review_model.stages import Stage, StageRunner
+from olist_review_model.training_telemetry import early_stopping_split, training_callbacks
+from olist_review_model.text_features import text_stats, text_stats_batch
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(TRAINED_MODEL_DIR))
+STAGE_NAMES = ("raw_data", "geo_index", "maestro", "training_data", "feature_sketches", "features")
+
 
+def _project_path(config, key: str) -> str | None:
+    return os.path.join(PROJECT_DIR, config[key]) if config.get(key) else None
 
-def run_training():
+
+def training_stages() -> list[Stage]:
+    """The data preparation DAG: raw_data -> geo_index -> maestro -> training_data
+    -> feature_sketches -> features.
+
+    With config["maestro_backend"] == "duckdb" it is geo_index -> training_data
+    -> feature_sketches -> features, where DuckDB reads the CSVs directly (see sql_maestro.py).
+    With config["maestro_store_dir"], geo_index and maestro update a stored,
+    month-partitioned maestro instead of rebuilding it (see incremental.py).
+    """
     config = load_config()
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(TRAINED_MODEL_DIR)), config["data_dir"])
+    data_dir = _project_path(config, "data_dir")
+    raw_cache_dir = _project_path(config, "raw_cache_dir")
+
+    def source_digests() -> str:
+        digest = RawDataCache(raw_cache_dir).digest if raw_cache_dir else file_digest
+        return ",".join(digest(os.path.join(data_dir, name)) for name in config["data_files"].values())
+
+    def features_and_target(df_training, sketches):
+        return extract_features(df_training, sketches.medians()), df_training[load_config()["target"]]
 
-    # --- Load & build maestro ---
-    print("Loading raw data...")
-    raw_data = load_raw_data(data_dir)
+    feature_stages = [
+        Stage("feature_sketches", feature_sketches, inputs=("training_data",),
+              config_keys=("features", "quantile_sketch_k"), code=(feature_sketches, FeatureSketches.update,
+                                                                   KLLSketch.update, KLLSketch._compress)),
+        Stage("features", features_and_target, inputs=("training_data", "feature_sketches"),
+              config_keys=("features", "target"),
+              code=(extract_features, features_and_target, KLLSketch.quantiles)),
+    ]
 
-    print("Building maestro dataset...")
-    df_maestro = build_maestro(raw_data)
+    if config.get("maestro_backend", "pandas") == "duckdb":
+        from olist_review_model import sql_maestro
 
-    print("Preparing training data...")
-    df_training = prepare_training_data(df_maestro)
+        memory_limit = config.get("duckdb_memory_limit") or None
+        return [
+            Stage("geo_index", lambda: sql_maestro.build_geo_index_sql(data_dir, memory_limit=memory_limit),
+                  config_keys=("data_files", "data_schema"),
+                  code=(sql_maestro.build_geo_index_sql, sql_maestro.geo_index_query, sql_maestro._scan),
+                  fingerprint=source_digests),
+            Stage("training_data",
+                  lambda geo_index: sql_maestro.prepare_training_data_sql(data_dir, geo_index,
+                                                                          memory_limit=memory_limit),
+                  inputs=("geo_index",),
+                  config_keys=("data_files", "data_schema", "distance_metric", "features",
+                               "negative_threshold", "target"),
+                  code=(sql_maestro.build_maestro_sql, sql_maestro.maestro_query, sql_maestro._scan,
+                        sql_maestro._days, sql_maestro._distance),
+                  fingerprint=source_digests),
+            *feature_stages,
+        ]
 
-    # --- Features & target ---
-    X = extract_features(df_training)
-    y = df_training[config["target"]]
+    maestro_store_dir = _project_path(config, "maestro_store_dir")
+    if maestro_store_dir:
+        from olist_review_model.incremental import IncrementalMaestro
+
+        store = IncrementalMaestro(maestro_store_dir)
+
+        def incremental_maestro(raw, geo_index):
+            print(store.update(raw, geo_index).format())
+            return store.load()
+
+        geo_stage = Stage("geo_index", lambda raw: store.update_geo_index(raw["geolocation"]),
+                          inputs=("raw_data",), code=(build_geo_index, IncrementalMaestro.update_geo_index))
+        maestro_stage = Stage("maestro", incremental_maestro, inputs=("raw_data", "geo_index"),
+                              config_keys=("distance_metric", "features", "maestro_store_dir",
+                                           "incremental_lookback_days"),
+                              code=(IncrementalMaestro.update, _build_maestro_lean, text_stats_batch, distance_km))
+    else:
+        geo_stage = Stage("geo_index", lambda raw: build_geo_index(raw["geolocation"]), inputs=("raw_data",),
+                          code=(build_geo_index,))
+        maestro_stage = Stage("maestro", build_maestro, inputs=("raw_data", "geo_index"),
+                              config_keys=("distance_metric", "lean_maestro", "features"),
+                              code=(build_maestro, _build_maestro_lean, _shared_codes, _calculate_text_stats,
+                                    text_stats_batch, text_stats, distance_km))
+
+    return [
+        Stage(
+            "raw_data", lambda: load_raw_data(data_dir, cache_dir=raw_cache_dir),
+            config_keys=("data_files", "data_schema"),
+            code=(load_raw_data, _read_options, read_typed_csv),
+            fingerprint=source_digests,
+        ),
+        geo_stage,
+        maestro_stage,
+        Stage("training_data", prepare_training_data, inputs=("maestro",),
+              config_keys=("negative_threshold",), code=(prepare_training_data,)),
+        *feature_stages,
+    ]
+
+
+def run_training(force_stages: tuple[str, ...] = (), use_stage_cache: bool = True):
+    config = load_config()
+
+    # --- Load, build maestro, features & target (memoized stages) ---
+    print("Preparing data...")
+    cache_dir = _project_path(config, "stage_cache_dir") if use_stage_cache else None
+    runner = StageRunner(training_stages(), cache_dir)
+    outputs, report = runner.run(force=force_stages, load=("geo_index", "feature_sketches"))
+    print(report.format())
+    X, y = outputs["features"]
 
     print("Saving feature medians for API inference...")
-    save_feature_medians(df_training)
+    save_feature_medians(outputs["feature_sketches"])
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y,
@@ -49,31 +162,107 @@ def run_training():
         stratify=y,
     )
 
-    scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
-    print(f"Train: {X_train.shape}, Test: {X_test.shape}")
+    # Early stopping picks its iteration on a validation split carved from the training rows,
+    # so the test split only measures the final model; without it every training row is fit
+    X_fit, y_fit, eval_set = early_stopping_split(X_train, y_train, config)
+
+    scale_pos_weight = (y_fit == 0).sum() / (y_fit == 1).sum()
+    valid_shape = f", Validation: {eval_set[0][0].shape}" if eval_set else ""
+    print(f"Train: {X_fit.shape}{valid_shape}, Test: {X_test.shape}")
     print(f"scale_pos_weight: {scale_pos_weight:.2f}")
 
     # --- Train ---
     params = config["hyperparameters"].copy()
     params["scale_pos_weight"] = scale_pos_weight
 
+    # Early stopping on the validation split keeps the best iteration's trees; the time budget
+    # stops boosting early and the best iteration so far is checkpointed meanwhile
+    os.makedirs(TRAINED_MODEL_DIR, exist_ok=True)
+    save_path = os.path.join(TRAINED_MODEL_DIR, config["trained_model_file"])
+    checkpoint_path = (os.path.join(TRAINED_MODEL_DIR, config["checkpoint_file"])
+                       if config.get("checkpoint_file") else None)
+    callbacks = training_callbacks(config, len(X_fit), checkpoint_path)
+    telemetry = callbacks[-1]
+
     print("Training XGBoost model...")
-    model = xgb.XGBClassifier(**params)
-    model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=50)
+    model = xgb.XGBClassifier(**params, callbacks=callbacks)
+    model.fit(X_fit, y_fit, eval_set=eval_set, verbose=50)
+    model.set_params(callbacks=None)
+    n_trees = model.get_booster().num_boosted_rounds()
+    print(f"Boosting stopped by {telemetry.stopped_by(params['n_estimators'])} after "
+          f"{len(telemetry.rounds['iteration'])} rounds ({telemetry.seconds:.1f}s); keeping {n_trees} trees")
 
     # --- Evaluate ---
     y_pred = model.predict(X_test)
     y_proba = model.predict_proba(X_test)[:, 1]
 
     print("\n" + classification_report(y_test, y_pred))
-    print(f"ROC AUC: {roc_auc_score(y_test, y_proba):.4f}")
+    roc_auc = roc_auc_score(y_test, y_proba)
+    print(f"ROC AUC: {roc_auc:.4f}")
 
     # --- Save model ---
-    os.makedirs(TRAINED_MODEL_DIR, exist_ok=True)
-    save_path = os.path.join(TRAINED_MODEL_DIR, config["trained_model_file"])
     joblib.dump(model, save_path)
     print(f"\nModel saved to: {save_path}")
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)  # superseded by the saved model
+
+    telemetry_path = os.path.join(TRAINED_MODEL_DIR, config["telemetry_file"])
+    telemetry.save(telemetry_path, params["n_estimators"], n_trees, roc_auc=round(float(roc_auc), 6),
+                   model_bytes=os.path.getsize(save_path))
+    print(f"Training telemetry saved to: {telemetry_path}")
+
+    flat_path = os.path.join(TRAINED_MODEL_DIR, config["flat_model_file"])
+    flat_model = export_flat_forest(model)
+    flat_model.save(flat_path)
+    print(f"Flat model saved to: {flat_path}")
+
+    # --- Serving cost of each artifact, stored in its metadata (see model_benchmark.py) ---
+    metrics = {
+        "roc_auc": float(roc_auc),
+        "f1": float(f1_score(y_test, y_pred)),
+        "precision": float(precision_score(y_test, y_pred)),
+        "recall": float(recall_score(y_test, y_pred)),
+    }
+    X_sample = X_test.to_numpy(dtype="float32")
+    for path, artifact in ((save_path, model), (flat_path, flat_model)):
+        metadata = candidate_metadata(
+            artifact, X_sample, metrics, config, model_file=os.path.basename(path),
+            trained_at=time.strftime("%Y-%m-%dT%H:%M:%S"), n_trees=n_trees, hyperparameters=params,
+        )
+        save_metadata(path, metadata)
+        print(f"{os.path.basename(path)}: {InferenceBenchmark(**metadata['benchmark']).format()}")
+        if not metadata["selection"]["meets_rule"]:
+            print(f"WARNING: {os.path.basename(path)} exceeds the selection limits {metadata['selection']}")
+
+    geo_path = os.path.join(TRAINED_MODEL_DIR, config["geo_index_file"])
+    save_geo_index(outputs["geo_index"], geo_path)
+    print(f"Geo index ({len(outputs['geo_index'])} zip prefixes) saved to: {geo_path}")
 
 
 if __name__ == "__main__":
-    run_training()
+    parser = argparse.ArgumentParser(description="Train the Olist negative review model.")
+    parser.add_argument(
+        "--force-stage", action="append", default=[], choices=STAGE_NAMES + ("all",),
+        help="Recompute this stage and everything downstream of it (repeatable)",
+    )
+    parser.add_argument("--no-stage-cache", action="store_true", help="Run every stage without the stage cache")
+    parser.add_argument("--search", action="store_true",
+                        help="Search the hyperparameters (config search:) instead of training, see search.py")
+    parser.add_argument("--search-method", choices=("halving", "hyperband"), help="Override search.method")
+    parser.add_argument("--trials", type=int, help="Override search.trials (halving)")
+    parser.add_argument("--cpu-budget", type=int, help="Cores the search may use (default: all)")
+    parser.add_argument("--search-profile", default="search", help="Profile the best config is written to")
+    parser.add_argument("--compact", action="store_true",
+                        help="After training, build the compact serving model (config compaction:), see compaction.py")
+    args = parser.parse_args()
+    if args.search:
+        from olist_review_model.search import run_search
+
+        run_search(args.search_profile, args.search_method, args.trials, args.cpu_budget,
+                   use_stage_cache=not args.no_stage_cache)
+    else:
+        run_training(tuple(args.force_stage), use_stage_cache=not args.no_stage_cache)
+        if args.compact:
+            from olist_review_model.compaction import run_compaction
+
+            run_compaction(use_stage_cache=not args.no_stage_cache)
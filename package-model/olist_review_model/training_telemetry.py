@@ -0,0 +1,155 @@
+"""
+Training control and telemetry for run_training: an XGBoost callback that
+times every boosting round, stops at a wall-clock budget and checkpoints the
+best iteration so far.
+
+`TrainingTelemetry` records, per round, the round's wall time, the training
+throughput (rows/s) and the eval metric. Training stops once
+`time_budget_s` has elapsed. Every `checkpoint_every` rounds, if the eval
+metric improved since the last checkpoint, the trees up to the best round
+are written to `checkpoint_path`. A run that is killed or times out still
+leaves its best model on disk.
+
+Together with xgboost.callback.EarlyStopping(save_best=True) (see
+`training_callbacks`), the fitted model keeps only the trees up to the best
+iteration. That also makes it smaller and faster to serve. Early stopping
+monitors a validation split of the training rows (`early_stopping_split`);
+without early stopping the model is fit on every training row and there is
+no eval metric, so checkpoints hold the latest round. `report()` is the JSON
+telemetry written next to the model.
+"""
+
+import json
+import os
+import time
+
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+STOP_EARLY_STOPPING = "early_stopping"
+STOP_TIME_BUDGET = "time_budget"
+STOP_N_ESTIMATORS = "n_estimators"
+
+
+class TrainingTelemetry(xgb.callback.TrainingCallback):
+    """Per-round timing, time budget and best-iteration checkpoints.
+
+    Args:
+        n_rows: Training rows, for the throughput.
+        time_budget_s: Stop after this many seconds of boosting (None or 0: no limit).
+        checkpoint_path: Where to save the best iteration so far (None: no checkpoints).
+        checkpoint_every: Rounds between checkpoint checks.
+        metric: Eval metric to track, higher is better (AUC).
+        data_name: Eval set of the metric; the last of eval_set in the sklearn API.
+    """
+
+    def __init__(self, n_rows: int, time_budget_s: float | None = None, checkpoint_path: str | None = None,
+                 checkpoint_every: int = 50, metric: str = "auc", data_name: str = "validation_0") -> None:
+        super().__init__()
+        self.n_rows = n_rows
+        self.time_budget_s = time_budget_s or None
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.metric = metric
+        self.data_name = data_name
+        self.rounds: dict[str, list] = {"iteration": [], "seconds": [], "rows_per_s": [], metric: []}
+        self.best_iteration: int | None = None
+        self.best_score: float | None = None
+        self.checkpointed_iteration: int | None = None
+        self.stopped_by_budget = False
+        self.seconds = 0.0
+        self._start = self._last = 0.0
+
+    def before_training(self, model):
+        self._start = self._last = time.perf_counter()
+        return model
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        now = time.perf_counter()
+        seconds, self._last = now - self._last, now
+        score = evals_log.get(self.data_name, {}).get(self.metric, [None])[-1]
+        score = score[0] if isinstance(score, tuple) else score
+
+        self.rounds["iteration"].append(epoch)
+        self.rounds["seconds"].append(round(seconds, 6))
+        self.rounds["rows_per_s"].append(round(self.n_rows / seconds) if seconds > 0 else None)
+        self.rounds[self.metric].append(None if score is None else round(float(score), 6))
+        if score is None:
+            self.best_iteration = epoch  # no eval set: the latest round is the one to keep
+        elif self.best_score is None or score > self.best_score:
+            self.best_iteration, self.best_score = epoch, float(score)
+
+        if self.checkpoint_path and (epoch + 1) % self.checkpoint_every == 0:
+            self.checkpoint(model)
+        self.seconds = now - self._start
+        self.stopped_by_budget = self.time_budget_s is not None and self.seconds >= self.time_budget_s
+        return self.stopped_by_budget
+
+    def checkpoint(self, model) -> None:
+        """Save the trees up to the best iteration, if it changed since the last checkpoint."""
+        if self.best_iteration is None or self.best_iteration == self.checkpointed_iteration:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp{os.path.splitext(self.checkpoint_path)[1]}"
+        model[: self.best_iteration + 1].save_model(tmp_path)
+        os.replace(tmp_path, self.checkpoint_path)
+        self.checkpointed_iteration = self.best_iteration
+
+    def stopped_by(self, n_estimators: int) -> str:
+        if self.stopped_by_budget:
+            return STOP_TIME_BUDGET
+        return STOP_N_ESTIMATORS if len(self.rounds["iteration"]) >= n_estimators else STOP_EARLY_STOPPING
+
+    def report(self, n_estimators: int, n_trees: int, **extra) -> dict:
+        """Summary and per-round columns, as written to the telemetry file."""
+        rounds = len(self.rounds["iteration"])
+        return {
+            "rounds": rounds,
+            "n_estimators": n_estimators,
+            "n_trees": n_trees,
+            "stopped_by": self.stopped_by(n_estimators),
+            "best_iteration": self.best_iteration,
+            f"best_{self.metric}": self.best_score,
+            "seconds": round(self.seconds, 3),
+            "rows": self.n_rows,
+            "mean_rows_per_s": round(self.n_rows * rounds / self.seconds) if self.seconds > 0 else None,
+            **extra,
+            "per_round": self.rounds,
+        }
+
+    def save(self, path: str, n_estimators: int, n_trees: int, **extra) -> dict:
+        report = self.report(n_estimators, n_trees, **extra)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(report, f)
+        os.replace(tmp_path, path)
+        return report
+
+
+def training_callbacks(config, n_rows: int, checkpoint_path: str | None) -> list:
+    """EarlyStopping (keeping the best iteration) and TrainingTelemetry from config."""
+    callbacks = []
+    rounds = config.get("early_stopping_rounds") or 0
+    if rounds > 0:
+        callbacks.append(xgb.callback.EarlyStopping(rounds=rounds, metric_name="auc", maximize=True,
+                                                    save_best=True))
+    callbacks.append(TrainingTelemetry(n_rows, config.get("training_time_budget_s"), checkpoint_path,
+                                       config.get("checkpoint_every") or 50))
+    return callbacks
+
+
+def early_stopping_split(X_train, y_train, config) -> tuple:
+    """(X_fit, y_fit, eval_set) of run_training.
+
+    With early stopping on, a validation split of the training rows (split like the
+    train/test split) is the eval set. Otherwise every training row is fit and there is
+    no eval set.
+    """
+    if not (config.get("early_stopping_rounds") or 0) > 0:
+        return X_train, y_train, None
+    X_fit, X_valid, y_fit, y_valid = train_test_split(
+        X_train, y_train,
+        test_size=config["test_size"],
+        random_state=config["random_state"],
+        stratify=y_train,
+    )
+    return X_fit, y_fit, [(X_valid, y_valid)]
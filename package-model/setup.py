@@ -12,7 +12,8 @@ setup(
     description="XGBoost model for Olist negative review prediction",
     author="Equipo MLOps",
     packages=find_packages(exclude=["tests"]),
-    package_data={"olist_review_model": ["config/*.yml", "trained_models/*"]},
+    package_data={"olist_review_model": ["config/*.yml", "config/*.json", "config/profiles/*.yml",
+                                         "trained_models/*"]},
     install_requires=install_requires,
     python_requires=">=3.10",
 )
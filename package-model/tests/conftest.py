@@ -2,7 +2,11 @@
 Test fixtures for the Olist review model package.
 """
 
+import joblib
+import numpy as np
+import pandas as pd
 import pytest
+import xgboost as xgb
 
 from olist_review_model.pipeline import load_config
 
@@ -34,3 +38,64 @@ def sample_input():
 def config():
     """Load model config."""
     return load_config()
+
+
+@pytest.fixture(scope="session")
+def tiny_model():
+    """A small XGBoost classifier trained on random data with the 16 model features."""
+    features = list(load_config()["features"])
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(400, len(features))), columns=features)
+    y = (X["delivery_delta_days"] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    model = xgb.XGBClassifier(n_estimators=20, max_depth=4, random_state=42)
+    model.fit(X, y)
+    return model
+
+
+@pytest.fixture
+def tiny_model_dir(tmp_path, tiny_model, config):
+    """A model directory holding `tiny_model` under the configured file name."""
+    joblib.dump(tiny_model, tmp_path / config["trained_model_file"])
+    return tmp_path
+
+
+@pytest.fixture
+def tiny_handle(tiny_model_dir, monkeypatch):
+    """Registry handle for `tiny_model`, also served by the prediction entry points."""
+    from olist_review_model.registry import ModelRegistry
+
+    registry = ModelRegistry(str(tiny_model_dir))
+    monkeypatch.setattr("olist_review_model.predict.get_model", registry.get)
+    return registry.get()
+
+
+@pytest.fixture
+def raw_data_dir(tmp_path, config):
+    """A data directory with two-order versions of every raw Olist CSV."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    frames = {
+        "reviews": {"review_id": ["r1", "r2"], "order_id": ["o1", "o2"], "review_score": [1, 5],
+                    "review_comment_title": [None, "Ótimo"], "review_comment_message": ["Nunca chegou!", "Chegou antes"]},
+        "orders": {"order_id": ["o1", "o2"], "customer_id": ["c1", "c2"], "order_status": ["delivered"] * 2,
+                   "order_purchase_timestamp": ["2017-03-10 00:25:25", "2017-01-06 23:20:44"],
+                   "order_delivered_carrier_date": ["2017-03-11 15:58:25", "2017-01-11 10:30:00"],
+                   "order_delivered_customer_date": ["2017-03-29 18:19:47", ""],
+                   "order_estimated_delivery_date": ["2017-03-16 00:00:00", "2017-01-26 00:00:00"]},
+        "customers": {"customer_id": ["c1", "c2"], "customer_zip_code_prefix": [1310, 22290],
+                      "customer_city": ["sao paulo", "rio de janeiro"]},
+        "order_items": {"order_id": ["o1", "o2"], "order_item_id": [1, 1], "product_id": ["p1", "p2"],
+                        "seller_id": ["s1", "s1"], "price": [85.64, 72.97], "freight_value": [4.81, 11.58]},
+        "sellers": {"seller_id": ["s1"], "seller_zip_code_prefix": [1310], "seller_city": ["sao paulo"]},
+        "products": {"product_id": ["p1", "p2"], "product_category_name": ["a", "b"],
+                     "product_description_lenght": [2049.0, None], "product_photos_qty": [1.0, 2.0],
+                     "product_weight_g": [500.0, 300.0]},
+        "categories": {"product_category_name": ["a", "b"], "product_category_name_english": ["A", "B"]},
+        "geolocation": {"geolocation_zip_code_prefix": [1310, 1310, 22290], "geolocation_lat": [-23.56, -23.57, -22.98],
+                        "geolocation_lng": [-46.65, -46.66, -43.19], "geolocation_state": ["SP", "SP", "RJ"]},
+        "payments": {"order_id": ["o1", "o2", "o2"], "payment_sequential": [1, 1, 2],
+                     "payment_installments": [3, 1, 2], "payment_value": [90.45, 50.0, 34.55]},
+    }
+    for key, filename in config["data_files"].items():
+        pd.DataFrame(frames[key]).to_csv(data_dir / filename, index=False)
+    return data_dir
@@ -0,0 +1,144 @@
+"""
+Unit tests for model compaction: truncation, pruning, distillation and the compact serving model.
+"""
+
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+
+from olist_review_model.compaction import compact, count_nodes, distill, prune, save_compact, truncate
+from olist_review_model.registry import ModelRegistry, serving_model_files
+
+
+@pytest.fixture
+def split(config):
+    """Train/test rows whose target follows delivery_delta_days."""
+    features = list(config["features"])
+    rng = np.random.default_rng(7)
+    X = pd.DataFrame(rng.normal(size=(600, len(features))).astype(np.float32), columns=features)
+    y = (X["delivery_delta_days"] + rng.normal(scale=0.5, size=600) > 0).astype(int).to_numpy()
+    return X[:400], y[:400], X[400:], y[400:]
+
+
+@pytest.fixture
+def deep_model(split):
+    X_train, y_train, _, _ = split
+    return xgb.XGBClassifier(n_estimators=40, max_depth=8, random_state=42).fit(X_train, y_train)
+
+
+@pytest.fixture
+def fast_benchmark(monkeypatch):
+    monkeypatch.setattr("olist_review_model.model_benchmark.resident_size", lambda model, X: None)
+
+
+def test_truncate_keeps_shortest_prefix_within_loss(deep_model, split):
+    """Test that truncation keeps the first rounds of the booster when they are within the AUC loss."""
+    _, _, X_test, y_test = split
+    truncated = truncate(deep_model, X_test, y_test, max_auc_loss=1.0)  # any held-out rows will do
+
+    assert truncated.get_booster().num_boosted_rounds() == 2
+    expected = deep_model.get_booster().predict(xgb.DMatrix(X_test), iteration_range=(0, 2))
+    np.testing.assert_allclose(truncated.predict_proba(X_test)[:, 1], expected, rtol=1e-6)
+    assert truncate(deep_model, X_test, y_test, max_auc_loss=-1.0) is None
+
+
+def test_prune_drops_low_gain_nodes(deep_model, split):
+    """Test that pruning removes low-gain splits from the stored trees and shrinks the model."""
+    X_train, y_train, X_test, _ = split
+    pruned = prune(deep_model, X_train, y_train, gamma=5.0)
+
+    assert count_nodes(pruned) < count_nodes(deep_model)
+    assert len(pruned.get_booster().save_raw("ubj")) < len(deep_model.get_booster().save_raw("ubj"))
+    assert pruned.get_booster().feature_names == deep_model.get_booster().feature_names
+    assert prune(deep_model, X_train, y_train, gamma=0.0).predict_proba(X_test).shape == (len(X_test), 2)
+
+
+def test_distill_fits_shallow_student(deep_model, split):
+    """Test that distillation fits a shallow model that follows the full model's probabilities."""
+    X_train, _, X_test, _ = split
+    student = distill(deep_model, X_train, {"n_estimators": 30, "max_depth": 2, "learning_rate": 0.3})
+
+    assert student.get_booster().num_boosted_rounds() == 30
+    assert count_nodes(student) <= 30 * 7
+    teacher, pupil = deep_model.predict_proba(X_test)[:, 1], student.predict_proba(X_test)[:, 1]
+    assert np.corrcoef(teacher, pupil)[0, 1] > 0.8
+
+
+def test_compact_report_and_saved_serving_model(deep_model, split, config, tmp_path, fast_benchmark):
+    """Test that compaction selects a candidate within the AUC loss and saves it next to the full model."""
+    compaction = {"max_auc_loss": 0.05, "methods": ["truncate", "prune", "distill"], "prune_gamma": [5.0],
+                  "distill": {"n_estimators": 20, "max_depth": 2, "learning_rate": 0.3}}
+    cfg = dict(config, compaction=compaction)
+    report = compact(deep_model, *split, cfg)
+
+    assert [c.method for c in report.candidates] == ["truncate", "prune", "distill"]
+    assert report.selected is not None
+    assert report.valid_auc_loss(report.selected) <= 0.05
+    assert "selected:" in report.format()
+
+    X_test = split[2].to_numpy(dtype=np.float32)
+    path = save_compact(report, X_test, cfg, model_dir=str(tmp_path))
+    saved = json.loads((tmp_path / cfg["compaction_report_file"]).read_text())
+    assert saved["selected"] == report.selected.name
+    assert {row["name"] for row in saved["candidates"]} >= {"full", report.selected.name}
+    assert all({"auc_loss", "valid_auc_loss", "latency_gain", "size_gain"} <= set(row) for row in saved["candidates"])
+    np.testing.assert_allclose(joblib.load(path).predict_proba(X_test)[:, 1],
+                               report.selected.model.predict_proba(X_test)[:, 1])
+    assert (tmp_path / cfg["compact_flat_model_file"]).exists()
+
+    metadata = json.loads((tmp_path / "olist_xgb_model.compact.metadata.json").read_text())
+    assert metadata["source_model"] == cfg["trained_model_file"]
+    assert metadata["compaction_method"] == report.selected.method
+
+
+def test_compact_truncates_on_validation_rows(deep_model, split, config, monkeypatch, fast_benchmark):
+    """Test that the truncation prefix is picked on a validation split of the training rows, not the test rows."""
+    seen = []
+    monkeypatch.setattr("olist_review_model.compaction.truncate",
+                        lambda model, X, y, max_auc_loss: seen.append(X) or truncate(model, X, y, max_auc_loss))
+    X_train, _, X_test, y_test = split
+    report = compact(deep_model, *split, dict(config, compaction={"max_auc_loss": 1.0, "methods": ["truncate"]}))
+
+    assert len(seen[0]) == round(len(X_train) * config["test_size"])
+    assert set(seen[0].index) <= set(X_train.index) and not set(seen[0].index) & set(X_test.index)
+    truncated = report.candidates[0]
+    assert truncated.roc_auc == pytest.approx(roc_auc_score(y_test, truncated.model.predict_proba(X_test)[:, 1]))
+
+
+def test_compact_selects_on_validation_auc_loss(deep_model, split, config, fast_benchmark):
+    """Test that candidates are accepted on their validation AUC loss, not on their test AUC."""
+    X_train, y_train, X_test, y_test = split
+    compaction = {"max_auc_loss": 0.0, "methods": ["distill"],
+                  "distill": {"n_estimators": 2, "max_depth": 1, "learning_rate": 0.3}}
+    # Inverted test labels: the weak student gains test AUC over the full model but loses validation AUC
+    report = compact(deep_model, X_train, y_train, X_test, 1 - y_test, dict(config, compaction=compaction))
+    student = report.candidates[0]
+
+    assert student.roc_auc > report.full.roc_auc
+    assert report.valid_auc_loss(student) > 0
+    assert report.selected is None
+    assert report.rows()[1]["within_auc_loss"] is False
+
+
+def test_compact_rejects_unknown_method(deep_model, split, config):
+    """Test that an unknown compaction method is an error."""
+    with pytest.raises(ValueError, match="Unknown compaction method"):
+        compact(deep_model, *split, dict(config, compaction={"max_auc_loss": 0.01, "methods": ["quantize"]}))
+
+
+def test_registry_serves_compact_model(tiny_model_dir, tiny_model, config, monkeypatch):
+    """Test that serving_model: compact makes the compact file the default model while the full one stays."""
+    joblib.dump(tiny_model, tiny_model_dir / config["compact_model_file"])
+    monkeypatch.setattr("olist_review_model.registry.load_config", lambda: dict(config, serving_model="compact"))
+    registry = ModelRegistry(str(tiny_model_dir))
+
+    assert registry.get().name == config["compact_model_file"]
+    assert registry.get(config["trained_model_file"]).name == config["trained_model_file"]
+    assert serving_model_files(config) == (config["trained_model_file"], config["flat_model_file"])
+    with pytest.raises(ValueError, match="Unknown serving model"):
+        serving_model_files(dict(config, serving_model="tiny"))
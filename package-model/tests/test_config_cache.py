@@ -0,0 +1,89 @@
+"""
+Unit tests for memoized configuration loading.
+"""
+
+import json
+import os
+
+import pytest
+
+from olist_review_model.config_cache import CachedFile
+from olist_review_model.pipeline import load_config, load_feature_medians
+
+
+def _counting_parser(calls):
+    def parse(raw):
+        calls.append(raw)
+        return json.loads(raw)
+    return parse
+
+
+def _rewrite(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_file_is_parsed_once(tmp_path):
+    """Test that repeated reads of an unchanged file reuse the same snapshot."""
+    path = tmp_path / "medians.json"
+    path.write_text('{"price": 1.0}')
+    calls = []
+    cached = CachedFile(str(path), _counting_parser(calls))
+    assert cached.snapshot() is cached.snapshot()
+    assert len(calls) == 1
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    """Test that a content change produces a new snapshot."""
+    path = tmp_path / "medians.json"
+    _rewrite(path, '{"price": 1.0}', 1_000_000_000)
+    calls = []
+    cached = CachedFile(str(path), _counting_parser(calls))
+    assert cached.snapshot().data["price"] == 1.0
+
+    _rewrite(path, '{"price": 2.0}', 2_000_000_000)
+    assert cached.snapshot().data["price"] == 2.0
+    assert len(calls) == 2
+
+
+def test_touched_file_is_not_reparsed(tmp_path):
+    """Test that an mtime change with identical content keeps the parsed data."""
+    path = tmp_path / "medians.json"
+    _rewrite(path, '{"price": 1.0}', 1_000_000_000)
+    calls = []
+    cached = CachedFile(str(path), _counting_parser(calls))
+    first = cached.snapshot()
+
+    _rewrite(path, '{"price": 1.0}', 2_000_000_000)
+    second = cached.snapshot()
+    assert second is not first
+    assert second.data is first.data
+    assert len(calls) == 1
+
+
+def test_missing_file_uses_default(tmp_path):
+    """Test that a missing file yields the default until it is created."""
+    path = tmp_path / "medians.json"
+    cached = CachedFile(str(path), json.loads, default={})
+    assert dict(cached.snapshot().data) == {}
+
+    path.write_text('{"price": 3.0}')
+    assert cached.snapshot().data["price"] == 3.0
+
+
+def test_snapshot_is_immutable():
+    """Test that the shared config cannot be modified by callers."""
+    config = load_config()
+    assert load_config() is config
+    with pytest.raises(TypeError):
+        config["target"] = "other"
+    with pytest.raises(TypeError):
+        config["hyperparameters"]["max_depth"] = 3
+    assert isinstance(config["features"], tuple)
+
+
+def test_load_feature_medians_returns_mapping():
+    """Test that medians load as a mapping even before training."""
+    medians = load_feature_medians()
+    assert medians is load_feature_medians()
+    assert all(isinstance(value, float) for value in medians.values())
@@ -0,0 +1,45 @@
+"""
+Unit tests for the distance metrics.
+"""
+
+import numpy as np
+import pytest
+
+from olist_review_model.distance import DISTANCE_METRICS, distance_km, distance_km_scalar
+
+SAO_PAULO = (-23.55, -46.63)
+RIO = (-22.91, -43.17)
+
+
+def test_haversine_known_distance():
+    """Test São Paulo - Rio de Janeiro against its known great-circle distance (~361 km)."""
+    assert distance_km(*SAO_PAULO, *RIO, metric="haversine") == pytest.approx(361, abs=2)
+
+
+@pytest.mark.parametrize("metric", DISTANCE_METRICS)
+def test_vectorized_matches_scalar(metric):
+    """Test that the array and scalar variants agree for every metric."""
+    rng = np.random.default_rng(0)
+    lat1, lat2 = rng.uniform(-33, 5, (2, 200))
+    lng1, lng2 = rng.uniform(-73, -35, (2, 200))
+    vectorized = distance_km(lat1, lng1, lat2, lng2, metric=metric)
+    scalar = [distance_km_scalar(*args, metric=metric) for args in zip(lat1, lng1, lat2, lng2)]
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-12)
+
+
+def test_metrics_agree_on_short_distances():
+    """Test that equirectangular stays within 0.1% of haversine for a ~360 km trip."""
+    haversine = distance_km(*SAO_PAULO, *RIO, metric="haversine")
+    assert distance_km(*SAO_PAULO, *RIO, metric="equirectangular") == pytest.approx(haversine, rel=1e-3)
+
+
+def test_nan_and_unknown_metric():
+    """Test that missing coordinates give NaN and unknown metrics are rejected."""
+    assert np.isnan(distance_km([np.nan], [0.0], [1.0], [1.0], metric="haversine")).all()
+    with pytest.raises(ValueError, match="Unknown distance metric"):
+        distance_km(0, 0, 1, 1, metric="manhattan")
+
+
+def test_default_metric_comes_from_config(config):
+    """Test that the configured metric is used when none is given."""
+    assert distance_km(*SAO_PAULO, *RIO) == distance_km(*SAO_PAULO, *RIO, metric=config["distance_metric"])
@@ -0,0 +1,129 @@
+"""
+Unit tests for the parallel experiment runner.
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from olist_review_model.experiments import (
+    Experiment,
+    SharedMatrix,
+    format_results,
+    grid,
+    load_grid,
+    main,
+    run_experiment,
+    run_experiments,
+    select_result,
+)
+
+
+@pytest.fixture
+def matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 16)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(scale=0.5, size=400) > 1).astype(np.int8)
+    return SharedMatrix.save(str(tmp_path / "matrix"), X_train=X[:300], X_test=X[300:],
+                             y_train=y[:300], y_test=y[300:])
+
+
+def test_grid_expands_list_params():
+    """Test that list-valued params expand into one named experiment per combination."""
+    experiments = grid("xgboost", max_depth=[2, 4], learning_rate=[0.1, 0.3], n_estimators=10)
+
+    assert len(experiments) == 4
+    assert experiments[0] == Experiment("xgboost-max_depth=2-learning_rate=0.1", "xgboost",
+                                        {"max_depth": 2, "learning_rate": 0.1, "n_estimators": 10})
+    assert grid("random_forest", "rf", n_estimators=5)[0].name == "rf"
+    with pytest.raises(ValueError, match="Unknown model"):
+        grid("svm")
+
+
+def test_load_grid(tmp_path):
+    """Test that a YAML grid file lists the experiments of every entry."""
+    path = tmp_path / "grid.yml"
+    path.write_text("- model: xgboost\n  params: {max_depth: [2, 3]}\n- model: random_forest\n  name: rf\n")
+    assert [e.name for e in load_grid(str(path))] == ["xgboost-max_depth=2", "xgboost-max_depth=3", "rf"]
+
+
+def test_shared_matrix_is_memory_mapped(matrix):
+    """Test that workers get read-only memory maps of the saved arrays."""
+    arrays = matrix.load()
+    assert isinstance(arrays["X_train"], np.memmap)
+    assert arrays["X_train"].shape == (300, 16)
+    assert not arrays["X_train"].flags.writeable
+
+
+def test_run_experiment_reports_metrics(matrix):
+    """Test that one run trains on the shared matrix and reports test metrics and timings."""
+    result = run_experiment(matrix.directory, Experiment("xgb", "xgboost", {"n_estimators": 20}), n_jobs=1)
+
+    assert result.error is None
+    assert set(result.metrics) == {"roc_auc", "f1", "precision", "recall"}
+    assert result.metrics["roc_auc"] > 0.8
+    assert 0 < result.fit_seconds <= result.seconds
+    assert result.benchmark["single_row_p99_ms"] > 0
+
+
+def test_select_result_applies_latency_rule(matrix):
+    """Test that the selected run is the best AUC among runs within the p99 limit."""
+    results = [run_experiment(matrix.directory, e) for e in grid("xgboost", n_estimators=[2, 20], max_depth=2)]
+    best = max(results, key=lambda r: r.metrics["roc_auc"])
+
+    assert select_result(results) is best
+    assert select_result(results, max_p99_ms=1e6) is best
+    assert select_result(results, max_p99_ms=0) is None
+
+
+def test_failed_run_is_recorded(matrix):
+    """Test that an invalid config becomes an error result instead of raising."""
+    result = run_experiment(matrix.directory, Experiment("bad", "random_forest", {"n_estimators": -1}))
+    assert result.error and not result.metrics
+
+
+def test_run_experiments_collects_results_in_order(matrix, tmp_path):
+    """Test that concurrent runs come back in input order and are appended to the output file."""
+    experiments = grid("xgboost", n_estimators=[5, 10], max_depth=2) + grid("random_forest", "rf", n_estimators=10)
+    output = str(tmp_path / "runs.jsonl")
+    results = run_experiments(experiments, matrix, cpu_budget=2, output=output)
+
+    assert [r.name for r in results] == [e.name for e in experiments]
+    assert all(r.error is None and r.n_jobs == 1 for r in results)
+    with open(output) as f:
+        assert sorted(json.loads(line)["name"] for line in f) == sorted(e.name for e in experiments)
+    assert format_results(results).splitlines()[0].startswith("experiment")
+
+
+def test_run_experiments_benchmarks_serially_after_the_sweep(matrix, monkeypatch):
+    """Test that the models are benchmarked one at a time in the parent process, not in the workers."""
+    calls = []
+
+    def fake_benchmark(model, X):
+        calls.append(os.getpid())
+        return SimpleNamespace(as_dict=lambda: {"single_row_p99_ms": 1.0})
+
+    monkeypatch.setattr("olist_review_model.experiments.benchmark_model", fake_benchmark)
+    experiments = grid("xgboost", n_estimators=[5, 10], max_depth=2)
+    results = run_experiments(experiments, matrix, cpu_budget=2)
+
+    assert calls == [os.getpid()] * len(experiments)
+    assert all(r.benchmark == {"single_row_p99_ms": 1.0} for r in results)
+    assert all(not r.benchmark for r in run_experiments(experiments, matrix, cpu_budget=2, benchmark=False))
+
+
+def test_main_runs_grid_file(matrix, tmp_path, monkeypatch, capsys):
+    """Test the CLI: grid file in, results table out and one JSON line per run."""
+    monkeypatch.setattr("olist_review_model.experiments.build_matrix", lambda directory, use_stage_cache: matrix)
+    path = tmp_path / "grid.yml"
+    path.write_text("- model: random_forest\n  params: {n_estimators: [3, 5]}\n")
+    output = tmp_path / "runs.jsonl"
+
+    assert main(["--grid", str(path), "--cpu-budget", "2", "-o", str(output)]) == 0
+    assert len(output.read_text().splitlines()) == 2
+    out = capsys.readouterr().out
+    assert "random_forest-n_estimators=3" in out
+    assert "selected (" in out
@@ -0,0 +1,42 @@
+"""
+Unit tests for the explanation engines.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist_review_model.explain import explain, get_explainer
+from olist_review_model.predict import make_prediction_with_shap
+
+
+def test_native_matches_shap(tiny_handle, config):
+    """Test that native pred_contribs match shap.TreeExplainer values."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(50, 16)), columns=config["features"])
+    native = explain(tiny_handle, X, engine="native")
+    reference = explain(tiny_handle, X, engine="shap")
+    assert native.shape == (50, 16)
+    np.testing.assert_allclose(native, reference, atol=1e-4)
+
+
+def test_explainer_is_cached_per_model(tiny_handle):
+    """Test that the shap explainer is built once per model handle."""
+    assert get_explainer(tiny_handle) is get_explainer(tiny_handle)
+
+
+def test_unknown_engine_raises(tiny_handle, config):
+    """Test that an unknown engine name is rejected."""
+    X = pd.DataFrame(np.zeros((1, 16)), columns=config["features"])
+    with pytest.raises(ValueError):
+        explain(tiny_handle, X, engine="lime")
+
+
+def test_prediction_with_shap_same_for_both_engines(tiny_handle, sample_input):
+    """Test that make_prediction_with_shap returns the same output for both engines."""
+    native = make_prediction_with_shap(sample_input, engine="native")
+    reference = make_prediction_with_shap(sample_input, engine="shap")
+    assert native["probability"] == reference["probability"]
+    expected = {c["feature"]: c["shap_value"] for c in reference["shap_contributions"]}
+    for c in native["shap_contributions"]:
+        assert c["shap_value"] == pytest.approx(expected[c["feature"]], abs=1e-3)
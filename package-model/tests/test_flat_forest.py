@@ -0,0 +1,62 @@
+"""
+Unit tests for the flat-array tree evaluator.
+"""
+
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from olist_review_model.flat_forest import export_flat_forest, load_flat_forest
+from olist_review_model.predict import make_multiple_predictions, make_prediction
+
+
+@pytest.fixture
+def features_with_missing(config):
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(300, len(config["features"]))).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X
+
+
+def test_flat_forest_matches_predict_proba(tiny_model, features_with_missing):
+    """Test that the flat evaluator reproduces XGBoost probabilities, missing values included."""
+    forest = export_flat_forest(tiny_model)
+    expected = tiny_model.predict_proba(features_with_missing)
+    np.testing.assert_allclose(forest.predict_proba(features_with_missing), expected, atol=1e-6)
+    assert forest.n_trees == 20
+    assert forest.max_depth <= 4
+
+
+def test_flat_forest_save_load_roundtrip(tiny_model, features_with_missing, tmp_path):
+    """Test that a saved flat forest scores identically after loading."""
+    forest = export_flat_forest(tiny_model)
+    path = tmp_path / "model.flat.npz"
+    forest.save(str(path))
+    loaded = load_flat_forest(str(path))
+    assert loaded.feature_names == forest.feature_names
+    np.testing.assert_array_equal(loaded.predict(features_with_missing), forest.predict(features_with_missing))
+
+
+def test_flat_backend_matches_numpy_backend(tiny_handle, tiny_model, tiny_model_dir, config, sample_input):
+    """Test that the flat backend is selectable in predict.py and agrees with XGBoost."""
+    export_flat_forest(tiny_model).save(str(tiny_model_dir / config["flat_model_file"]))
+    other = dict(sample_input, delivery_delta_days=-3.0)
+    assert make_prediction(sample_input, backend="flat") == make_prediction(sample_input, backend="numpy")
+    assert make_multiple_predictions([sample_input, other], backend="flat") == make_multiple_predictions(
+        [sample_input, other], backend="numpy"
+    )
+
+
+def test_flat_forest_scoring_does_not_import_xgboost(tiny_model, tmp_path):
+    """Test that loading and scoring a flat forest works without xgboost."""
+    path = tmp_path / "model.flat.npz"
+    export_flat_forest(tiny_model).save(str(path))
+    code = (
+        "import sys, numpy as np\n"
+        "from olist_review_model.flat_forest import load_flat_forest\n"
+        f"load_flat_forest({str(path)!r}).predict(np.zeros((2, 16)))\n"
+        "assert 'xgboost' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,46 @@
+"""
+Unit tests for the zip-prefix geolocation index.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist_review_model.geo_index import build_geo_index, load_geo_index, save_geo_index
+
+
+@pytest.fixture
+def geolocation():
+    return pd.DataFrame({
+        "geolocation_zip_code_prefix": [22290, 1310, 1310, 5000],
+        "geolocation_lat": [-22.98, -23.56, -23.58, -23.5],
+        "geolocation_lng": [-43.19, -46.65, -46.67, -46.6],
+    })
+
+
+def test_build_geo_index_matches_groupby_mean(geolocation):
+    """Test that the index holds the sorted per-prefix mean coordinates."""
+    index = build_geo_index(geolocation)
+    expected = geolocation.groupby("geolocation_zip_code_prefix").mean()
+    assert index.records["zip_prefix"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(index.records["lat"], expected["geolocation_lat"], rtol=1e-6)
+    np.testing.assert_allclose(index.records["lng"], expected["geolocation_lng"], rtol=1e-6)
+
+
+def test_lookup_handles_unknown_and_missing(geolocation):
+    """Test that unknown, out-of-range and missing prefixes resolve to NaN."""
+    lat, lng = build_geo_index(geolocation).lookup([1310, 99999, None, 0, 22290])
+    assert lat[0] == pytest.approx(-23.57)
+    assert np.isnan(lat[1:4]).all() and np.isnan(lng[1:4]).all()
+    assert lng[4] == pytest.approx(-43.19)
+
+
+def test_saved_index_is_memory_mapped(tmp_path, geolocation):
+    """Test that a saved index loads memory-mapped and gives the same distances."""
+    index = build_geo_index(geolocation)
+    path = str(tmp_path / "geo.npy")
+    save_geo_index(index, path)
+
+    loaded = load_geo_index(path)
+    assert isinstance(loaded.records, np.memmap)
+    np.testing.assert_allclose(loaded.distance_km([1310], [22290]), index.distance_km([1310], [22290]))
@@ -0,0 +1,187 @@
+"""
+Unit tests for incremental, month-partitioned maestro builds.
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from olist_review_model.geo_index import build_geo_index  # noqa: E402
+from olist_review_model.incremental import IncrementalMaestro  # noqa: E402
+from olist_review_model.pipeline import build_maestro, load_raw_data  # noqa: E402
+
+
+def _full_build(data: dict) -> pd.DataFrame:
+    """The lean maestro built from scratch, in the store's row order."""
+    df = build_maestro(data, build_geo_index(data["geolocation"]), lean=True)
+    df["order_id"] = df["order_id"].astype(str)
+    return df.sort_values(["order_purchase_timestamp", "order_id"], kind="stable").reset_index(drop=True)
+
+
+def _update(store: IncrementalMaestro, data: dict):
+    return store.update(data, store.update_geo_index(data["geolocation"]), lookback_days=3650)
+
+
+def _with_order(data: dict, order_id: str, like: str) -> dict:
+    """`data` plus a copy of order `like` under `order_id`."""
+    data = dict(data)
+    for table in ("reviews", "orders", "order_items", "payments"):
+        df = data[table]
+        copy = df[df["order_id"] == like].astype({"order_id": object}).assign(order_id=order_id)
+        data[table] = pd.concat([df.astype({"order_id": object}), copy], ignore_index=True)
+    return data
+
+
+def _backfilled(data: dict, order_id: str, like: str) -> dict:
+    """`data` plus a copy of order `like` purchased long before the watermark (a late import)."""
+    data = _with_order(data, order_id, like)
+    orders = data["orders"]
+    purchase = orders["order_purchase_timestamp"].where(orders["order_id"] != order_id, "2016-06-01 10:00:00")
+    data["orders"] = orders.assign(order_purchase_timestamp=purchase.astype(orders["order_purchase_timestamp"].dtype))
+    return data
+
+
+def _add_payment(payments: pd.DataFrame, amount: float) -> pd.DataFrame:
+    """`payments` with `amount` added to the last payment (of order o2), keeping the dtype."""
+    values = payments["payment_value"].copy()
+    values.iloc[-1] += amount
+    return payments.assign(payment_value=values)
+
+
+@pytest.fixture
+def data(raw_data_dir):
+    return load_raw_data(str(raw_data_dir))
+
+
+def test_first_update_stores_the_full_maestro(tmp_path, data):
+    """Test that the first update builds every order and the store loads as a full build."""
+    store = IncrementalMaestro(str(tmp_path))
+    report = _update(store, data)
+
+    assert report.full_rebuild
+    assert report.new_orders == 2
+    assert report.months == ["2017-01", "2017-03"]
+    assert store.watermark == "2017-03-10T00:25:25"
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+
+
+def test_unchanged_data_rebuilds_nothing(tmp_path, data):
+    """Test that an update without changes rewrites no month."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    report = _update(store, data)
+
+    assert not report.full_rebuild
+    assert (report.new_orders, report.changed_orders, report.removed_orders) == (0, 0, 0)
+    assert report.months == []
+
+
+def test_new_order_rewrites_only_its_month(tmp_path, data):
+    """Test that a new order is built alone and appended to its purchase month."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    data = _with_order(data, "o3", like="o1")
+    report = _update(store, data)
+
+    assert (report.new_orders, report.changed_orders, report.rebuilt_rows) == (1, 0, 1)
+    assert report.months == ["2017-03"]
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+    assert store.load(months=["2017-03"])["order_id"].tolist() == ["o1", "o3"]
+
+
+def test_changed_payment_rebuilds_its_order(tmp_path, data):
+    """Test that a changed payment row recomputes that order's payment aggregate."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    data["payments"] = _add_payment(data["payments"], 10)
+    report = _update(store, data)
+
+    assert (report.new_orders, report.changed_orders) == (0, 1)
+    assert report.months == ["2017-01"]
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+
+
+def test_orders_outside_lookback_are_final(tmp_path, data):
+    """Test that order rows older than the lookback window are not checked again."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    data["payments"] = _add_payment(data["payments"], 10)
+    report = store.update(data, lookback_days=30)
+
+    assert report.changed_orders == 0
+
+
+def test_backfilled_order_outside_lookback_is_added(tmp_path, data):
+    """Test that a new order purchased before the lookback window is still built and stored."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    data = _backfilled(data, "o3", like="o1")
+    report = store.update(data, lookback_days=30)
+
+    assert (report.new_orders, report.changed_orders) == (1, 0)
+    assert report.months == ["2016-06"]
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+    assert store.update(data, lookback_days=30).new_orders == 0
+
+
+def test_removed_and_backfilled_orders_in_one_update(tmp_path, data):
+    """Test that removing one stored order while backfilling another drops the first and adds the second."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, _with_order(data, "o3", like="o1"))
+    data = _backfilled(data, "o4", like="o2")
+    report = store.update(data, lookback_days=30)
+
+    assert (report.new_orders, report.removed_orders) == (1, 1)
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+
+
+def test_geolocation_change_rebuilds_orders_in_that_zip(tmp_path, data):
+    """Test that moving a zip prefix re-averages only it and rebuilds the orders referencing it."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    geo = data["geolocation"]
+    data["geolocation"] = geo.assign(geolocation_lat=geo["geolocation_lat"] + [0, 0, 1])
+    report = _update(store, data)
+
+    index = store.update_geo_index(data["geolocation"])
+    pd.testing.assert_frame_equal(pd.DataFrame(index.records),
+                                  pd.DataFrame(build_geo_index(data["geolocation"]).records))
+    assert report.changed_orders == 1  # only o2's customer lives in zip 22290
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+
+
+def test_removed_order_is_dropped(tmp_path, data):
+    """Test that an order missing from the raw data is removed from its month."""
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, _with_order(data, "o3", like="o1"))
+    report = _update(store, data)
+
+    assert report.removed_orders == 1
+    pd.testing.assert_frame_equal(store.load(), _full_build(data))
+
+
+def test_config_change_triggers_full_rebuild(tmp_path, data, monkeypatch):
+    """Test that changing the distance metric rebuilds the whole store."""
+    from olist_review_model import incremental
+
+    store = IncrementalMaestro(str(tmp_path))
+    _update(store, data)
+    config = dict(incremental.load_config(), distance_metric="euclidean_deg")
+    monkeypatch.setattr(incremental, "load_config", lambda: config)
+
+    assert _update(store, data).full_rebuild
+
+
+def test_training_stages_use_the_store(tmp_path, raw_data_dir, monkeypatch):
+    """Test that maestro_store_dir routes the maestro stage through the incremental store."""
+    from olist_review_model import train_pipeline
+    from olist_review_model.stages import StageRunner
+
+    base = dict(train_pipeline.load_config(), data_dir=str(raw_data_dir), raw_cache_dir=None)
+    monkeypatch.setattr(train_pipeline, "load_config", lambda: dict(base, maestro_store_dir=str(tmp_path / "store")))
+    outputs, _ = StageRunner(train_pipeline.training_stages(), None).run()
+
+    assert outputs["maestro"]["order_id"].tolist() == ["o2", "o1"]  # purchase month order
+    assert outputs["features"][1].tolist() == [1]
+    assert IncrementalMaestro(str(tmp_path / "store")).watermark == "2017-03-10T00:25:25"
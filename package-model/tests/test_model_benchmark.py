@@ -0,0 +1,86 @@
+"""
+Unit tests for the inference micro-benchmark and latency-aware selection.
+"""
+
+import numpy as np
+import pytest
+
+from olist_review_model.flat_forest import export_flat_forest
+from olist_review_model.model_benchmark import (
+    benchmark_model,
+    candidate_metadata,
+    load_metadata,
+    meets_rule,
+    metadata_path,
+    save_metadata,
+    select_candidate,
+)
+
+
+@pytest.fixture
+def X(sample_input, config):
+    row = [sample_input[feat] for feat in config["features"]]
+    return np.tile(np.asarray(row, dtype=np.float32), (50, 1))
+
+
+def _candidate(name, auc, p99_ms, size_mb=1.0):
+    return {"name": name, "metrics": {"roc_auc": auc},
+            "benchmark": {"single_row_p99_ms": p99_ms, "serialized_bytes": int(size_mb * 2**20)}}
+
+
+def test_benchmark_xgboost_model(tiny_model, X):
+    """Test that every serving cost is measured for an XGBoost model."""
+    result = benchmark_model(tiny_model, X, single_rows=50, batch_size=100, shap_rows=10)
+
+    assert 0 < result.single_row_p50_ms <= result.single_row_p99_ms
+    assert result.batch_size == 100 and result.batch_rows_per_s > 0
+    assert result.shap_ms_per_row > 0
+    assert result.serialized_bytes == len(tiny_model.get_booster().save_raw(raw_format="ubj"))
+    assert "p99" in result.format()
+
+
+def test_benchmark_flat_forest_has_no_shap(tiny_model, X):
+    """Test that a flat forest is benchmarked on its own predictor, without SHAP."""
+    flat = export_flat_forest(tiny_model)
+    result = benchmark_model(flat, X, single_rows=20, batch_size=100)
+
+    assert result.shap_ms_per_row is None
+    assert result.serialized_bytes == flat.nbytes
+
+
+def test_select_best_auc_within_latency():
+    """Test that selection takes the best AUC among candidates under the p99 and size limits."""
+    candidates = [_candidate("deep", 0.80, 8.0), _candidate("mid", 0.78, 2.0), _candidate("small", 0.70, 0.5, 0.1)]
+
+    assert select_candidate(candidates)["name"] == "deep"
+    assert select_candidate(candidates, max_p99_ms=5)["name"] == "mid"
+    assert select_candidate(candidates, max_p99_ms=5, max_size_mb=0.5)["name"] == "small"
+    assert select_candidate(candidates, max_p99_ms=0.1) is None
+    assert not meets_rule(candidates[0]["benchmark"], max_p99_ms=5)
+
+
+def test_metadata_round_trip(tmp_path, tiny_model, X, config):
+    """Test that candidate metadata is saved next to the model file and loaded back."""
+    model_path = str(tmp_path / "model.ubj")
+    metadata = candidate_metadata(tiny_model, X, {"roc_auc": 0.7}, dict(config, selection={"max_p99_ms": 1e6}),
+                                  model_file="model.ubj")
+    save_metadata(model_path, metadata)
+
+    assert metadata_path(model_path) == str(tmp_path / "model.metadata.json")
+    loaded = load_metadata(model_path)
+    assert loaded["model_file"] == "model.ubj"
+    assert loaded["selection"]["meets_rule"] is True
+    assert set(loaded["benchmark"]) >= {"single_row_p50_ms", "single_row_p99_ms", "batch_rows_per_s",
+                                        "shap_ms_per_row", "serialized_bytes", "resident_bytes"}
+    assert load_metadata(str(tmp_path / "other.ubj")) == {}
+
+
+def test_registry_exposes_metadata(tiny_model_dir):
+    """Test that the registry handle carries the metadata saved next to the model."""
+    from olist_review_model.registry import ModelRegistry
+
+    handle = ModelRegistry(str(tiny_model_dir)).get()
+    save_metadata(handle.path, {"metrics": {"roc_auc": 0.7}, "benchmark": {"single_row_p99_ms": 1.0}})
+    info = ModelRegistry(str(tiny_model_dir)).get().info()
+    assert info["metrics"] == {"roc_auc": 0.7}
+    assert info["benchmark"]["single_row_p99_ms"] == 1.0
@@ -0,0 +1,47 @@
+"""
+Unit tests for raw data loading and the maestro build.
+"""
+
+import pandas as pd
+
+from olist_review_model.pipeline import build_maestro, load_raw_data, prepare_training_data
+
+
+def test_load_raw_data_applies_schema(raw_data_dir, config):
+    """Test that files are loaded with the usecols, dtypes and date formats of data_schema."""
+    data = load_raw_data(str(raw_data_dir))
+
+    assert list(data) == list(config["data_files"])
+    orders = data["orders"]
+    assert list(orders.columns) == list(config["data_schema"]["orders"]["usecols"])
+    assert isinstance(orders["order_id"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(orders["order_purchase_timestamp"])
+    assert orders["order_delivered_customer_date"].isna().tolist() == [False, True]
+    assert data["order_items"]["price"].dtype == "float32"
+    assert "geolocation_state" not in data["geolocation"]
+    assert list(data["categories"].columns) == ["product_category_name", "product_category_name_english"]
+
+
+def test_typed_load_builds_same_features(raw_data_dir, config):
+    """Test that the typed and untyped loads give the same model features."""
+    features = list(config["features"])
+    typed = build_maestro(load_raw_data(str(raw_data_dir)))[features]
+    untyped = build_maestro(load_raw_data(str(raw_data_dir), typed=False, max_workers=1))[features]
+    pd.testing.assert_frame_equal(typed.astype(float), untyped.astype(float), atol=1e-3, check_exact=False)
+
+
+def test_lean_maestro_matches_full_build(raw_data_dir, config):
+    """Test that the lean maestro keeps the same rows and feature values with fewer columns."""
+    features = list(config["features"])
+    data = load_raw_data(str(raw_data_dir))
+    full = build_maestro(data, lean=False)
+    lean = build_maestro(data, lean=True)
+
+    assert set(lean.columns) < set(full.columns)
+    assert lean["order_id"].astype(str).tolist() == full["order_id"].astype(str).tolist()
+    pd.testing.assert_frame_equal(
+        lean[features].astype(float), full[features].astype(float), atol=1e-3, check_exact=False
+    )
+    pd.testing.assert_series_equal(
+        prepare_training_data(lean)["is_negative"], prepare_training_data(full)["is_negative"]
+    )
@@ -2,7 +2,15 @@
 Unit tests for the prediction module.
 """
 
-from olist_review_model.predict import make_prediction, make_multiple_predictions
+import pandas as pd
+import pytest
+
+from olist_review_model.predict import (
+    make_multiple_predictions,
+    make_multiple_predictions_with_shap,
+    make_prediction,
+    make_prediction_with_shap,
+)
 
 
 def test_make_prediction_returns_expected_keys(sample_input):
@@ -40,3 +48,38 @@ def test_make_multiple_predictions(sample_input):
 def test_config_features_count(config):
     """Test that config has the expected 16 features."""
     assert len(config["features"]) == 16
+
+
+def test_make_multiple_predictions_with_shap_matches_single(tiny_handle, sample_input):
+    """Test that batch scoring returns the same output as single scoring."""
+    other = dict(sample_input, delivery_delta_days=-3.0, word_count=2.0)
+    batch = make_multiple_predictions_with_shap([sample_input, other])
+    assert len(batch["predictions"]) == 2
+    for inp, pred in zip([sample_input, other], batch["predictions"]):
+        single = make_prediction_with_shap(inp)
+        assert pred["probability"] == single["probability"]
+        assert pred["is_negative"] == single["is_negative"]
+        assert pred["shap_contributions"] == single["shap_contributions"]
+
+
+def test_make_multiple_predictions_with_shap_accepts_dataframe(tiny_handle, sample_input, config):
+    """Test that a prebuilt feature frame can be scored directly."""
+    df = pd.DataFrame([sample_input] * 3)[list(config["features"])]
+    result = make_multiple_predictions_with_shap(df)
+    assert len(result["predictions"]) == 3
+    assert make_multiple_predictions_with_shap(df.iloc[:0])["predictions"] == []
+
+
+def test_numpy_backend_matches_pandas_backend(tiny_handle, sample_input):
+    """Test that the numpy fast path returns the same output as the DataFrame path."""
+    other = dict(sample_input, delivery_delta_days=-3.0, char_count=0.0)
+    assert make_prediction(sample_input, backend="numpy") == make_prediction(sample_input, backend="pandas")
+    assert make_multiple_predictions([sample_input, other], backend="numpy") == make_multiple_predictions(
+        [sample_input, other], backend="pandas"
+    )
+
+
+def test_unknown_backend_raises(sample_input):
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        make_prediction(sample_input, backend="onnx")
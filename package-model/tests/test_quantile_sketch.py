@@ -0,0 +1,89 @@
+"""
+Unit tests for the mergeable KLL quantile sketches.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist_review_model.pipeline import extract_features, feature_sketches, load_config
+from olist_review_model.quantile_sketch import DECILES, FeatureSketches, KLLSketch
+
+QS = np.linspace(0.05, 0.95, 19)
+
+
+def _rank_error(values: np.ndarray, estimates: np.ndarray) -> float:
+    """Largest distance between QS and the rank range of each estimate in `values`."""
+    values = np.sort(values)
+    low = np.searchsorted(values, estimates, side="left") / len(values)
+    high = np.searchsorted(values, estimates, side="right") / len(values)
+    return float(np.maximum(np.maximum(low - QS, QS - high), 0).max())
+
+
+def test_small_input_is_exact():
+    """Test that quantiles match numpy while nothing has been compacted."""
+    values = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch().update(values)
+    np.testing.assert_allclose(sketch.quantiles(QS), np.quantile(values, QS))
+    assert sketch.quantile(0.5) == np.median(values)
+
+
+def test_large_input_within_rank_error():
+    """Test that a large stream is summarized in few items within 1.5% rank error."""
+    values = np.random.default_rng(1).lognormal(size=500_000)
+    sketch = KLLSketch()
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+
+    assert sketch.n == len(values)
+    assert sketch.size < 2_000
+    assert _rank_error(values, sketch.quantiles(QS)) < 0.015
+    assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+
+def test_merged_chunks_match_single_pass():
+    """Test that merging per-chunk sketches gives a sketch of the union."""
+    values = np.random.default_rng(2).exponential(size=200_000)
+    merged = KLLSketch()
+    for seed, chunk in enumerate(np.array_split(values, 20)):
+        merged.merge(KLLSketch(seed=seed).update(chunk))
+
+    assert merged.n == len(values)
+    assert _rank_error(values, merged.quantiles(QS)) < 0.015
+
+    with pytest.raises(ValueError, match="Cannot merge"):
+        merged.merge(KLLSketch(k=100))
+
+
+def test_nan_is_ignored():
+    """Test that NaN values are not counted and an empty sketch has NaN quantiles."""
+    sketch = KLLSketch().update([1.0, np.nan, 3.0])
+    assert (sketch.n, sketch.quantile(0.5)) == (2, 2.0)
+    assert np.isnan(KLLSketch().quantile(0.5))
+
+
+def test_feature_sketches_round_trip(tmp_path):
+    """Test that saved feature sketches load back with the same quantiles and deciles."""
+    df = pd.DataFrame({"a": np.arange(1_000.0), "b": np.r_[np.full(500, np.nan), np.ones(500)]})
+    sketches = FeatureSketches(["a", "b"]).update(df)
+    path = str(tmp_path / "quantiles.json")
+    sketches.save(path)
+
+    with open(path) as f:
+        loaded = FeatureSketches.from_dict(json.load(f))
+    assert loaded.medians() == sketches.medians()
+    assert loaded.quantiles(DECILES) == sketches.quantiles(DECILES)
+    assert sketches.medians()["b"] == 1.0
+
+
+def test_extract_features_fills_with_sketch_medians(sample_input):
+    """Test that extract_features imputes NaN with the given (or sketched) medians."""
+    features = list(load_config()["features"])
+    df = pd.DataFrame([sample_input] * 3)
+    df.loc[0, "price"] = np.nan
+
+    assert extract_features(df)["price"].tolist() == [sample_input["price"]] * 3
+    assert extract_features(df, {"price": -1.0})["price"].iloc[0] == -1.0
+    assert set(feature_sketches(df).medians()) == set(features)
@@ -0,0 +1,97 @@
+"""
+Unit tests for the columnar raw-data cache.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from olist_review_model.pipeline import load_raw_data
+from olist_review_model.raw_cache import RawDataCache
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def orders_csv(tmp_path):
+    """A small orders CSV with string, numeric and missing values."""
+    path = tmp_path / "orders.csv"
+    pd.DataFrame({
+        "order_id": ["a1", "b2", "c3"],
+        "price": [10.5, None, 7.25],
+        "order_status": ["delivered", "shipped", "delivered"],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_cached_read_matches_csv(tmp_path, orders_csv):
+    """Test that a cached load returns the same frame as parsing the CSV."""
+    cache = RawDataCache(str(tmp_path / "cache"))
+    pd.testing.assert_frame_equal(cache.read_csv(str(orders_csv)), pd.read_csv(orders_csv))
+
+
+def test_warm_read_skips_csv_parsing(tmp_path, orders_csv, monkeypatch):
+    """Test that the second load reads the Feather copy, limited to the requested columns."""
+    cache = RawDataCache(str(tmp_path / "cache"))
+    cache.read_csv(str(orders_csv))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV parsed on a warm load")
+
+    monkeypatch.setattr(pd, "read_csv", fail)
+    df = RawDataCache(str(tmp_path / "cache")).read_csv(str(orders_csv), columns=["price"])
+    assert list(df.columns) == ["price"]
+    assert len(df) == 3
+
+
+def test_changed_csv_is_converted_again(tmp_path, orders_csv):
+    """Test that new CSV contents get a new cache entry and the stale one is removed."""
+    cache = RawDataCache(str(tmp_path / "cache"))
+    old_path = cache.cached_path(str(orders_csv))
+    cache.read_csv(str(orders_csv))
+
+    pd.DataFrame({"order_id": ["z9"], "price": [1.0], "order_status": ["canceled"]}).to_csv(orders_csv, index=False)
+    os.utime(orders_csv, ns=(0, os.stat(orders_csv).st_mtime_ns + 1_000_000))
+
+    df = cache.read_csv(str(orders_csv))
+    assert df["order_id"].tolist() == ["z9"]
+    assert cache.cached_path(str(orders_csv)) != old_path
+    assert not os.path.exists(old_path)
+
+
+def test_typed_and_untyped_copies_coexist(tmp_path, orders_csv, monkeypatch):
+    """Test that copies of one CSV read with different options do not evict each other."""
+    cache = RawDataCache(str(tmp_path / "cache"))
+    cache.read_csv(str(orders_csv))
+    cache.read_csv(str(orders_csv), dtype={"price": "float32"})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV parsed although its copy was cached")
+
+    monkeypatch.setattr(pd, "read_csv", fail)
+    assert cache.read_csv(str(orders_csv))["price"].dtype == "float64"
+    assert cache.read_csv(str(orders_csv), dtype={"price": "float32"})["price"].dtype == "float32"
+
+
+def test_same_named_csvs_of_other_dirs_coexist(tmp_path, orders_csv):
+    """Test that a CSV of another data dir with the same name keeps its own copy."""
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    other_csv = other_dir / "orders.csv"
+    pd.DataFrame({"order_id": ["z9"], "price": [1.0], "order_status": ["canceled"]}).to_csv(other_csv, index=False)
+
+    cache = RawDataCache(str(tmp_path / "cache"))
+    cache.read_csv(str(orders_csv))
+    cache.read_csv(str(other_csv))
+    assert os.path.exists(cache.cached_path(str(orders_csv)))
+    assert os.path.exists(cache.cached_path(str(other_csv)))
+
+
+def test_load_raw_data_through_cache(tmp_path, raw_data_dir):
+    """Test that load_raw_data returns the same typed frames with and without the cache."""
+    plain = load_raw_data(str(raw_data_dir))
+    cached = load_raw_data(str(raw_data_dir), cache_dir=str(tmp_path / "cache"))
+    assert plain.keys() == cached.keys()
+    for key in plain:
+        pd.testing.assert_frame_equal(cached[key], plain[key])
@@ -0,0 +1,63 @@
+"""
+Unit tests for the model registry.
+"""
+
+import pytest
+
+from olist_review_model.registry import ModelRegistry
+
+
+def test_registry_loads_model_once(tiny_model_dir):
+    """Test that repeated lookups return the same shared handle."""
+    registry = ModelRegistry(str(tiny_model_dir))
+    first = registry.get()
+    second = registry.get()
+    assert first is second
+    assert registry.loaded() == [first]
+
+
+def test_registry_handle_metadata(tiny_model_dir, config):
+    """Test that the handle exposes load time and model size."""
+    handle = ModelRegistry(str(tiny_model_dir)).get()
+    assert handle.name == config["trained_model_file"]
+    assert handle.load_seconds > 0
+    assert handle.size_bytes > 0
+    assert hasattr(handle.model, "predict_proba")
+
+
+def test_registry_handle_is_immutable(tiny_model_dir):
+    """Test that a shared handle cannot be modified."""
+    handle = ModelRegistry(str(tiny_model_dir)).get()
+    with pytest.raises(AttributeError):
+        handle.model = None
+
+
+def test_registry_evict_reloads(tiny_model_dir):
+    """Test that evicting a model forces a fresh load."""
+    registry = ModelRegistry(str(tiny_model_dir))
+    first = registry.get()
+    registry.evict()
+    assert registry.get() is not first
+
+
+def test_registry_missing_model_raises(tmp_path):
+    """Test that a missing model file raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        ModelRegistry(str(tmp_path)).get()
+
+
+def test_registry_digest_tracks_model_file(tiny_model_dir, config):
+    """Test that the handle digest is the model file's content digest and changes when it is rewritten."""
+    import joblib
+    import xgboost as xgb
+
+    from olist_review_model.raw_cache import file_digest
+
+    registry = ModelRegistry(str(tiny_model_dir))
+    path = tiny_model_dir / config["trained_model_file"]
+    assert registry.get().digest == file_digest(str(path))
+
+    joblib.dump(xgb.XGBClassifier(n_estimators=1).fit([[0.0], [1.0]], [0, 1]), path)
+    registry.evict()
+    assert registry.get().digest == file_digest(str(path))
+    assert registry.get().digest != ""
@@ -0,0 +1,91 @@
+"""
+Unit tests for the prediction result cache.
+"""
+
+import numpy as np
+import pytest
+
+from olist_review_model.result_cache import LRUCache, SQLiteCache, feature_keys, make_result_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_feature_keys_are_canonical():
+    """Test that equal feature vectors share a key regardless of dtype, sign of zero or NaN payload."""
+    a = np.array([[1, 0.0, np.nan]], dtype=np.float64)
+    b = np.array([[1.0, -0.0, float("nan")]], dtype=np.float32)
+    assert feature_keys("m:v", a) == feature_keys("m:v", b)
+    assert feature_keys("m:v", a) != feature_keys("other:v", a)
+    assert feature_keys("m:v", a) != feature_keys("m:v", np.array([[1.0, 0.0, 2.0]]))
+
+
+def test_lru_cache_counts_hits_and_misses():
+    """Test hit/miss counters."""
+    cache = LRUCache(max_size=2)
+    assert cache.get("a") is None
+    cache.set("a", {"probability": 0.5})
+    assert cache.get("a") == {"probability": 0.5}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted first."""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    """Test that entries older than the TTL are dropped."""
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=60, clock=clock)
+    cache.set("a", 1)
+    clock.now = 61
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Test that two processes (instances) on the same file see each other's entries."""
+    path = str(tmp_path / "results.sqlite")
+    writer = SQLiteCache(path, max_size=10)
+    reader = SQLiteCache(path, max_size=10)
+    writer.set("a", {"probability": 0.25, "shap_contributions": []})
+    assert reader.get("a") == {"probability": 0.25, "shap_contributions": []}
+
+
+def test_sqlite_cache_evicts_and_expires(tmp_path):
+    """Test size-based eviction and TTL in the SQLite backend."""
+    clock = FakeClock()
+    cache = SQLiteCache(str(tmp_path / "results.sqlite"), max_size=2, ttl_seconds=60, clock=clock)
+    cache.set("a", 1)
+    clock.now = 1
+    cache.set("b", 2)
+    clock.now = 2
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    clock.now = 100
+    assert cache.get("c") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_make_result_cache_rejects_unknown_backend():
+    """Test backend validation."""
+    assert isinstance(make_result_cache("memory"), LRUCache)
+    with pytest.raises(ValueError):
+        make_result_cache("redis")
+    with pytest.raises(ValueError):
+        make_result_cache("sqlite")
@@ -0,0 +1,110 @@
+"""
+Unit tests for the chunked file scoring CLI.
+"""
+
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from olist_review_model.predict import make_prediction
+from olist_review_model.score import main, read_chunks, score_file
+
+
+def _records(sample_input, n):
+    return [dict(sample_input, delivery_delta_days=float(i - n // 2)) for i in range(n)]
+
+
+def test_read_chunks_bounds_rows(tmp_path, sample_input):
+    """Test that files are read in chunks of at most chunk_size rows."""
+    path = tmp_path / "orders.csv"
+    pd.DataFrame(_records(sample_input, 5)).to_csv(path, index=False)
+    assert [len(chunk) for chunk in read_chunks(str(path), chunk_size=2)] == [2, 2, 1]
+
+
+def test_score_file_matches_single_predictions(tiny_handle, tmp_path, sample_input):
+    """Test that chunked JSONL scoring returns the same output as single scoring, in order."""
+    records = _records(sample_input, 5)
+    path = tmp_path / "orders.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    output = io.StringIO()
+    assert score_file(str(path), output, chunk_size=2, backend="numpy") == 5
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["row"] for r in results] == [0, 1, 2, 3, 4]
+    for record, result in zip(records, results):
+        assert result["probability"] == pytest.approx(make_prediction(record, backend="numpy")["probability"])
+
+
+def test_score_file_reports_bad_rows(tiny_handle, tmp_path, sample_input):
+    """Test that rows with missing or non-numeric features get an error record."""
+    records = _records(sample_input, 3)
+    records[1]["price"] = "abc"
+    del records[2]["word_count"]
+    path = tmp_path / "orders.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    output = io.StringIO()
+    score_file(str(path), output, backend="numpy")
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert "probability" in results[0]
+    assert results[1]["error"].endswith("price")
+    assert results[2]["error"].endswith("word_count")
+
+
+def test_main_writes_explanations(tiny_handle, tmp_path, sample_input):
+    """Test that the CLI writes SHAP contributions with --explain."""
+    src, out = tmp_path / "orders.csv", tmp_path / "scores.jsonl"
+    pd.DataFrame(_records(sample_input, 3)).to_csv(src, index=False)
+
+    assert main([str(src), "-o", str(out), "--explain"]) == 0
+
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(results) == 3
+    assert all(len(r["shap_contributions"]) == 16 for r in results)
+
+
+def test_read_chunks_rejects_unknown_extension(tmp_path):
+    """Test that unsupported input formats fail clearly."""
+    with pytest.raises(ValueError, match="Unsupported"):
+        list(read_chunks(str(tmp_path / "orders.parquet")))
+
+
+HYBRID_ORDER = {
+    "delivery": {"purchase_date": "2024-01-01T10:00:00-03:00", "promised_date": "2024-01-08T23:59:59-03:00",
+                 "delivered_date": "2024-01-12T15:30:00Z"},
+    "financials": {"order_total": 189.90, "shipping_cost": 24.50, "payment_installments": 3},
+    "location": {"distance_km": 1127.4},
+    "review": {"text": "Demorou muito!!"},
+}
+
+
+def test_score_file_hybrid_records(tiny_handle, tmp_path):
+    """Test that HybridInput NDJSON is featurized like the API and scored, with bad lines reported."""
+    from olist_review_model.processing.hybrid import HybridInput, build_features
+
+    bad_date = {**HYBRID_ORDER, "delivery": {**HYBRID_ORDER["delivery"], "purchase_date": "yesterday"}}
+    lines = [json.dumps(HYBRID_ORDER), "", json.dumps({"delivery": HYBRID_ORDER["delivery"]}),
+             json.dumps(bad_date), json.dumps({**HYBRID_ORDER, "review": {"text": "Ótimo"}})]
+    path = tmp_path / "orders.ndjson"
+    path.write_text("\n".join(lines) + "\n")
+
+    output = io.StringIO()
+    assert score_file(str(path), output, chunk_size=2, backend="numpy", records="hybrid") == 4
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["row"] for r in results] == [0, 1, 2, 3]
+    expected = make_prediction(build_features(HybridInput.model_validate(HYBRID_ORDER)), backend="numpy")
+    assert results[0]["probability"] == pytest.approx(expected["probability"])
+    assert results[1]["error"].startswith("review")
+    assert "ISO 8601" in results[2]["error"]
+    assert "probability" in results[3]
+
+
+def test_main_hybrid_records_need_ndjson(tmp_path):
+    """Test that HybridInput records are only read from JSON lines files."""
+    with pytest.raises(ValueError, match="jsonl"):
+        main([str(tmp_path / "orders.csv"), "--records", "hybrid"])
@@ -0,0 +1,101 @@
+"""
+Unit tests for the successive halving / Hyperband hyperparameter search.
+"""
+
+import numpy as np
+import pytest
+import yaml
+
+from olist_review_model import pipeline, search
+from olist_review_model.config_cache import CachedFile
+from olist_review_model.experiments import SharedMatrix
+
+SPACE = {"max_depth": [2, 3], "learning_rate": {"low": 0.05, "high": 0.5, "log": True}}
+
+
+@pytest.fixture
+def matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 16)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] + rng.normal(size=600) > 1).astype(np.int8)
+    return SharedMatrix.save(str(tmp_path / "matrix"), X_train=X[:400], X_test=X[400:],
+                             y_train=y[:400], y_test=y[400:])
+
+
+@pytest.fixture
+def search_config(monkeypatch):
+    settings = {"method": "halving", "trials": 9, "eta": 3, "min_rounds": 5, "max_rounds": 45,
+                "max_bin": 32, "space": SPACE}
+    config = dict(pipeline.load_config(), search=settings)
+    monkeypatch.setattr(search, "load_config", lambda: config)
+    return config
+
+
+def test_sample_params_follows_space():
+    """Test that choices come from the list and ranges stay within their bounds."""
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        params = search.sample_params(SPACE, rng)
+        assert params["max_depth"] in (2, 3)
+        assert 0.05 <= params["learning_rate"] <= 0.5
+
+
+def test_brackets_and_rungs():
+    """Test the successive halving rungs and the Hyperband brackets for eta=3."""
+    assert search.brackets("halving", 27, 3, 50, 1500) == [(27, 4)]
+    assert search.halving_rungs(27, 4, 3, 1500) == [(27, 55), (9, 166), (3, 500), (1, 1500)]
+    assert search.brackets("halving", 27, 3, 500, 1500) == [(27, 2)]  # capped by the rounds range
+    assert search.brackets("hyperband", 0, 3, 50, 1500) == [(27, 4), (12, 3), (6, 2), (4, 1)]
+
+
+def test_train_trial_continues_the_booster(matrix):
+    """Test that a trial grows its existing booster instead of starting over."""
+    import xgboost as xgb
+
+    booster, auc, _ = search.train_trial(matrix.directory, {"max_depth": 2}, 5, None, max_bin=32)
+    booster, auc_more, _ = search.train_trial(matrix.directory, {"max_depth": 2}, 15, booster, max_bin=32)
+
+    assert xgb.Booster(model_file=bytearray(booster)).num_boosted_rounds() == 15
+    assert 0.5 < auc <= 1 and 0.5 < auc_more <= 1
+
+
+def test_successive_halving_search(matrix, search_config):
+    """Test that trials are halved per rung and the best rung is reported."""
+    result = search.search(matrix, cpu_budget=1)
+
+    assert len(result.trials) == 9
+    assert sorted(t.rounds for t in result.trials) == [5] * 6 + [15] * 2 + [45]
+    assert result.total_rounds == 6 * 5 + 2 * 15 + 45
+    assert result.best_auc == max(auc for t in result.trials for _, auc in t.history)
+    assert all(t.booster is None for t in result.trials)
+    assert "best: trial" in result.format()
+
+
+def test_hyperband_search(matrix, search_config):
+    """Test that hyperband runs every bracket."""
+    result = search.search(matrix, method="hyperband", cpu_budget=1)
+    assert sorted({t.bracket for t in result.trials}) == [0, 1, 2]
+    with pytest.raises(ValueError, match="Unknown search method"):
+        search.search(matrix, method="grid")
+
+
+def test_profile_overrides_config(matrix, search_config, tmp_path, monkeypatch):
+    """Test that the written profile overrides config.yml when named by config_profile."""
+    monkeypatch.setattr(pipeline, "PROFILES_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(search, "PROFILES_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(search, "profile_path", lambda name: str(tmp_path / "profiles" / f"{name}.yml"))
+    result = search.search(matrix, trials=3, cpu_budget=1)
+    path = search.write_profile(result, "best")
+
+    with open(path) as f:
+        hyperparameters = yaml.safe_load(f)["hyperparameters"]
+    assert hyperparameters["n_estimators"] == result.best_rounds
+    assert hyperparameters["max_depth"] == result.best.params["max_depth"]
+
+    config_file = tmp_path / "config.yml"
+    config_file.write_text("config_profile: best\nhyperparameters: {n_estimators: 1}\ntest_size: 0.2\n")
+    monkeypatch.setattr(pipeline, "_config_file", CachedFile(str(config_file), yaml.safe_load))
+    config = pipeline.load_config()
+    assert config["hyperparameters"]["n_estimators"] == result.best_rounds
+    assert config["test_size"] == 0.2
+    assert pipeline.load_config() is config
@@ -0,0 +1,86 @@
+"""
+Parity tests of the DuckDB maestro backend against the pandas build.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from olist_review_model.geo_index import build_geo_index  # noqa: E402
+from olist_review_model.pipeline import build_maestro, load_raw_data, prepare_training_data  # noqa: E402
+from olist_review_model.sql_maestro import (  # noqa: E402
+    build_geo_index_sql,
+    build_maestro_sql,
+    prepare_training_data_sql,
+)
+from olist_review_model.text_features import TEXT_FEATURES, text_stats  # noqa: E402
+
+
+def test_build_maestro_sql_matches_pandas(raw_data_dir):
+    """Test that the DuckDB maestro has the rows, order, columns, dtypes and values of the lean build."""
+    expected = build_maestro(load_raw_data(str(raw_data_dir)), lean=True)
+    result = build_maestro_sql(str(raw_data_dir))
+
+    assert list(result.columns) == list(expected.columns)
+    assert result["order_id"].tolist() == expected["order_id"].astype(str).tolist()
+    pd.testing.assert_frame_equal(result.drop(columns="order_id"), expected.drop(columns="order_id"))
+
+
+def test_prepare_training_data_sql_matches_pandas(raw_data_dir, config):
+    """Test that the DuckDB training frame filters sentinel dates and sets the target like pandas."""
+    data = load_raw_data(str(raw_data_dir))
+    geo_index = build_geo_index(data["geolocation"])
+    expected = prepare_training_data(build_maestro(data, geo_index, lean=True)).reset_index(drop=True)
+    result = prepare_training_data_sql(str(raw_data_dir), geo_index)
+
+    assert result["order_id"].tolist() == ["o1"]
+    pd.testing.assert_frame_equal(
+        result[list(config["features"]) + [config["target"]]],
+        expected[list(config["features"]) + [config["target"]]],
+    )
+
+
+def test_build_maestro_sql_writes_parquet(raw_data_dir, tmp_path):
+    """Test that `output` streams the maestro to a Parquet file instead of returning it."""
+    output = str(tmp_path / "maestro.parquet")
+    assert build_maestro_sql(str(raw_data_dir), output=output) == output
+    pd.testing.assert_frame_equal(pd.read_parquet(output), build_maestro_sql(str(raw_data_dir)))
+
+
+def test_sql_text_stats_follow_str_split(raw_data_dir, config):
+    """Test that SQL text statistics match text_stats, including non-ASCII whitespace."""
+    messages = ["Não chegou!!", "  dois   espaços ?", "tab\tand\u2003em", "", "ok\u3000"]
+    path = raw_data_dir / config["data_files"]["reviews"]
+    pd.DataFrame({
+        "review_id": [f"r{i}" for i in range(5)], "order_id": ["o1"] * 5, "review_score": [1] * 5,
+        "review_comment_title": [None] * 5, "review_comment_message": messages,
+    }).to_csv(path, index=False)
+
+    result = build_maestro_sql(str(raw_data_dir))
+    for name in TEXT_FEATURES:
+        expected = [text_stats(" " + message)[name] for message in messages]
+        np.testing.assert_allclose(result[name], expected, rtol=1e-6)
+
+
+def test_build_geo_index_sql_matches_pandas(raw_data_dir):
+    """Test that the SQL geo index has the same records as build_geo_index."""
+    expected = build_geo_index(load_raw_data(str(raw_data_dir))["geolocation"])
+    np.testing.assert_array_equal(build_geo_index_sql(str(raw_data_dir)).records, expected.records)
+
+
+def test_duckdb_training_stages_match_pandas(tmp_path, raw_data_dir, monkeypatch):
+    """Test that maestro_backend: duckdb gives the same features and target as the pandas stages."""
+    from olist_review_model import train_pipeline
+    from olist_review_model.stages import StageRunner
+
+    base = dict(train_pipeline.load_config(), data_dir=str(raw_data_dir), raw_cache_dir=None)
+    results = {}
+    for backend in ("pandas", "duckdb"):
+        monkeypatch.setattr(train_pipeline, "load_config", lambda: dict(base, maestro_backend=backend))
+        outputs, _ = StageRunner(train_pipeline.training_stages(), str(tmp_path / backend)).run()
+        results[backend] = outputs["features"]
+
+    pd.testing.assert_frame_equal(results["duckdb"][0], results["pandas"][0].reset_index(drop=True))
+    assert results["duckdb"][1].tolist() == results["pandas"][1].tolist()
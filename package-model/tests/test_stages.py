@@ -0,0 +1,107 @@
+"""
+Unit tests for the memoized pipeline stages.
+"""
+
+import pytest
+
+from olist_review_model.pipeline import load_config
+from olist_review_model.stages import Stage, StageRunner
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def stages(calls):
+    """A three-stage chain that records every stage it actually runs."""
+    def source():
+        calls.append("source")
+        return [1, 2, 3]
+
+    def doubled(values):
+        calls.append("doubled")
+        return [v * 2 for v in values]
+
+    def total(values):
+        calls.append("total")
+        return sum(values)
+
+    return [
+        Stage("source", source, fingerprint=lambda: "v1"),
+        Stage("doubled", doubled, inputs=("source",)),
+        Stage("total", total, inputs=("doubled",), config_keys=("negative_threshold",)),
+    ]
+
+
+def test_second_run_is_served_from_cache(tmp_path, stages, calls):
+    """Test that an unchanged pipeline runs no stage the second time."""
+    first, _ = StageRunner(stages, str(tmp_path)).run()
+    calls.clear()
+    second, report = StageRunner(stages, str(tmp_path)).run()
+
+    assert second["total"] == first["total"] == 12
+    assert calls == []
+    assert report.hits == 3
+
+
+def test_config_change_reruns_only_dependent_stages(tmp_path, stages, calls, monkeypatch):
+    """Test that changing a config key reruns only the stage reading it, without loading skipped outputs."""
+    StageRunner(stages, str(tmp_path)).run()
+    calls.clear()
+
+    config = dict(load_config(), negative_threshold=3)
+    monkeypatch.setattr("olist_review_model.stages.load_config", lambda: config)
+    outputs, report = StageRunner(stages, str(tmp_path)).run()
+
+    assert calls == ["total"]
+    assert "source" not in outputs
+    assert report.as_dict()["total"]["hit"] is False
+
+
+def test_fingerprint_change_reruns_everything(tmp_path, stages, calls):
+    """Test that new source data invalidates every downstream stage."""
+    StageRunner(stages, str(tmp_path)).run()
+    calls.clear()
+
+    stages[0] = Stage("source", stages[0].run, fingerprint=lambda: "v2")
+    StageRunner(stages, str(tmp_path)).run()
+    assert calls == ["source", "doubled", "total"]
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_force_stage_reruns_it_and_downstream(tmp_path, stages, calls):
+    """Test that --force-stage recomputes the stage and the stages after it."""
+    StageRunner(stages, str(tmp_path)).run()
+    calls.clear()
+
+    _, report = StageRunner(stages, str(tmp_path)).run(force=["doubled"])
+    assert calls == ["doubled", "total"]
+    assert [r.hit for r in report.results] == [True, False, False]
+
+    with pytest.raises(ValueError, match="Unknown stages"):
+        StageRunner(stages, str(tmp_path)).run(force=["nope"])
+
+
+def test_training_stages_build_features(tmp_path, raw_data_dir, monkeypatch):
+    """Test that the training DAG produces the model features and target from raw CSVs."""
+    from olist_review_model import train_pipeline
+
+    config = dict(load_config(), data_dir=str(raw_data_dir), raw_cache_dir=None)
+    monkeypatch.setattr(train_pipeline, "load_config", lambda: config)
+
+    outputs, _ = StageRunner(train_pipeline.training_stages(), str(tmp_path)).run()
+    X, y = outputs["features"]
+    assert list(X.columns) == list(config["features"])
+    assert y.tolist() == [1]  # the undelivered order is filtered out
+
+    _, report = StageRunner(train_pipeline.training_stages(), str(tmp_path)).run()
+    assert report.hits == len(train_pipeline.STAGE_NAMES)
+
+
+def test_report_includes_peak_rss(tmp_path, stages):
+    """Test that every stage reports a peak RSS."""
+    _, report = StageRunner(stages, str(tmp_path)).run()
+    assert all(r.peak_rss_bytes > 0 for r in report.results)
+    assert "peak RSS MiB" in report.format()
@@ -0,0 +1,49 @@
+"""
+Unit tests for the shared text statistics.
+"""
+
+import pandas as pd
+import pytest
+
+from olist_review_model.text_features import TEXT_FEATURES, text_stats, text_stats_batch
+
+TEXTS = [
+    "O produto demorou muito para chegar!",
+    "",
+    "   ",
+    "Chegou?? Não recebi nada!!!",
+    "  espaços\tduplos \n e quebras  ",
+    "emoji 😀 e aspas “curvas”",
+    "sem quebra e em space",
+    "separador\x1cascii",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_text_stats_values(text):
+    """Test that the scalar stats follow str.split() and str.count()."""
+    words = text.split()
+    stats = text_stats(text)
+    assert stats["char_count"] == len(text)
+    assert stats["word_count"] == len(words)
+    assert stats["exclamation_count"] == text.count("!")
+    assert stats["question_count"] == text.count("?")
+    assert stats["avg_word_length"] == pytest.approx(sum(map(len, words)) / len(words) if words else 0.0)
+
+
+def test_batch_matches_scalar():
+    """Test that the vectorized stats equal the scalar ones for every text."""
+    batch = text_stats_batch(TEXTS)
+    for i, text in enumerate(TEXTS):
+        for name, value in text_stats(text).items():
+            assert batch[name][i] == pytest.approx(value), (text, name)
+
+
+def test_batch_handles_missing_and_sliced_input():
+    """Test that None counts as an empty text and sliced Series keep their own rows."""
+    series = pd.Series(["ignored!", None, "dois words?"])[1:]
+    batch = text_stats_batch(series)
+    assert set(batch) == set(TEXT_FEATURES)
+    assert batch["char_count"].tolist() == [0, 11]
+    assert batch["word_count"].tolist() == [0, 2]
+    assert batch["question_count"].tolist() == [0, 1]
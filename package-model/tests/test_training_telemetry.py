@@ -0,0 +1,116 @@
+"""
+Unit tests for the training telemetry / time budget / checkpoint callback.
+"""
+
+import json
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from olist_review_model.training_telemetry import (
+    STOP_EARLY_STOPPING,
+    STOP_N_ESTIMATORS,
+    STOP_TIME_BUDGET,
+    TrainingTelemetry,
+    early_stopping_split,
+    training_callbacks,
+)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 4)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(size=500) > 0).astype(int)
+    return X[:400], y[:400], X[400:], y[400:]
+
+
+def _fit(data, callbacks, n_estimators=30):
+    X_train, y_train, X_test, y_test = data
+    model = xgb.XGBClassifier(n_estimators=n_estimators, max_depth=2, eval_metric="auc", callbacks=callbacks)
+    model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+    return model
+
+
+def test_records_every_round(data):
+    """Test that each round's time, throughput and eval AUC are recorded."""
+    telemetry = TrainingTelemetry(n_rows=400)
+    _fit(data, [telemetry])
+
+    assert telemetry.rounds["iteration"] == list(range(30))
+    assert all(s > 0 for s in telemetry.rounds["seconds"])
+    assert all(0 < auc <= 1 for auc in telemetry.rounds["auc"])
+    assert telemetry.best_score == pytest.approx(max(telemetry.rounds["auc"]), abs=1e-6)
+    assert telemetry.stopped_by(30) == STOP_N_ESTIMATORS
+
+
+def test_time_budget_stops_training(data):
+    """Test that boosting stops once the wall-clock budget is spent."""
+    telemetry = TrainingTelemetry(n_rows=400, time_budget_s=1e-9)
+    model = _fit(data, [telemetry])
+
+    assert model.get_booster().num_boosted_rounds() == 1
+    assert telemetry.stopped_by(30) == STOP_TIME_BUDGET
+
+
+def test_checkpoint_holds_best_iteration(data, tmp_path):
+    """Test that the checkpoint has the trees up to the best iteration so far."""
+    path = str(tmp_path / "best.ubj")
+    telemetry = TrainingTelemetry(n_rows=400, checkpoint_path=path, checkpoint_every=10)
+    _fit(data, [telemetry])
+
+    checkpoint = xgb.Booster(model_file=path)
+    assert checkpoint.num_boosted_rounds() == telemetry.best_iteration + 1
+
+
+def test_early_stopping_keeps_best_trees(data, tmp_path):
+    """Test that the configured callbacks stop early and keep only the best iteration's trees."""
+    config = {"early_stopping_rounds": 5, "training_time_budget_s": 0, "checkpoint_every": 10}
+    callbacks = training_callbacks(config, 400, None)
+    telemetry = callbacks[-1]
+    model = _fit(data, callbacks, n_estimators=500)
+
+    assert telemetry.stopped_by(500) == STOP_EARLY_STOPPING
+    assert len(telemetry.rounds["iteration"]) == telemetry.best_iteration + 5  # 5 rounds without improvement
+    assert model.get_booster().num_boosted_rounds() == telemetry.best_iteration + 1
+
+    path = str(tmp_path / "telemetry.json")
+    telemetry.save(path, 500, model.get_booster().num_boosted_rounds(), roc_auc=0.5)
+    with open(path) as f:
+        report = json.load(f)
+    assert report["stopped_by"] == STOP_EARLY_STOPPING
+    assert report["n_trees"] == report["best_iteration"] + 1
+    assert len(report["per_round"]["seconds"]) == report["rounds"]
+    assert report["roc_auc"] == 0.5
+
+
+def test_no_early_stopping_when_disabled():
+    """Test that early_stopping_rounds: 0 leaves only the telemetry callback."""
+    callbacks = training_callbacks({"early_stopping_rounds": 0}, 10, None)
+    assert [type(cb) for cb in callbacks] == [TrainingTelemetry]
+
+
+def test_validation_split_only_with_early_stopping(data):
+    """Test that early stopping fits on a validation split of the training rows and is otherwise given every row."""
+    X_train, y_train, _, _ = data
+    config = {"early_stopping_rounds": 5, "test_size": 0.2, "random_state": 42}
+    X_fit, y_fit, eval_set = early_stopping_split(X_train, y_train, config)
+    (X_valid, y_valid), = eval_set
+
+    assert (len(X_fit), len(X_valid)) == (320, 80)
+    assert len(y_fit) + len(y_valid) == len(y_train)
+    X_fit, y_fit, eval_set = early_stopping_split(X_train, y_train, dict(config, early_stopping_rounds=0))
+    assert X_fit is X_train and y_fit is y_train and eval_set is None
+
+
+def test_checkpoint_without_eval_set_holds_latest_round(data, tmp_path):
+    """Test that without an eval set the checkpoint holds every round fit so far."""
+    X_train, y_train, _, _ = data
+    path = str(tmp_path / "latest.ubj")
+    telemetry = TrainingTelemetry(n_rows=400, checkpoint_path=path, checkpoint_every=10)
+    xgb.XGBClassifier(n_estimators=25, max_depth=2, callbacks=[telemetry]).fit(X_train, y_train)
+
+    assert telemetry.best_score is None and telemetry.best_iteration == 24
+    assert xgb.Booster(model_file=path).num_boosted_rounds() == 20
+    assert telemetry.stopped_by(25) == STOP_N_ESTIMATORS
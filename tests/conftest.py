@@ -10,6 +10,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import create_app
+from olist_review_model.registry import ModelHandle
 
 # Stable fake response returned by the mocked model during API tests.
 # Keeps tests independent of trained model artifacts and the model package.
@@ -38,6 +39,23 @@ _MOCK_SHAP_RESULT = {
 }
 
 
+_MOCK_MODEL_HANDLE = ModelHandle(
+    name="olist_xgb_model.ubj",
+    version="0.1.0",
+    path="/models/olist_xgb_model.ubj",
+    model=None,
+    load_seconds=0.25,
+    size_bytes=1024,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_model_registry():
+    """Patch the model registry so tests never load a trained model file."""
+    with patch("olist_review_model.registry.get_model", return_value=_MOCK_MODEL_HANDLE):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def mock_model_predict():
     """Patch the model inference so tests never need a trained model file."""
@@ -48,12 +66,38 @@ def mock_model_predict():
         yield
 
 
+@pytest.fixture(autouse=True)
+def mock_model_predict_batch():
+    """Patch batch inference to return one mocked result per feature row."""
+
+    def predict_batch(frame, engine=None):
+        predictions = [
+            {key: _MOCK_SHAP_RESULT[key] for key in ("is_negative", "probability", "shap_contributions")}
+            for _ in range(len(frame))
+        ]
+        return {"predictions": predictions, "version": _MOCK_SHAP_RESULT["version"]}
+
+    with patch(
+        "olist_review_model.predict.make_multiple_predictions_with_shap",
+        side_effect=predict_batch,
+    ):
+        yield
+
+
 @pytest.fixture(scope="module")
 def app():
     """Create a test application instance."""
     return create_app("testing")
 
 
+@pytest.fixture(autouse=True)
+def clear_result_cache(app):
+    """Start every test with an empty result cache so model mocks see every call."""
+    if app.state.result_cache is not None:
+        app.state.result_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="module")
 def client(app):
     """Create a test client bound to the test application."""
@@ -2,6 +2,11 @@
 
 from http import HTTPStatus
 
+import olist_review_model.predict
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
 
 VALID_PAYLOAD = {
     "delivery": {
@@ -130,3 +135,35 @@ class TestAnalyzeHybrid:
 
         # Then: returns 422 — both or neither rule
         assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    def test_uses_configured_explanation_engine(self, client):
+        # Given: the testing settings (micro-batching enabled)
+        # When: POST /analyze/hybrid
+        client.post("/analyze/hybrid", json=VALID_PAYLOAD)
+
+        # Then: the batched model call uses the configured explanation engine
+        mock = olist_review_model.predict.make_multiple_predictions_with_shap
+        assert mock.call_args.kwargs["engine"] == "native"
+
+    def test_without_micro_batching_scores_single_item(self):
+        # Given: an app with micro-batching disabled
+        app = create_app("testing")
+        app.state.batcher = None
+
+        # When: POST /analyze/hybrid
+        response = TestClient(app).post("/analyze/hybrid", json=VALID_PAYLOAD)
+
+        # Then: the single-item model call is used with the configured engine
+        assert response.status_code == HTTPStatus.OK
+        mock = olist_review_model.predict.make_prediction_with_shap
+        assert mock.call_args.kwargs["engine"] == "native"
+
+    def test_full_micro_batch_queue_returns_503(self, app, client, monkeypatch):
+        # Given: a micro-batcher that accepts no more items
+        monkeypatch.setattr(app.state.batcher, "max_queue_size", 0)
+
+        # When: POST /analyze/hybrid
+        response = client.post("/analyze/hybrid", json=VALID_PAYLOAD)
+
+        # Then: the request is shed with 503
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
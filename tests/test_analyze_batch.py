@@ -0,0 +1,203 @@
+"""Tests for POST /analyze/hybrid/batch endpoint and vectorized feature building."""
+
+from http import HTTPStatus
+
+import pytest
+
+from app.schemas.predict import HybridInput
+from olist_review_model.processing.hybrid import build_feature_frame as _build_feature_frame
+from olist_review_model.processing.hybrid import build_features as _build_features
+
+VALID_ITEM = {
+    "delivery": {
+        "purchase_date": "2024-01-01T10:00:00",
+        "promised_date": "2024-01-08T23:59:59",
+    },
+    "review": {"text": "Produto chegou bem, sem problemas"},
+}
+
+FULL_ITEM = {
+    "delivery": {
+        "purchase_date": "2024-01-01T10:00:00",
+        "promised_date": "2024-01-08T23:59:59",
+        "dispatched_date": "2024-01-02T14:00:00",
+        "delivered_date": "2024-01-12T15:30:00",
+    },
+    "financials": {"order_total": 189.90, "shipping_cost": 24.50, "payment_installments": 3},
+    "location": {"distance_km": 1127.4},
+    "item": {"weight_g": 850, "description_length": 320, "media_count": 2},
+    "review": {"text": "Demorou   muito!! Alguém sabe o porquê?"},
+}
+
+OFFSET_ITEM = {
+    **FULL_ITEM,
+    "delivery": {
+        "purchase_date": "2024-01-01T22:00:00-03:00",
+        "promised_date": "2024-01-08T23:59:59-03:00",
+        "dispatched_date": "2024-01-02T14:00:00Z",
+        "delivered_date": "2024-01-12T01:30:00Z",
+    },
+}
+
+
+class TestAnalyzeHybridBatch:
+    def test_scores_every_valid_item(self, client):
+        # Given: a batch of two valid items
+        # When: POST /analyze/hybrid/batch
+        response = client.post("/analyze/hybrid/batch", json={"items": [VALID_ITEM, FULL_ITEM]})
+
+        # Then: both items are scored inside the standard envelope
+        assert response.status_code == HTTPStatus.OK
+        body = response.json()
+        assert body["status"] == "ok"
+        data = body["data"]
+        assert data["total"] == 2
+        assert data["succeeded"] == 2
+        assert [r["index"] for r in data["results"]] == [0, 1]
+        assert all(r["prediction"]["sentiment"] in ("negative", "positive") for r in data["results"])
+
+    def test_invalid_item_gets_its_own_errors(self, client):
+        # Given: a batch where the middle item has no review
+        items = [VALID_ITEM, {"delivery": VALID_ITEM["delivery"]}, FULL_ITEM]
+
+        # When: POST /analyze/hybrid/batch
+        response = client.post("/analyze/hybrid/batch", json={"items": items})
+
+        # Then: only that item fails, with a validation error pointing at the field
+        data = response.json()["data"]
+        assert data["succeeded"] == 2
+        assert data["failed"] == 1
+        failed = data["results"][1]
+        assert failed["status"] == "error"
+        assert failed["prediction"] is None
+        assert failed["errors"][0]["loc"] == ["review"]
+
+    def test_unparseable_date_is_an_item_error(self, client):
+        # Given: an item whose purchase date is not ISO 8601
+        bad = {**VALID_ITEM, "delivery": {**VALID_ITEM["delivery"], "purchase_date": "yesterday"}}
+
+        # When: POST /analyze/hybrid/batch
+        response = client.post("/analyze/hybrid/batch", json={"items": [bad, VALID_ITEM]})
+
+        # Then: the bad item is rejected and the other one is scored
+        results = response.json()["data"]["results"]
+        assert results[0]["status"] == "error"
+        assert results[1]["status"] == "ok"
+
+    def test_items_with_different_utc_offsets(self, client):
+        # Given: items with -03:00 dates, Z dates and naive dates
+        utc_item = {**VALID_ITEM, "delivery": {"purchase_date": "2024-01-01T10:00:00Z",
+                                               "promised_date": "2024-01-08T23:59:59Z"}}
+
+        # When: POST /analyze/hybrid/batch with all of them
+        response = client.post("/analyze/hybrid/batch", json={"items": [OFFSET_ITEM, utc_item, VALID_ITEM]})
+
+        # Then: every item is scored
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["data"]["succeeded"] == 3
+
+    def test_empty_optional_date_is_missing(self, client):
+        # Given: an item with empty dispatched and delivered dates, accepted by /analyze/hybrid
+        item = {**VALID_ITEM, "delivery": {**VALID_ITEM["delivery"], "dispatched_date": "", "delivered_date": ""}}
+
+        # When: POST /analyze/hybrid/batch
+        response = client.post("/analyze/hybrid/batch", json={"items": [item]})
+
+        # Then: the item is scored, not rejected
+        assert response.json()["data"]["results"][0]["status"] == "ok"
+
+    def test_empty_batch_returns_422(self, client):
+        # Given: an empty batch
+        # When: POST /analyze/hybrid/batch
+        response = client.post("/analyze/hybrid/batch", json={"items": []})
+
+        # Then: returns 422 validation error
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    def test_oversized_batch_returns_422(self, app, client, monkeypatch):
+        # Given: a batch limit of one item
+        monkeypatch.setattr(app.state.settings, "BATCH_MAX_ITEMS", 1)
+
+        # When: POST /analyze/hybrid/batch with two items
+        response = client.post("/analyze/hybrid/batch", json={"items": [VALID_ITEM, VALID_ITEM]})
+
+        # Then: the batch is rejected
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestBuildFeatureFrame:
+    @pytest.mark.parametrize("payload", [
+        VALID_ITEM,
+        FULL_ITEM,
+        {**VALID_ITEM, "financials": {"order_total": 10.0, "shipping_cost": 30.0}},
+        {**VALID_ITEM, "item": {"weight_g": 100}, "review": {"text": ""}},
+        OFFSET_ITEM,
+        {**VALID_ITEM, "delivery": {**VALID_ITEM["delivery"], "dispatched_date": "", "delivered_date": ""}},
+    ])
+    def test_matches_single_item_features(self, payload):
+        # Given: a valid input
+        data = HybridInput.model_validate(payload)
+
+        # When: building features one by one and column-wise
+        expected = _build_features(data)
+        frame, rejected = _build_feature_frame([data, data])
+
+        # Then: every row of the frame equals the single-item features
+        assert rejected == []
+        for _, row in frame.iterrows():
+            assert row.to_dict() == pytest.approx(expected)
+
+    def test_mixed_offsets_match_single_item_features(self):
+        # Given: one input with UTC offsets and one with naive dates
+        inputs = [HybridInput.model_validate(OFFSET_ITEM), HybridInput.model_validate(FULL_ITEM)]
+
+        # When: building the feature frame of both together
+        frame, rejected = _build_feature_frame(inputs)
+
+        # Then: each row equals that input's single-item features
+        assert rejected == []
+        for data, (_, row) in zip(inputs, frame.iterrows()):
+            assert row.to_dict() == pytest.approx(_build_features(data))
+
+
+class TestZipPrefixDistance:
+    @pytest.fixture(autouse=True)
+    def geo_index(self, monkeypatch):
+        import numpy as np
+        from olist_review_model.geo_index import GEO_INDEX_DTYPE, GeoIndex
+
+        records = np.array([(1310, -23.56, -46.65), (22290, -22.98, -43.19)], dtype=GEO_INDEX_DTYPE)
+        index = GeoIndex(records)
+        monkeypatch.setattr("olist_review_model.geo_index.get_geo_index", lambda: index)
+        return index
+
+    def test_zip_prefixes_resolve_to_distance(self, geo_index):
+        # Given: an input with zip prefixes but no distance
+        data = HybridInput.model_validate(
+            {**VALID_ITEM, "location": {"customer_zip_prefix": 1310, "seller_zip_prefix": 22290}}
+        )
+
+        # When: building features one by one and column-wise
+        single = _build_features(data)
+        frame, _ = _build_feature_frame([data])
+
+        # Then: the distance comes from the geo index
+        expected = float(geo_index.distance_km([1310], [22290])[0])
+        assert single["distance_seller_customer_km"] == pytest.approx(expected)
+        assert frame["distance_seller_customer_km"].iloc[0] == pytest.approx(expected)
+
+    def test_explicit_distance_and_unknown_zip(self, geo_index):
+        # Given: one input with an explicit distance and one with an unknown zip prefix
+        explicit = HybridInput.model_validate(
+            {**VALID_ITEM, "location": {"distance_km": 5.0, "customer_zip_prefix": 1310, "seller_zip_prefix": 22290}}
+        )
+        unknown = HybridInput.model_validate(
+            {**VALID_ITEM, "location": {"customer_zip_prefix": 99999, "seller_zip_prefix": 22290}}
+        )
+
+        # When: building the feature frame
+        frame, _ = _build_feature_frame([explicit, unknown])
+
+        # Then: distance_km wins and the unknown prefix falls back like a missing distance
+        fallback = _build_features(HybridInput.model_validate(VALID_ITEM))["distance_seller_customer_km"]
+        assert frame["distance_seller_customer_km"].tolist() == pytest.approx([5.0, fallback])
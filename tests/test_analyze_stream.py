@@ -0,0 +1,125 @@
+"""Tests for POST /analyze/hybrid/stream NDJSON endpoint."""
+
+import asyncio
+import json
+from http import HTTPStatus
+
+import olist_review_model.predict
+
+from app.routers.analyze import _LINE_TOO_LONG, _ndjson_chunks
+
+ITEM = {
+    "delivery": {
+        "purchase_date": "2024-01-01T10:00:00",
+        "promised_date": "2024-01-08T23:59:59",
+    },
+    "review": {"text": "Produto chegou bem"},
+}
+
+
+def _ndjson(*records):
+    return "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records)
+
+
+def _post(client, body):
+    return client.post(
+        "/analyze/hybrid/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+
+class TestAnalyzeHybridStream:
+    def test_streams_one_result_per_line(self, client):
+        # Given: three NDJSON records
+        body = _ndjson(ITEM, {**ITEM, "review": {"text": "Nunca chegou!"}}, ITEM)
+
+        # When: POST /analyze/hybrid/stream
+        response = _post(client, body)
+
+        # Then: NDJSON results come back in input order
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert all(r["status"] == "ok" for r in results)
+
+    def test_bad_lines_get_their_own_errors(self, client):
+        # Given: a line that is not JSON and one missing the review
+        body = _ndjson(ITEM, "{not json", {"delivery": ITEM["delivery"]})
+
+        # When: POST /analyze/hybrid/stream
+        results = [json.loads(line) for line in _post(client, body).text.splitlines()]
+
+        # Then: only those lines fail
+        assert [r["status"] for r in results] == ["ok", "error", "error"]
+        assert results[1]["errors"][0]["type"] == "json_invalid"
+        assert results[2]["errors"][0]["loc"] == ["review"]
+
+    def test_scores_in_chunks(self, app, client, monkeypatch):
+        # Given: a chunk size of two lines and five distinct records (blank lines ignored)
+        monkeypatch.setattr(app.state.settings, "STREAM_CHUNK_SIZE", 2)
+        records = [{**ITEM, "review": {"text": "x" * n}} for n in range(1, 6)]
+        body = _ndjson(*records[:2]) + "\n" + _ndjson(*records[2:]).rstrip("\n")
+
+        # When: POST /analyze/hybrid/stream
+        results = [json.loads(line) for line in _post(client, body).text.splitlines()]
+
+        # Then: every record is scored, one model call per chunk
+        assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+        mock = olist_review_model.predict.make_multiple_predictions_with_shap
+        assert [len(call.args[0]) for call in mock.call_args_list] == [2, 2, 1]
+
+    def test_overlong_line_is_an_item_error(self, app, client, monkeypatch):
+        # Given: a line limit shorter than the second record
+        monkeypatch.setattr(app.state.settings, "STREAM_MAX_LINE_BYTES", 200)
+        body = _ndjson(ITEM, {**ITEM, "review": {"text": "x" * 500}}, ITEM)
+
+        # When: POST /analyze/hybrid/stream
+        results = [json.loads(line) for line in _post(client, body).text.splitlines()]
+
+        # Then: only that line fails, and the lines after it keep their indices
+        assert [r["status"] for r in results] == ["ok", "error", "ok"]
+        assert "exceeds 200 bytes" in results[1]["errors"][0]["msg"]
+
+    def test_empty_body_returns_no_results(self, client):
+        # Given: an empty body
+        # When: POST /analyze/hybrid/stream
+        response = _post(client, "")
+
+        # Then: an empty stream
+        assert response.status_code == HTTPStatus.OK
+        assert response.text == ""
+
+
+class TestNdjsonChunks:
+    @staticmethod
+    def _chunks(pieces, chunk_size=10, max_line_bytes=1_000):
+        async def stream():
+            for piece in pieces:
+                yield piece
+
+        async def collect():
+            return [chunk async for chunk in _ndjson_chunks(stream(), chunk_size, max_line_bytes)]
+
+        return asyncio.run(collect())
+
+    def test_lines_split_across_reads(self):
+        # Given: lines split at arbitrary points across reads, with blank lines and no final newline
+        pieces = [b'{"a"', b': 1}\n\n{"b": 2', b"}\n", b"\n", b'{"c": 3}']
+
+        # When: grouping them into chunks of two lines
+        chunks = self._chunks(pieces, chunk_size=2)
+
+        # Then: each non-blank line comes back whole, in order
+        assert chunks == [[b'{"a": 1}', b'{"b": 2}'], [b'{"c": 3}']]
+
+    def test_unterminated_body_stays_bounded(self):
+        # Given: a body of 1,000 reads with no newline at all
+        pieces = [b"x" * 1_000] * 1_000
+
+        # When: reading it with a 10 kB line limit
+        chunks = self._chunks(pieces, max_line_bytes=10_000)
+
+        # Then: the line is reported as too long instead of being buffered
+        assert chunks == [[_LINE_TOO_LONG]]
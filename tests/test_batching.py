@@ -0,0 +1,124 @@
+"""Tests for the asyncio micro-batcher."""
+
+import asyncio
+
+from app.batching import MicroBatcher, QueueFullError
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestMicroBatcher:
+    def test_groups_concurrent_items_into_one_call(self):
+        # Given: a batcher that records every batch it runs
+        calls = []
+
+        def predict(items):
+            calls.append(list(items))
+            return [item * 10 for item in items]
+
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=20)
+
+        # When: five items are submitted concurrently
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        results = _run(scenario())
+
+        # Then: they are scored in a single call and each caller gets its own result
+        assert calls == [[0, 1, 2, 3, 4]]
+        assert results == [0, 10, 20, 30, 40]
+        assert batcher.stats()["timeout_flushes"] == 1
+
+    def test_flushes_when_batch_is_full(self):
+        # Given: a batcher with a batch size of two
+        calls = []
+
+        def predict(items):
+            calls.append(len(items))
+            return items
+
+        batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=50)
+
+        # When: five items are submitted concurrently
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        results = _run(scenario())
+
+        # Then: full batches flush immediately and the remainder on timeout
+        assert results == [0, 1, 2, 3, 4]
+        assert calls == [2, 2, 1]
+        stats = batcher.stats()
+        assert stats["size_flushes"] == 2
+        assert stats["largest_batch"] == 2
+        assert stats["items"] == 5
+        assert stats["queue_depth"] == 0
+
+    def test_failure_is_propagated_to_every_caller(self):
+        # Given: a batch function that fails
+        def predict(items):
+            raise RuntimeError("model unavailable")
+
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+
+        # When / Then: every waiting request sees the error
+        async def scenario():
+            return await asyncio.gather(
+                *(batcher.submit(i) for i in range(3)), return_exceptions=True
+            )
+
+        results = _run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.queue_depth == 0
+
+    def test_short_result_list_fails_every_caller(self):
+        # Given: a batch function that drops an item
+        batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=3, max_wait_ms=1)
+
+        # When: three items are scored together
+        async def scenario():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True), timeout=5
+            )
+
+        results = _run(scenario())
+
+        # Then: no caller waits forever; each one gets the mismatch error
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert "2 results for 3 items" in str(results[0])
+
+    def test_rejects_items_when_queue_is_full(self):
+        # Given: a batcher with room for a single item
+        batcher = MicroBatcher(lambda items: items, max_batch_size=4, max_wait_ms=10, max_queue_size=1)
+
+        # When: two items are submitted concurrently
+        async def scenario():
+            return await asyncio.gather(
+                batcher.submit(1), batcher.submit(2), return_exceptions=True
+            )
+
+        first, second = _run(scenario())
+
+        # Then: the second one is rejected
+        assert first == 1
+        assert isinstance(second, QueueFullError)
+        assert batcher.stats()["rejected"] == 1
+
+
+class TestModelStats:
+    def test_reports_micro_batch_metrics(self, client):
+        # Given: a request scored through the micro-batcher
+        client.post("/analyze/hybrid", json={
+            "delivery": {"purchase_date": "2024-01-01T10:00:00", "promised_date": "2024-01-08T23:59:59"},
+            "review": {"text": "ok"},
+        })
+
+        # When: GET /model/stats
+        stats = client.get("/model/stats").json()["data"]["microbatch"]
+
+        # Then: batch and queue metrics are reported
+        assert stats["batches"] >= 1
+        assert stats["max_batch_size"] == 32
+        assert stats["queue_depth"] == 0
@@ -34,3 +34,11 @@ class TestGetSettings:
         # Given: production environment class
         # Then: it exists and has correct env
         assert ProductionSettings.model_fields["ENVIRONMENT"].default == "production"
+
+    def test_explanation_engine_defaults_to_native(self):
+        # Given: default settings
+        # When: getting settings
+        settings = get_settings("testing")
+
+        # Then: the shap-free native engine is used on the hot path
+        assert settings.EXPLANATION_ENGINE == "native"
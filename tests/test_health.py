@@ -0,0 +1,93 @@
+"""Tests for /health liveness and /health/ready readiness endpoints."""
+
+import time
+from http import HTTPStatus
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+
+def _wait_until_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == HTTPStatus.OK:
+            return response
+        if client.app.state.startup.error:
+            return response
+        time.sleep(0.01)
+    return response
+
+
+class TestLiveness:
+    def test_health_returns_200_without_warmup(self, client):
+        # Given: an app whose warm-up never ran
+        # When: GET /health
+        response = client.get("/health")
+
+        # Then: liveness answers immediately
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["data"]["alive"] is True
+
+
+class TestReadiness:
+    def test_not_ready_before_warmup(self, client):
+        # Given: an app whose lifespan has not started
+        # When: GET /health/ready
+        response = client.get("/health/ready")
+
+        # Then: 503 with the error envelope
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert response.json()["status"] == "error"
+
+    def test_ready_after_warmup(self):
+        # Given: the app started with its lifespan (model mocked by conftest)
+        app = create_app("testing")
+        with TestClient(app) as client:
+            # When: the warm-up finishes
+            response = _wait_until_ready(client)
+
+        # Then: readiness reports every step and the startup budget
+        assert response.status_code == HTTPStatus.OK
+        report = response.json()["data"]
+        assert report["ready"] is True
+        assert {"import_model_package", "load_model", "load_medians", "warmup_inference"} <= set(report["steps"])
+        assert report["within_budget"] is True
+
+    def test_warmup_builds_shap_explainer_when_configured(self, monkeypatch):
+        # Given: the shap explanation engine
+        app = create_app("testing")
+        monkeypatch.setattr(app.state.settings, "EXPLANATION_ENGINE", "shap")
+        with patch("olist_review_model.explain.get_explainer") as get_explainer:
+            with TestClient(app) as client:
+                report = _wait_until_ready(client).json()["data"]
+
+        # Then: the explainer is built during warm-up
+        assert "build_explainer" in report["steps"]
+        get_explainer.assert_called_once()
+
+    def test_failed_warmup_stays_not_ready(self):
+        # Given: a model that cannot be loaded
+        app = create_app("testing")
+        with patch("olist_review_model.registry.get_model", side_effect=FileNotFoundError("no model")):
+            with TestClient(app) as client:
+                response = _wait_until_ready(client)
+
+                # Then: readiness fails with the cause while liveness still answers
+                assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+                assert "no model" in response.json()["message"]
+                assert client.get("/health").status_code == HTTPStatus.OK
+
+    def test_ready_immediately_when_warmup_disabled(self, monkeypatch):
+        # Given: warm-up disabled
+        app = create_app("testing")
+        monkeypatch.setattr(app.state.settings, "WARMUP_ON_STARTUP", False)
+
+        # When: the app starts
+        with TestClient(app) as client:
+            response = client.get("/health/ready")
+
+        # Then: it is ready right away
+        assert response.status_code == HTTPStatus.OK
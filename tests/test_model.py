@@ -0,0 +1,34 @@
+"""Tests for GET /model/info endpoint."""
+
+from http import HTTPStatus
+
+
+class TestModelInfo:
+    def test_returns_200(self, client):
+        # Given: a running API
+        # When: GET /model/info
+        response = client.get("/model/info")
+
+        # Then: returns 200 with the standard envelope
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["status"] == "ok"
+
+    def test_reports_registry_metadata(self, client):
+        # Given: a model loaded by the registry
+        # When: GET /model/info
+        info = client.get("/model/info").json()["data"]
+
+        # Then: load time and size of the shared handle are exposed
+        assert info["name"] == "olist_xgb_model.ubj"
+        assert info["version"] == "0.1.0"
+        assert info["load_seconds"] == 0.25
+        assert info["size_bytes"] == 1024
+
+    def test_reports_training_metadata_fields(self, client):
+        # Given: a model loaded by the registry
+        # When: GET /model/info
+        info = client.get("/model/info").json()["data"]
+
+        # Then: the metrics and inference benchmark from the model metadata are exposed (None without one)
+        assert "metrics" in info
+        assert "benchmark" in info
@@ -0,0 +1,85 @@
+"""Tests for the prediction result cache in /analyze endpoints."""
+
+from dataclasses import replace
+from http import HTTPStatus
+from unittest.mock import patch
+
+import olist_review_model.predict
+import olist_review_model.registry
+from olist_review_model.result_cache import SQLiteCache
+
+PAYLOAD = {
+    "delivery": {
+        "purchase_date": "2024-01-01T10:00:00",
+        "promised_date": "2024-01-08T23:59:59",
+    },
+    "review": {"text": "Produto chegou bem"},
+}
+
+OTHER_PAYLOAD = {**PAYLOAD, "review": {"text": "Produto nunca chegou!"}}
+
+
+class TestResultCache:
+    def test_identical_request_is_served_from_cache(self, client):
+        # Given: a request that was already scored
+        first = client.post("/analyze/hybrid", json=PAYLOAD)
+
+        # When: the same order is posted again
+        second = client.post("/analyze/hybrid", json=PAYLOAD)
+
+        # Then: the model runs once and both answers match
+        assert second.status_code == HTTPStatus.OK
+        assert second.json()["data"] == first.json()["data"]
+        assert olist_review_model.predict.make_multiple_predictions_with_shap.call_count == 1
+
+    def test_batch_only_scores_cache_misses(self, client):
+        # Given: one order already scored through the single endpoint
+        client.post("/analyze/hybrid", json=PAYLOAD)
+        mock = olist_review_model.predict.make_multiple_predictions_with_shap
+        mock.reset_mock()
+
+        # When: a batch holds that order, a new one and a duplicate of the new one
+        response = client.post("/analyze/hybrid/batch", json={"items": [PAYLOAD, OTHER_PAYLOAD, OTHER_PAYLOAD]})
+
+        # Then: only the two uncached rows reach the model
+        assert response.json()["data"]["succeeded"] == 3
+        assert len(mock.call_args.args[0]) == 2
+
+    def test_retrained_model_misses_the_cache(self, client):
+        # Given: an order scored by the current model
+        client.post("/analyze/hybrid", json=PAYLOAD)
+        mock = olist_review_model.predict.make_multiple_predictions_with_shap
+        retrained = replace(olist_review_model.registry.get_model(), digest="retrained-model")
+
+        # When: the model file is retrained (same name and package version) and the order is posted again
+        with patch("olist_review_model.registry.get_model", return_value=retrained):
+            client.post("/analyze/hybrid", json=PAYLOAD)
+
+        # Then: the new model scores it instead of the cache answering
+        assert mock.call_count == 2
+
+    def test_stats_report_hits_and_misses(self, client):
+        # Given: one miss followed by one hit
+        client.post("/analyze/hybrid", json=PAYLOAD)
+        client.post("/analyze/hybrid", json=PAYLOAD)
+
+        # When: GET /model/stats
+        stats = client.get("/model/stats").json()["data"]["result_cache"]
+
+        # Then: counters reflect the lookups
+        assert stats["backend"] == "memory"
+        assert stats["hits"] >= 1
+        assert stats["misses"] >= 1
+        assert stats["size"] >= 1
+
+    def test_sqlite_backend_is_shared(self, app, client, tmp_path, monkeypatch):
+        # Given: the app using a SQLite cache file that another worker also opened
+        path = str(tmp_path / "results.sqlite")
+        monkeypatch.setattr(app.state, "result_cache", SQLiteCache(path))
+        other_worker = SQLiteCache(path)
+
+        # When: this worker scores an order
+        client.post("/analyze/hybrid", json=PAYLOAD)
+
+        # Then: the other worker can read the stored result
+        assert len(other_worker) == 1
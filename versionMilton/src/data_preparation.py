@@ -6,17 +6,16 @@ probabilidad de que un pedido reciba una reseña negativa (1-2 estrellas)?
 
 import pandas as pd
 import numpy as np
-from math import radians, cos, sin, asin, sqrt
 import warnings
 warnings.filterwarnings('ignore')
 
 def haversine(lon1, lat1, lon2, lat2):
-    """Calcula distancia en km entre dos coordenadas."""
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    """Calcula distancia en km entre coordenadas (escalares o arrays, vectorizado con numpy)."""
+    lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
     dlon = lon2 - lon1
     dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
     return 6371 * c
 
 def load_and_merge_data(data_path="data/raw/"):
@@ -144,12 +143,9 @@ def create_features(df, geolocation):
         on='seller_zip_code_prefix', how='left'
     )
     
-    # Distancia vendedor-cliente
-    mask = df['customer_lat'].notna() & df['seller_lat'].notna()
-    df.loc[mask, 'distance_km'] = df.loc[mask].apply(
-        lambda r: haversine(r['customer_lng'], r['customer_lat'],
-                           r['seller_lng'], r['seller_lat']), axis=1
-    )
+    # Distancia vendedor-cliente (NaN si falta alguna coordenada)
+    df['distance_km'] = haversine(df['customer_lng'], df['customer_lat'],
+                                  df['seller_lng'], df['seller_lat'])
     
     # ---------- Variables de texto ----------
     df['has_comment'] = df['review_comment_message'].notna().astype(int)